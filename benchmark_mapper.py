@@ -0,0 +1,219 @@
+import os
+import shutil
+import tempfile
+import unittest2
+import simplejson
+import database
+import mapped_database
+import mapper
+import synthetic
+import utils
+import write_methods as write
+
+# Mapper Benchmarks:
+#   Times loading, every command and the write methods on synthetic networks
+#   (see synthetic.py) of a few sizes. Run with
+#     python benchmark_mapper.py
+#   The median time of each benchmark is kept in BASELINE the first time it
+#   runs, and later runs fail any benchmark which has become twice as slow.
+#   Remove the file to measure again from scratch.
+
+#: The sizes benchmarked, out of 1000, 10000 and 100000 cities, are set with
+#: MAPPER_BENCHMARK_CITIES, such as "1000,10000". The larger networks take a
+#: long time with the slowest commands.
+CITIES = [ int(size) for size in
+	os.environ.get('MAPPER_BENCHMARK_CITIES', '1000').split(',') ]
+
+BASELINE = 'benchmark_baseline.json'
+
+# The number of cities and routes each import adds.
+IMPORT_SIZE = 100
+
+new_city = {
+	'code': 'new',
+	'name': 'New City',
+	'country': 'NC',
+	'continent': 'Europe',
+	'timezone': 0,
+	'coordinates': {'N': 0, 'E': 0},
+	'population': 1000000,
+	'region': 1
+}
+
+def _stat(subcommand):
+	def benchmark(self):
+		self.execute('stat ' + subcommand)
+	benchmark.__name__ = 'test_stat_' + subcommand
+	benchmark.__doc__ = '"stat %s"' % subcommand
+	return benchmark
+
+def _write_lines(filename, values):
+	lines = open(filename, 'w')
+	try:
+		for value in values:
+			lines.write(simplejson.dumps(value) + '\n')
+	finally:
+		lines.close()
+
+class MapperBenchmarks(object):
+	"""Benchmarks of a network of `cities` cities. Write benchmarks undo
+	their changes, so each call starts from the same database."""
+
+	cities = None
+	baselineFile = BASELINE
+	# Only the scaling of the slow commands matters, not timer noise.
+	maxRegression = 1.0
+	minTime = 0.05
+	warmup = 0
+	repeat = 5
+
+	@classmethod
+	def setUpClass(cls):
+		cls.directory = tempfile.mkdtemp()
+		cls.filename = os.path.join(cls.directory, 'map.json')
+		cls.mapped_filename = os.path.join(cls.directory, 'map.db')
+		cls.output = os.path.join(cls.directory, 'saved')
+
+		data = synthetic.generate(cls.cities)
+		codes = [ city['code'] for city in data['metros'] ]
+		synthetic.write(cls.filename, data)
+		cls.database = database.MapDatabase(cls.filename)
+		cls.database.do(write.save_mapped, cls.mapped_filename)
+
+		# Journeys between the first and last cities, and along a few routes.
+		cls.endpoints = (codes[0], codes[-1])
+		cls.journey = cls._walk(data['routes'], codes[0], 4)
+		cls.route = utils.parse_route(data['routes'][len(data['routes']) // 2])
+		cls.code = codes[len(codes) // 2]
+
+		cls.cities_file = os.path.join(cls.directory, 'cities.jsonl')
+		cls.imported_cities = []
+		for i in range(IMPORT_SIZE):
+			city = dict(new_city, code='new%d' % i)
+			cls.imported_cities.append(city)
+		_write_lines(cls.cities_file, cls.imported_cities)
+
+		# A distance of 0 keeps the imported routes apart from existing ones.
+		cls.routes_file = os.path.join(cls.directory, 'routes.jsonl')
+		cls.imported_routes = [ (codes[i], codes[-i - 1], 0)
+			for i in range(min(IMPORT_SIZE, len(codes) // 2)) ]
+		_write_lines(cls.routes_file,
+			[ utils.format_route(route) for route in cls.imported_routes ])
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.directory)
+
+	@classmethod
+	def _walk(cls, routes, start, hops):
+		"""Return the codes along a path of up to hops routes from start."""
+		adjacent = {}
+		for route in routes:
+			port_a, port_b = route['ports']
+			adjacent.setdefault(port_a, []).append(port_b)
+			adjacent.setdefault(port_b, []).append(port_a)
+
+		path = [ start ]
+		for i in range(hops):
+			unvisited = [ port for port in adjacent[path[-1]]
+				if port not in path ]
+			if not unvisited:
+				break
+			path.append(min(unvisited))
+		return path
+
+	def setUp(self):
+		self.mapper = mapper.BatchMapper()
+		self.mapper.database = self.database
+		self.city = self.database._city_data[self.code]
+
+	def execute(self, line):
+		result = self.mapper.execute(line)
+		if not result['ok']:
+			self.fail(result['error'])
+		return result['result']
+
+	def test_load(self):
+		database.MapDatabase(self.filename)
+
+	def test_load_lazy(self):
+		database.MapDatabase(self.filename, lazy=True)
+
+	def test_load_mapped(self):
+		mapped_database.MappedDatabase(self.mapped_filename)
+
+	test_stat_longflight = _stat('longflight')
+	test_stat_shortflight = _stat('shortflight')
+	test_stat_avgdistance = _stat('avgdistance')
+	test_stat_bigcity = _stat('bigcity')
+	test_stat_smallcity = _stat('smallcity')
+	test_stat_avgpop = _stat('avgpop')
+	test_stat_hubs = _stat('hubs')
+
+	def test_shortest(self):
+		self.execute('shortest %s %s' % self.endpoints)
+
+	def test_route(self):
+		self.execute('route ' + ' '.join(self.journey))
+
+	def test_save(self):
+		self.execute('save ' + self.output)
+
+	def test_save_mapped(self):
+		self.execute('save --mapped ' + self.output)
+
+	def test_add_city(self):
+		self.database.do(write.add_city, dict(new_city))
+		del self.database._city_data[new_city['code']]
+
+	def test_add_route(self):
+		route = (self.endpoints[0], self.endpoints[1], 0)
+		self.database.do(write.add_route, *route)
+		self.database._routes.remove(route)
+
+	def test_del_city(self):
+		removed = utils.routes_with(self.database._routes, self.code)
+		self.database.do(write.del_city, self.city['name'])
+		self.database._city_data[self.code] = self.city
+		self.database._routes.update(removed)
+
+	def test_del_route(self):
+		self.database.do(write.del_route, self.route[0], self.route[1])
+		self.database._routes.add(self.route)
+
+	def test_edit_city(self):
+		name = self.city['name']
+		self.database.do(write.edit_city, self.code, 'Renamed',
+			key='name')
+		self.city['name'] = name
+
+	def test_edit_code(self):
+		"""Change a city's code and back."""
+		self.database.do(write.edit_city, self.code, self.code.lower(),
+			key='code')
+		self.database.do(write.edit_city, self.code.lower(), self.code,
+			key='code')
+
+	def test_import_cities(self):
+		self.database.do(write.import_cities, self.cities_file)
+		for city in self.imported_cities:
+			del self.database._city_data[city['code']]
+
+	def test_import_routes(self):
+		self.database.do(write.import_routes, self.routes_file)
+		self.database._routes.difference_update(self.imported_routes)
+
+def _benchmarks(cities):
+	"""Return the benchmarks for a network of cities cities."""
+	name = 'Benchmark%d' % cities
+	benchmarks = type(name, (MapperBenchmarks, unittest2.BenchmarkCase),
+		{ 'cities': cities, '__module__': __name__ })
+	reason = 'Set MAPPER_BENCHMARK_CITIES to benchmark %d cities' % cities
+	return unittest2.skipUnless(cities in CITIES, reason)(benchmarks)
+
+Benchmark1000 = _benchmarks(1000)
+Benchmark10000 = _benchmarks(10000)
+Benchmark100000 = _benchmarks(100000)
+
+if __name__ == '__main__':
+	unittest2.main()
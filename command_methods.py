@@ -0,0 +1,224 @@
+import database
+import mapped_database
+import read_methods as read
+import write_methods as write
+
+# Command Methods:
+#   The commands shared by the interactive Mapper and BatchMapper (which the
+#   query server uses). Each takes the loaded database and the rest of the
+#   command line, and returns a json-friendly result or throws an error with
+#   a message for the user. Mapper prints the results; BatchMapper returns
+#   them.
+
+#: The write methods behind "import cities" and "import routes".
+IMPORT_METHODS = {
+  'cities': write.import_cities,
+  'routes': write.import_routes
+}
+
+def load(filename):
+  """Load a database, returning it and the result of the "load" command.
+
+  Keyword arguments:
+  filename -- The path of the file, optionally prefixed with "--lazy " or
+              "--mapped ".
+
+  """
+  lazy, filename = split_flag('--lazy', filename)
+  mapped, filename = split_flag('--mapped', filename)
+
+  if mapped:
+    loaded = mapped_database.MappedDatabase(filename)
+  else:
+    loaded = database.MapDatabase(filename, lazy=lazy)
+  return loaded, { 'filename': filename }
+
+def save(database, filename):
+  mapped, filename = split_flag('--mapped', filename)
+
+  if mapped:
+    database.do(write.save_mapped, filename)
+  else:
+    database.do(write.save, filename)
+  return { 'filename': filename }
+
+def list_cities(database, arg):
+  return [ city_summary(name, code)
+    for name, code in database.do(read.get_cities) ]
+
+def info(database, name):
+  cities, adjacent = database.do(read.get_cities_by_name, name)
+  if not cities:
+    raise KeyError('We don\'t serve any cities named "%s."' % name)
+
+  accessible = {}
+  for code, ports in adjacent.items():
+    accessible[code] = [ city_summary(*port) for port in ports ]
+  return { 'cities': cities, 'accessible': accessible }
+
+def continents(database, arg):
+  result = {}
+  for continent, cities in database.do(read.get_continents).items():
+    result[continent] = [ city_summary(*city) for city in cities ]
+  return result
+
+def map_url(database, arg):
+  return { 'url': database.do(read.get_url) }
+
+def stat_longflight(database):
+  return route_summary(database.do(read.get_longest_route))
+
+def stat_shortflight(database):
+  return route_summary(database.do(read.get_shortest_route))
+
+def stat_avgdistance(database):
+  return { 'distance': database.do(read.get_avg_distance) }
+
+def stat_bigcity(database):
+  return database.do(read.get_largest_city)
+
+def stat_smallcity(database):
+  return database.do(read.get_smallest_city)
+
+def stat_avgpop(database):
+  return { 'population': database.do(read.get_average_pop) }
+
+def stat_hubs(database):
+  hubs, maximum = database.do(read.get_hubs)
+  return { 'hubs': [ city_summary(*hub) for hub in hubs ],
+    'connections': maximum }
+
+#: A dictionary mapping "stat" subcommands to methods.
+STATS = {
+  'longflight': stat_longflight,
+  'shortflight': stat_shortflight,
+  'avgdistance': stat_avgdistance,
+  'bigcity': stat_bigcity,
+  'smallcity': stat_smallcity,
+  'avgpop': stat_avgpop,
+  'hubs': stat_hubs
+}
+
+def stat(database, subcommand):
+  if subcommand not in STATS:
+    raise ValueError('"stat %s" is not a valid command.' % subcommand)
+  return STATS[subcommand](database)
+
+def uncity(database, name):
+  return { 'codes': database.do(write.del_city, name) }
+
+def unroute(database, route):
+  cities = route.split()
+  if len(cities) != 2:
+    raise ValueError('Could not read cities.')
+  return route_summary(database.do(write.del_route, cities[0], cities[1]))
+
+def import_file(database, raw_args):
+  kind, filename = (raw_args.split(None, 1) + [''])[:2]
+  filename = filename.strip()
+  if kind not in IMPORT_METHODS or not filename:
+    raise ValueError('Enter "cities" or "routes" and a filename.')
+
+  count = database.do(IMPORT_METHODS[kind], filename)
+  return { 'count': count, 'kind': kind, 'filename': filename }
+
+def newroute(database, raw_route):
+  route = raw_route.split()
+  if len(route) != 3:
+    raise ValueError('Enter two airport codes and a distance.')
+
+  city_a, city_b, distance = format_route(route)
+  database.do(write.add_route, city_a, city_b, distance)
+  return route_summary((city_a, city_b, distance))
+
+def route(database, cities):
+  codes = cities.split()
+  if len(codes) < 2:
+    raise ValueError('Please enter at least two city codes.')
+
+  pairs = []
+  for i in range(1, len(codes)):
+    pairs.append((codes[i-1], codes[i]))
+
+  # One call, so a write can't land between the distance and the cost.
+  distance, time, cost = database.do(read.get_trip, pairs)
+  return { 'distance': distance, 'time': time, 'cost': cost }
+
+def shortest(database, cities):
+  pair = cities.split()
+  if len(pair) != 2:
+    raise ValueError('Please enter exactly two valid city codes.')
+
+  route, distance, time, cost = database.do(read.shortest, pair[0], pair[1])
+  return {
+    'route': route.split(' -> '),
+    'distance': distance,
+    'time': time,
+    'cost': cost
+  }
+
+#: Every command which runs on a loaded database, by name.
+COMMANDS = {
+  'save': save,
+  'list': list_cities,
+  'ls': list_cities,
+  'info': info,
+  'continents': continents,
+  'cont': continents,
+  'map': map_url,
+  'stat': stat,
+  'uncity': uncity,
+  'unroute': unroute,
+  'import': import_file,
+  'newroute': newroute,
+  'route': route,
+  'shortest': shortest
+}
+
+# Helpers
+def format_route(raw_route):
+  """Given a tuple of three strings, type-check and format it as a route."""
+  city_a, city_b, distance = raw_route
+
+  if len(city_a) != 3 or len(city_b) != 3:
+    raise ValueError('Airport codes must be three characters.')
+
+  try:
+    distance = int(distance)
+  except TypeError:
+    raise TypeError('Distance must be a valid integer.')
+  if distance < 0:
+    raise ValueError('Distance must be non-negative.')
+
+  return city_a, city_b, distance
+
+def city_summary(name, code):
+  """Format a (name, code) pair as a dictionary."""
+  return { 'name': name, 'code': code }
+
+def route_summary(route):
+  """Format a route tuple as a dictionary."""
+  return { 'ports': [ route[0], route[1] ], 'distance': route[2] }
+
+def error_message(error):
+  """Return an exception's message for the user, without the quotes KeyError
+  adds. Errors the commands don't throw on purpose are named too.
+
+  """
+  if isinstance(error, KeyError) and len(error.args) == 1:
+    return str(error.args[0])
+  if isinstance(error, (IOError, TypeError, ValueError)):
+    return str(error)
+  return '%s: %s' % (error.__class__.__name__, error)
+
+def split_flag(flag, arg):
+  """Given a flag such as "--lazy" and a command's argument, return whether the
+  argument starts with the flag and the rest of the argument.
+
+  """
+  if arg == flag or arg.startswith(flag + ' '):
+    return True, arg[len(flag):].strip()
+  return False, arg
+
+if __name__ == '__main__':
+  print 'To run the Pandemic Mapper, run "python mapper.py" instead.'
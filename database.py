@@ -1,21 +1,38 @@
+import threading
+import utils
 import simplejson
+from UserDict import DictMixin
+from simplejson.decoder import JSONDecodeError
 
 NEWLINE = ''
 
+#: Decodes routes straight into (code, code, distance) tuples.
+SCHEMA = simplejson.Schema()
+SCHEMA.record(('ports', 'distance'), utils.make_route)
+
 class MapDatabase:
 
-  def __init__(self, filename):
+  def __init__(self, filename, lazy=False):
     """Given a filename, build and store city data and route information.
 
     Keyword arguments:
     filename -- A string with the filename.
+    lazy -- If True, only load the routes and airport codes up front and
+            decode each city's data the first time it is accessed. This
+            saves memory rather than time: with the C speedups loading takes
+            about as long as decoding everything.
     
     """
     try:
-      json = open(filename)
-      parsed_data = simplejson.load(json)
+      json = open(filename, 'rb')
+      if lazy:
+        parsed_data = _scan_document(json.read())
+      else:
+        # Codes repeat in every route, so share one string for each.
+        parsed_data = simplejson.load(json, object_pairs_hook=SCHEMA,
+          intern_strings=True)
 
-    except (IOError, simplejson.decoder.JSONDecodeError):
+    except (IOError, JSONDecodeError):
       raise IOError('Couldn\'t open file "%s".' % filename)
 
     #: Cities are in a dictionary with key == airport code.
@@ -24,6 +41,8 @@ class MapDatabase:
     self._routes = self._parse_routes(parsed_data)
     #: Sources are stored as a list.
     self._sources = parsed_data['data sources']
+    #: Guards the data against writes during reads.
+    self._lock = ReadWriteLock()
 
   def _parse_city_data(self, data):
     """Given the parsed json, build a dict of cities where the keys are airport
@@ -35,6 +54,9 @@ class MapDatabase:
     
     """
     raw_data_list = data['metros']
+    if isinstance(raw_data_list, LazyCityData):
+      return raw_data_list
+
     data_dict = {}
 
     for raw_data in raw_data_list:
@@ -54,17 +76,36 @@ class MapDatabase:
     route_set = set()
 
     for raw_route in raw_route_list:
-      raw_ports = raw_route.pop('ports')
-      
-      # Each route is a tuple with the cities and a distance.
-      route = str(raw_ports[0]), str(raw_ports[1]), raw_route['distance']
-      route_set.add(route) # Add to final set.
+      # Each route is a tuple with the cities and a distance. SCHEMA decodes
+      # most routes that way already; only odd ones are still dicts.
+      if isinstance(raw_route, dict):
+        raw_route = utils.parse_route(raw_route)
+      route_set.add(raw_route) # Add to final set.
 
     return route_set
 
   def do(self, function, *arguments, **keyword_arguments):
+    """Call a read or write method with the database's data.
+
+    Any number of read methods can run at once from different threads, but
+    write methods (those marked with utils.writer) wait for exclusive access,
+    so readers always see the data between two complete writes.
+
+    """
+    if _writes(function):
+      acquire, release = self._lock.acquire_write, self._lock.release_write
+    else:
+      acquire, release = self._lock.acquire_read, self._lock.release_read
+
+    acquire()
+    try:
+      return self._call(function, arguments, keyword_arguments)
+    finally:
+      release()
+
+  def _call(self, function, arguments, keyword_arguments):
     data_args = [ self._city_data, self._routes ]
-    if function.__name__ == 'save':
+    if function.__name__ in ('save', 'save_mapped'):
       data_args.append(self._sources)
 
     if not arguments:
@@ -74,6 +115,145 @@ class MapDatabase:
       full_args.extend(data_args)
 
     return function(*full_args, **keyword_arguments)
-    
+
+class ReadWriteLock:
+  """A lock which can be held by many readers at once or by a single writer.
+
+  Waiting writers go ahead of new readers, so a steady stream of reads can't
+  hold off a write forever.
+
+  """
+
+  def __init__(self):
+    self._condition = threading.Condition(threading.Lock())
+    self._readers = 0
+    self._writing = False
+    self._waiting_writers = 0
+
+  def acquire_read(self):
+    self._condition.acquire()
+    try:
+      while self._writing or self._waiting_writers:
+        self._condition.wait()
+      self._readers += 1
+    finally:
+      self._condition.release()
+
+  def release_read(self):
+    self._condition.acquire()
+    try:
+      self._readers -= 1
+      if not self._readers:
+        self._condition.notifyAll()
+    finally:
+      self._condition.release()
+
+  def acquire_write(self):
+    self._condition.acquire()
+    try:
+      self._waiting_writers += 1
+      while self._writing or self._readers:
+        self._condition.wait()
+      self._waiting_writers -= 1
+      self._writing = True
+    finally:
+      self._condition.release()
+
+  def release_write(self):
+    self._condition.acquire()
+    try:
+      self._writing = False
+      self._condition.notifyAll()
+    finally:
+      self._condition.release()
+
+def _writes(function):
+  """Return whether a function changes the database's data, as marked by
+  utils.writer.
+
+  """
+  return getattr(function, 'writes', False)
+
+class LazyCityData(DictMixin):
+  """A dictionary of cities keyed by airport code which decodes each city's
+  data from the raw json the first time it is accessed.
+
+  Keyword arguments:
+  metros -- A simplejson LazyArray of the city objects.
+  indexes -- A dict mapping each airport code to the index of its city in
+             metros.
+
+  """
+
+  def __init__(self, metros, indexes):
+    self._metros = metros
+    self._indexes = indexes
+    #: Cities added after loading, which have no index.
+    self._added = {}
+
+  def __getitem__(self, code):
+    index = self._indexes[code] # Raises KeyError for unknown codes.
+    if index is None:
+      return self._added[code]
+    return self._metros[index]
+
+  def __setitem__(self, code, city):
+    self._indexes[code] = None
+    self._added[code] = city
+
+  def __delitem__(self, code):
+    del self._indexes[code]
+    self._added.pop(code, None)
+
+  def __contains__(self, code):
+    return code in self._indexes
+
+  has_key = __contains__
+
+  def __iter__(self):
+    return iter(self._indexes)
+
+  def __len__(self):
+    return len(self._indexes)
+
+  def keys(self):
+    return self._indexes.keys()
+
+  def is_decoded(self, code):
+    """Return whether a city's data has been decoded yet."""
+    index = self._indexes[code]
+    return index is None or self._metros.is_decoded(index)
+
+def _scan_document(document):
+  """Given the raw json, build the parsed data for a lazy database.
+
+  The routes and data sources are decoded immediately, but the metros are
+  returned as a LazyCityData where only the airport codes have been read,
+  each by scanning its city's members only as far as "code".
+
+  """
+  lazy_data = simplejson.lazy_loads(document, object_pairs_hook=SCHEMA,
+    intern_strings=True)
+  parsed_data = {}
+
+  for key in lazy_data:
+    if key != 'metros':
+      parsed_data[key] = lazy_data[key]
+      continue
+
+    metros = lazy_data.lazy(key)
+    indexes = {}
+    for index in xrange(len(metros)):
+      try:
+        # Only the members up to the code are scanned, and only it decoded.
+        code = metros.member(index, 'code')
+      except KeyError:
+        raise JSONDecodeError('Expecting "code" in city', document,
+          metros.span(index)[0])
+      indexes[code] = index
+    parsed_data[key] = LazyCityData(metros, indexes)
+
+  return parsed_data
+
 if __name__ == '__main__':
   print 'To run the Pandemic Mapper, run "python mapper.py" instead.'
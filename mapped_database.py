@@ -0,0 +1,308 @@
+import mmap
+import struct
+import simplejson
+from UserDict import DictMixin
+from database import MapDatabase, ReadWriteLock, _writes
+
+# Mapped Database:
+#   A read-only binary copy of a database which is memory-mapped instead of
+#   parsed, so every process that opens the same file shares its pages.
+#
+#   The file starts with a header, followed by these sections:
+#     codes         Offsets of each airport code, sorted by code.
+#     records       Offsets of each city's data as compact json.
+#     row_ptr       For each city, where its edges start in the graph.
+#     edge_targets  The city at the other end of each edge.
+#     edge_routes   The route each edge belongs to.
+#     routes        The (city, city, distance) of each route.
+#     sources       The data sources as json.
+#   The edges are a compressed sparse row graph holding every route in both
+#   directions. The string data follows the sections it is indexed by.
+
+MAGIC = 'PMDB'
+VERSION = 1
+
+#: Magic, version, number of cities, number of routes and section offsets.
+HEADER = struct.Struct('<4sIII8Q')
+OFFSET = struct.Struct('<Q')
+INDEX = struct.Struct('<I')
+ROUTE = struct.Struct('<IIq')
+
+class MappedDatabase(MapDatabase):
+
+  def __init__(self, filename):
+    """Given a filename, memory-map a database written by write().
+
+    Keyword arguments:
+    filename -- A string with the filename.
+
+    """
+    try:
+      mapped_file = open(filename, 'rb')
+      try:
+        data = mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+      finally:
+        mapped_file.close() # The map stays valid after closing.
+      header = HEADER.unpack_from(data, 0)
+
+    except (EnvironmentError, ValueError, struct.error):
+      raise IOError('Couldn\'t open file "%s".' % filename)
+
+    if header[0] != MAGIC or header[1] != VERSION:
+      raise IOError('"%s" is not a mapped database.' % filename)
+
+    columns = _Columns(data, header)
+    #: Cities and routes are read straight out of the map.
+    self._city_data = MappedCityData(columns)
+    self._routes = MappedRoutes(columns)
+    #: Sources are stored as a list.
+    self._sources = simplejson.loads(columns.sources())
+    #: Nothing writes, but do() still expects a lock.
+    self._lock = ReadWriteLock()
+
+  def do(self, function, *arguments, **keyword_arguments):
+    """Call a read method with the database's data.
+
+    Throw a TypeError for write methods, as the data is read-only. Each city
+    is decoded afresh whenever it is accessed, so a change to one would
+    otherwise be lost without a word.
+
+    """
+    if _writes(function):
+      _read_only()
+    return MapDatabase.do(self, function, *arguments, **keyword_arguments)
+
+class MappedCityData(DictMixin):
+  """A read-only dictionary of cities keyed by airport code. Each city's data
+  is decoded from the map whenever it is accessed.
+
+  """
+
+  def __init__(self, columns):
+    self._columns = columns
+
+  def __getitem__(self, code):
+    return self._columns.record(self._columns.index(code))
+
+  def __setitem__(self, code, city):
+    _read_only()
+
+  def __delitem__(self, code):
+    _read_only()
+
+  def __contains__(self, code):
+    try:
+      self._columns.index(code)
+    except KeyError:
+      return False
+    return True
+
+  has_key = __contains__
+
+  def __iter__(self):
+    return iter(self.keys())
+
+  def __len__(self):
+    return self._columns.num_cities
+
+  def keys(self):
+    columns = self._columns
+    return [ columns.code(i) for i in xrange(columns.num_cities) ]
+
+class MappedRoutes(object):
+  """A read-only set of (code, code, distance) routes.
+
+  Besides iteration, it can find adjacent airports and individual routes
+  using the graph, which utils.find_adjacent and utils.find_route use.
+
+  """
+
+  def __init__(self, columns):
+    self._columns = columns
+
+  def __iter__(self):
+    columns = self._columns
+    return (columns.route(r) for r in xrange(columns.num_routes))
+
+  def __len__(self):
+    return self._columns.num_routes
+
+  def __contains__(self, route):
+    try:
+      code_a, code_b, distance = route
+    except (TypeError, ValueError):
+      return False
+    return route in self._routes_between(code_a, code_b)
+
+  def adjacent(self, code):
+    """Return a set of the airports adjacent to an airport."""
+    columns = self._columns
+    try:
+      edges = columns.edges(columns.index(code))
+    except KeyError:
+      return set()
+    return set([ columns.code(target) for target, route in edges ])
+
+  def find(self, code_a, code_b):
+    """Return a route between two airports, or None if there isn't one."""
+    for route in self._routes_between(code_a, code_b):
+      return route
+    return None
+
+  def _routes_between(self, code_a, code_b):
+    columns = self._columns
+    try:
+      source, destination = columns.index(code_a), columns.index(code_b)
+    except KeyError:
+      return []
+    edges = columns.edges(source)
+    return [ columns.route(route) for target, route in edges
+      if target == destination ]
+
+  def add(self, route):
+    _read_only()
+
+  remove = discard = update = difference_update = add
+
+class _Columns:
+  """Read the sections of a mapped database."""
+
+  def __init__(self, data, header):
+    self.data = data
+    self.num_cities, self.num_routes = header[2], header[3]
+    (self.codes_at, self.records_at, self.row_ptr_at, self.targets_at,
+      self.edge_routes_at, self.routes_at, self.sources_at,
+      self.end_at) = header[4:]
+
+  def _string(self, section, i):
+    start, end = struct.unpack_from('<2Q', self.data, section + OFFSET.size*i)
+    return self.data[start:end]
+
+  def code(self, i):
+    return self._string(self.codes_at, i)
+
+  def record(self, i):
+    return simplejson.loads(self._string(self.records_at, i))
+
+  def sources(self):
+    return self.data[self.sources_at:self.end_at]
+
+  def index(self, code):
+    """Binary search the sorted codes for an airport's index."""
+    if isinstance(code, unicode):
+      code = code.encode('utf-8')
+    low, high = 0, self.num_cities
+    while low < high:
+      middle = (low + high) // 2
+      if self.code(middle) < code:
+        low = middle + 1
+      else:
+        high = middle
+
+    if low == self.num_cities or self.code(low) != code:
+      raise KeyError(code)
+    return low
+
+  def edges(self, i):
+    """Return a list of (target, route) indices for each edge of a city."""
+    first, last = struct.unpack_from('<2I', self.data,
+      self.row_ptr_at + INDEX.size*i)
+    count = last - first
+    targets = struct.unpack_from('<%dI' % count, self.data,
+      self.targets_at + INDEX.size*first)
+    routes = struct.unpack_from('<%dI' % count, self.data,
+      self.edge_routes_at + INDEX.size*first)
+    return zip(targets, routes)
+
+  def route(self, r):
+    source, destination, distance = ROUTE.unpack_from(self.data,
+      self.routes_at + ROUTE.size*r)
+    return self.code(source), self.code(destination), distance
+
+def write(filename, city_data, routes, sources):
+  """Write a database to a file that can be opened with MappedDatabase.
+
+  Throw a ValueError if a route's distance isn't an integer.
+
+  """
+  keys = sorted(city_data.keys(), key=_encode)
+  codes = [ _encode(code) for code in keys ]
+  index = dict([ (code, i) for i, code in enumerate(codes) ])
+  records = [ simplejson.dumps(city_data[code], separators=(',', ':'))
+    for code in keys ]
+
+  route_list = list(routes)
+  edges = [ [] for code in codes ]
+  for r, (code_a, code_b, distance) in enumerate(route_list):
+    if int(distance) != distance:
+      raise ValueError('Distance %r must be an integer.' % (distance,))
+    source, destination = index[_encode(code_a)], index[_encode(code_b)]
+    edges[source].append((destination, r))
+    edges[destination].append((source, r))
+
+  # Lay out the sections.
+  num_cities, num_routes = len(codes), len(route_list)
+  codes_at = HEADER.size
+  records_at = codes_at + OFFSET.size*(num_cities + 1)
+  row_ptr_at = records_at + OFFSET.size*(num_cities + 1)
+  targets_at = row_ptr_at + INDEX.size*(num_cities + 1)
+  edge_routes_at = targets_at + INDEX.size*2*num_routes
+  routes_at = edge_routes_at + INDEX.size*2*num_routes
+  strings_at = routes_at + ROUTE.size*num_routes
+
+  code_offsets, strings_at = _string_offsets(codes, strings_at)
+  record_offsets, sources_at = _string_offsets(records, strings_at)
+  sources = simplejson.dumps(sources, separators=(',', ':'))
+  end_at = sources_at + len(sources)
+
+  chunks = [ HEADER.pack(MAGIC, VERSION, num_cities, num_routes, codes_at,
+    records_at, row_ptr_at, targets_at, edge_routes_at, routes_at,
+    sources_at, end_at) ]
+  chunks.extend([ OFFSET.pack(offset) for offset in code_offsets ])
+  chunks.extend([ OFFSET.pack(offset) for offset in record_offsets ])
+
+  row_ptr = 0
+  chunks.append(INDEX.pack(row_ptr))
+  for city_edges in edges:
+    row_ptr += len(city_edges)
+    chunks.append(INDEX.pack(row_ptr))
+  for city_edges in edges:
+    chunks.extend([ INDEX.pack(target) for target, route in city_edges ])
+  for city_edges in edges:
+    chunks.extend([ INDEX.pack(route) for target, route in city_edges ])
+
+  for code_a, code_b, distance in route_list:
+    chunks.append(ROUTE.pack(index[_encode(code_a)], index[_encode(code_b)],
+      int(distance)))
+
+  chunks.extend(codes)
+  chunks.extend(records)
+  chunks.append(sources)
+
+  mapped_file = open(filename, 'wb')
+  try:
+    mapped_file.write(''.join(chunks))
+  finally:
+    mapped_file.close()
+
+def _string_offsets(strings, start):
+  """Return the n + 1 offsets delimiting strings laid out from start, and the
+  offset just past the last one.
+
+  """
+  offsets = [start]
+  for string in strings:
+    start += len(string)
+    offsets.append(start)
+  return offsets, start
+
+def _encode(code):
+  if isinstance(code, unicode):
+    return code.encode('utf-8')
+  return code
+
+def _read_only():
+  raise TypeError('The database is read-only.')
+
+if __name__ == '__main__':
+  print 'To run the Pandemic Mapper, run "python mapper.py" instead.'
@@ -1,7 +1,8 @@
 import cmd
 import sys
-import database
-import read_methods as read
+import optparse
+import simplejson
+import command_methods as commands
 import write_methods as write
 import webbrowser
 
@@ -43,23 +44,41 @@ class Mapper(cmd.Cmd):
     """Load a .json database file.
     
     Keyword arguments:
-    filename -- The relative or absolute path to the .json file.
+    filename -- The relative or absolute path to the .json file. Prefix it with
+                "--lazy " to only load routes and airport codes up front, which
+                takes about half the memory when commands like "shortest" and
+                "route" don't need every city's details. Prefix it
+                with "--mapped " to open a read-only file written by
+                "save --mapped" instead.
     
     """
     try:
-      self.database = database.MapDatabase(filename)
-      print '%s loaded successfully.' % filename
+      self.database, result = commands.load(filename)
+      print '%s loaded successfully.' % result['filename']
     except IOError as error:
       print 'Error: %s' % error
 
-  def do_list(self, args):
-    """List every city and airport code in the database."""
+  def run(self, command, arg):
+    """Run one of the shared commands on the database and return its result,
+    or print why it failed and return None.
+
+    """
     if self.database is None:
       _print_no_file()
-    else:
-      city_data = self.database.do(read.get_cities)
-      for city, code in city_data:
-        print '%s (%s)' % (city, code)
+      return None
+
+    try:
+      return commands.COMMANDS[command](self.database, arg)
+    except Exception as error:
+      print 'Error: %s' % commands.error_message(error)
+      return None
+
+  def do_list(self, args):
+    """List every city and airport code in the database."""
+    cities = self.run('list', args)
+    if cities is not None:
+      for city in cities:
+        print '%(name)s (%(code)s)' % city
  
   def do_info(self, city):
     """Print information about a specific city.
@@ -73,49 +92,41 @@ class Mapper(cmd.Cmd):
     "list" command to find exact names if necessary.
     
     """
-    if self.database is None:
-      _print_no_file()
-    
-    else:
-      cities, adjacent = self.database.do(read.get_cities_by_name, city)
-      if not cities:
-        print 'Error: We don\'t serve any cities named "%s."' % city
-        return
+    result = self.run('info', city)
+    if result is None:
+      return
 
-      for city in cities:
-        for key, value in city.items():
-          print '%s: %s' % (key, value)
-
-        print NEWLINE
-        print 'Accessible Cities:'
-        if not adjacent[city['code']]:
-          print ' None'
-        else:
-          for adj_city_info in adjacent[city['code']]:
-            print ' %s (%s)' % adj_city_info
-        print NEWLINE
+    for city in result['cities']:
+      for key, value in city.items():
+        print '%s: %s' % (key, value)
+
+      print NEWLINE
+      print 'Accessible Cities:'
+      accessible = result['accessible'][city['code']]
+      if not accessible:
+        print ' None'
+      else:
+        for adj_city in accessible:
+          print ' %(name)s (%(code)s)' % adj_city
+      print NEWLINE
   
   def do_continents(self, arg):
     """Print each continent and cities within that continent."""
-    if self.database is None:
-      _print_no_file()
+    continents = self.run('continents', arg)
+    if continents is None:
+      return
 
-    else:
-      continent_and_cities = self.database.do(read.get_continents)
-      for continent, cities in continent_and_cities.items():
-        print 'Cities in %s:' % continent
-        for name, code in cities:
-          print '  %s (%s)' % (name, code)      
-        print NEWLINE
+    for continent, cities in continents.items():
+      print 'Cities in %s:' % continent
+      for city in cities:
+        print '  %(name)s (%(code)s)' % city
+      print NEWLINE
 
   def do_map(self, arg):
     """Open the gcmap in a browser."""
-    if self.database is None:
-      _print_no_file()
-
-    else:
-      url = self.database.do(read.get_url)
-      webbrowser.open(url)
+    result = self.run('map', arg)
+    if result is not None:
+      webbrowser.open(result['url'])
 
   def do_stat(self, subcommand):
     """Query the database for statistics about the entire database.
@@ -163,61 +174,58 @@ class Mapper(cmd.Cmd):
       # Print error message that it's not a valid subcommand.
       self.default('stat ' + subcommand)
     else:
-      # Execute the command from the map.
-      subcommand_map[subcommand]()
+      # Execute the command and print its result.
+      result = self.run('stat', subcommand)
+      if result is not None:
+        subcommand_map[subcommand](result)
 
   # Subcommand print methods.
-  def print_longflight(self):
+  def print_longflight(self, route):
     """Print the longest route's cities and distance."""
-    route = self.database.do(read.get_longest_route)
-    print 'Between %s and %s, %d kilometers.' % route  
+    print 'Between %s and %s, %d kilometers.' % \
+      (route['ports'][0], route['ports'][1], route['distance'])
 
-  def print_shortflight(self):
+  def print_shortflight(self, route):
     """Print the shortest route's cities and distance."""
-    route = self.database.do(read.get_shortest_route)
-    print 'Between %s and %s, %d kilometers.' % route  
+    print 'Between %s and %s, %d kilometers.' % \
+      (route['ports'][0], route['ports'][1], route['distance'])
 
-  def print_avgdistance(self):
+  def print_avgdistance(self, result):
     """Print the mean distance of all the routes in the database."""
-    avg = self.database.do(read.get_avg_distance)
-    print 'Average route distance: %d kilometers.' % avg
+    print 'Average route distance: %d kilometers.' % result['distance']
 
-  def print_bigcity(self):
+  def print_bigcity(self, city):
     """Print the city with the biggest population."""
-    city = self.database.do(read.get_largest_city)
     print '%s (Population: %d)' % (city['name'], city['population'])
 
-  def print_smallcity(self):
+  def print_smallcity(self, city):
     """Print the city with lowest population."""
-    city = self.database.do(read.get_smallest_city)
     print '%s (Population: %d)' % (city['name'], city['population'])
   
-  def print_avgpop(self):
+  def print_avgpop(self, result):
     """Print the average population."""
-    avg = self.database.do(read.get_average_pop)
-    print 'Average population: %d folks.' % avg
-
-  def print_hubs(self):
-    """Print the city or cities with the largest population."""
-    hubs, maximum = self.database.do(read.get_hubs)
+    print 'Average population: %d folks.' % result['population']
 
-    for name, code in hubs:
-      print '%s (%s)' % (name, code)
-    print 'with %d connections.' % maximum
+  def print_hubs(self, result):
+    """Print the city or cities with the most connections."""
+    for hub in result['hubs']:
+      print '%(name)s (%(code)s)' % hub
+    print 'with %d connections.' % result['connections']
 
   # Edit methods.
 
   def do_save(self, filename):
-    """Save the current database to a file."""
-    if self.database is None:
-      _print_no_file()
-      return
+    """Save the current database to a file.
 
-    try:
-      self.database.do(write.save, filename)
-      print 'Saved current database as "%s"' % filename
-    except IOError as error:
-      print 'Error: %s' % error
+    Keyword arguments:
+    filename -- The file to save to. Prefix it with "--mapped " to write a
+                read-only binary file that many processes can share with
+                "load --mapped".
+
+    """
+    result = self.run('save', filename)
+    if result is not None:
+      print 'Saved current database as "%s"' % result['filename']
 
   def do_uncity(self, name):
     """Delete all cities with a certain name.
@@ -226,15 +234,9 @@ class Mapper(cmd.Cmd):
     name -- The name of the city to delete.
 
     """
-    if self.database is None:
-      _print_no_file()
-      return
-
-    try:
-      codes = self.database.do(write.del_city, name)
-      print 'Deleted %s.' % ', '.join(codes)
-    except KeyError as error:
-      print 'Error: %s' % error
+    result = self.run('uncity', name)
+    if result is not None:
+      print 'Deleted %s.' % ', '.join(result['codes'])
 
   def do_unroute(self, route):
     """Delete a route from the database.
@@ -244,22 +246,10 @@ class Mapper(cmd.Cmd):
              CHI and NYC, for example, you would type "unroute CHI NYC".
     
     """
-    if self.database is None:
-      _print_no_file()
-      return
-    
-    cities = route.split()
-    if len(cities) != 2:
-      print 'Error: Could not read cities. Type "help unroute" for'
-      print 'instructions.'
-      return
-
-    try:
-      route = self.database.do(write.del_route, cities[0], cities[1])
-      print 'Removed route %s <-> %s with distance %d.' % route
-
-    except KeyError as error:
-      print 'Error: %s' % error
+    route = self.run('unroute', route)
+    if route is not None:
+      print 'Removed route %s <-> %s with distance %d.' % \
+        (route['ports'][0], route['ports'][1], route['distance'])
 
   def do_newcity(self, arg):
     """Gather information for a city and add it to the database."""
@@ -317,6 +307,19 @@ class Mapper(cmd.Cmd):
         print 'Error: %s' % error
 
 
+  def do_import(self, raw_args):
+    """Add the cities or routes in a json lines file to the database.
+
+    Keyword arguments:
+    raw_args -- Either "cities <filename>" or "routes <filename>". Each line of
+                the file holds one city's or route's dict, as in a saved
+                database.
+
+    """
+    result = self.run('import', raw_args)
+    if result is not None:
+      print 'Imported %(count)d %(kind)s from "%(filename)s".' % result
+
   def do_newroute(self, raw_route):
     """Gather information for a route and add it to the database.
     
@@ -330,20 +333,14 @@ class Mapper(cmd.Cmd):
       _print_no_file()
       return
 
-    route = raw_route.split()
-
     # If blank, we'll prompt for arguments.
-    if not route:
-      route = _prompt_ports()
+    if not raw_route.split():
+      raw_route = ' '.join(_prompt_ports())
 
-    try:
-      city_a, city_b, distance = _format_route(route)
-      self.database.do(write.add_route, city_a, city_b, distance)
+    route = self.run('newroute', raw_route)
+    if route is not None:
       print 'Successfully added route from %s <-> %s, %d kilometers.' % \
-        (city_a, city_b, distance)
-      
-    except (TypeError, KeyError, ValueError) as error:
-      print 'Error: %s' % error
+        (route['ports'][0], route['ports'][1], route['distance'])
 
   def do_route(self, cities):
     """Given a list of cities on a route, calculate the time and cost.
@@ -353,30 +350,10 @@ class Mapper(cmd.Cmd):
                          time and cost to fly from Santiago -> Lima -> Bogota.
     
     """
-    if self.database is None:
-      _print_no_file()
-      return
-
-    codes = cities.split()
-    if not codes:
-      print 'Error: Please enter a list of city codes. Type "help route" for'
-      print 'instructions.'
-      return
-
-    pairs = []
-    for i in range(1, len(codes)):
-      pairs.append((codes[i-1], codes[i]))
-
-    try:
-      self.database.do(read.check_path, pairs)
-      time = self.database.do(read.get_time, pairs)
-      cost = self.database.do(read.get_cost, pairs)
-      distance = self.database.do(read.get_distance, pairs)
-
-      print 'This route is %d kilometres, takes %.3f hours and costs $%.2f.' % \
-       (distance, time, cost)
-    except ValueError as error:
-      print 'Error: %s' % error
+    result = self.run('route', cities)
+    if result is not None:
+      print 'This route is %(distance)d kilometres, takes %(time).3f hours ' \
+        'and costs $%(cost).2f.' % result
  
   # Shortcuts:
   do_quit = do_exit
@@ -393,24 +370,119 @@ class Mapper(cmd.Cmd):
               time, and cost.
     
     """
-    if self.database is None:
-      _print_no_file()
-      return
+    result = self.run('shortest', cities)
+    if result is not None:
+      print ' -> '.join(result['route'])
+      print 'This route is %(distance)d kilometres, takes %(time).3f hours, ' \
+        'costs $%(cost).2f' % result
 
-    pair = cities.split()
-    if len(pair) != 2:
-      print 'Error: Please enter exactly two valid city codes.'
-      return
+class BatchMapper:
+  """Run commands without prompting, returning json-friendly results instead
+  of printing them.
+
+  Each command is the same as in Mapper, except "newcity" and "edit", which
+  need to prompt and aren't available.
+
+  """
+  database = None
+
+  def execute(self, line):
+    """Run a single command and return a dictionary describing the result.
+
+    The dictionary always has the command line and an "ok" flag, along with
+    a "result" if the command succeeded or an "error" message if it failed.
+    A command that fails, for whatever reason, never stops the next one.
+
+    """
+    command, arg = (line.strip().split(None, 1) + [''])[:2]
 
     try:
-      route, distance, time, cost = \
-        self.database.do(read.shortest, pair[0], pair[1])
-      print route
-      print 'This route is %d kilometres, takes %.3f hours, costs $%.2f' % \
-        (distance, time, cost)
+      if command == 'load':
+        self.database, result = commands.load(arg.strip())
+      elif command not in commands.COMMANDS:
+        raise ValueError('"%s" is not a valid command.' % command)
+      elif self.database is None:
+        raise IOError('You need to initialize the database with "load" '
+          'before you can use this command.')
+      else:
+        result = commands.COMMANDS[command](self.database, arg.strip())
+
+    except Exception as error:
+      return { 'command': line.strip(), 'ok': False,
+        'error': commands.error_message(error) }
+
+    return { 'command': line.strip(), 'ok': True, 'result': result }
+
+def run_batch(lines, output, buffer_size=1000):
+  """Run each command in lines with a BatchMapper and write every result to
+  output as a line of json.
+
+  Results are written buffer_size lines at a time. Blank lines and lines
+  starting with "#" are skipped, and "exit" or "quit" stops processing.
+  Return the number of commands that failed.
 
-    except KeyError as error:
-      print 'Error: %s' % error
+  """
+  mapper = BatchMapper()
+  buffered = []
+  failures = 0
+
+  for line in lines:
+    line = line.strip()
+    if not line or line.startswith('#'):
+      continue
+    if line in ('exit', 'quit'):
+      break
+
+    result = mapper.execute(line)
+    if not result['ok']:
+      failures += 1
+
+    buffered.append(simplejson.dumps(result))
+    if len(buffered) >= buffer_size:
+      output.write('\n'.join(buffered) + '\n')
+      buffered = []
+
+  if buffered:
+    output.write('\n'.join(buffered) + '\n')
+  output.flush()
+  return failures
+
+def main(argv):
+  """Start the interactive mapper, or run commands in batch mode if a script
+  or commands are given.
+
+  """
+  parser = optparse.OptionParser(
+    usage='%prog [--load FILE] [--script FILE] [-c COMMAND ...]')
+  parser.add_option('-l', '--load', dest='filename',
+    help='load a database before running any commands')
+  parser.add_option('-s', '--script', dest='script',
+    help='run the commands in FILE ("-" for stdin) and print json results')
+  parser.add_option('-c', dest='commands', action='append', default=[],
+    metavar='COMMAND', help='run COMMAND and print a json result')
+  options, args = parser.parse_args(argv)
+
+  if options.script is None and not options.commands:
+    mapper = Mapper()
+    if options.filename is not None:
+      mapper.do_load(options.filename)
+    mapper.cmdloop() # Start processing commands.
+    return 0
+
+  lines = []
+  if options.filename is not None:
+    lines.append('load ' + options.filename)
+  if options.script == '-':
+    lines.extend(sys.stdin)
+  elif options.script is not None:
+    try:
+      lines.extend(open(options.script).readlines())
+    except IOError:
+      parser.error('Couldn\'t open file "%s".' % options.script)
+  lines.extend(options.commands)
+
+  failures = run_batch(lines, sys.stdout)
+  return min(failures, 1)
 
 def _prompt(key):
   """Prompt for city data, validate their format, and return the value.
@@ -558,23 +630,6 @@ def _prompt_ports():
 
   return city_a, city_b, distance
 
-def _format_route(raw_route):
-  """Given a tuple of three strings, type-check and format it as a route."""
-  city_a, city_b, distance = raw_route
-  
-  if len(city_a) != 3 or len(city_b) != 3:
-    raise ValueError('Airport codes must be three characters.')
-    
-  try:
-    distance = int(distance)
-  except TypeError:
-    raise TypeError('Distance must be a valid integer.')
-  if distance < 0:
-    raise ValueError('Distance must be non-negative.')
-  
-  return city_a, city_b, distance
-
-# Helpers
 def _print_no_file():
   """Print an error message saying the file hasn't been loaded."""
   print 'Error: You need to initialize the database with "load" before you can'
@@ -582,4 +637,4 @@ def _print_no_file():
 
 # Main
 if __name__ == '__main__':
-  Mapper().cmdloop() # Start processing commands.
+  sys.exit(main(sys.argv[1:]))
@@ -135,6 +135,16 @@ def get_cost(code_pairs, city_data, routes):
 
   return cost
 
+def get_trip(code_pairs, city_data, routes):
+  """Check a list of source-destination pairs is possible and return its
+  total distance, time and cost, all from the same version of the data.
+
+  """
+  check_path(code_pairs, city_data, routes)
+  return (get_distance(code_pairs, city_data, routes),
+    get_time(code_pairs, city_data, routes),
+    get_cost(code_pairs, city_data, routes))
+
 def shortest(source, destination, city_data, routes):
   """Given a source and destination, find the shortest path."""
   if source not in city_data.keys() or destination not in city_data.keys():
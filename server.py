@@ -0,0 +1,134 @@
+import os
+import sys
+import optparse
+import SocketServer
+import simplejson
+import mapper
+import command_methods as commands
+
+# Query Server:
+#   Keep a database loaded and answer commands sent over a local socket, so
+#   queries don't pay for starting Python and parsing the map every time.
+#
+#   Each request is a line of json such as {"id": 1, "command": "hubs"}, and
+#   each response is a line of json in the same format as "mapper.py -c",
+#   with the request's "id" copied over if it had one.
+#
+#   Only the commands in QUERIES are answered, so clients can't change the
+#   shared database or write files.
+
+#: The commands clients may send, none of which change anything.
+QUERIES = frozenset([ 'shortest', 'route', 'stat', 'info', 'list', 'ls',
+  'continents', 'cont', 'map' ])
+
+class QueryHandler(SocketServer.StreamRequestHandler):
+  """Answer each line sent over a connection with a line of json."""
+
+  def handle(self):
+    for line in iter(self.rfile.readline, ''):
+      if not line.strip():
+        continue
+      response = self.server.query(line)
+      self.wfile.write(simplejson.dumps(response) + '\n')
+
+class QueryMixIn:
+  """Run requests against one BatchMapper shared by every connection.
+
+  Requests run concurrently; they only read, and MapDatabase.do lets reads
+  share the database.
+
+  """
+
+  def setup_mapper(self, batch_mapper):
+    self.mapper = batch_mapper
+
+  def query(self, line):
+    """Given a line of json, run its command and return the response.
+
+    Any error becomes an error response, so one bad request can't end the
+    connection.
+
+    """
+    try:
+      return self._answer(line)
+    except Exception as error:
+      return { 'ok': False, 'error': commands.error_message(error) }
+
+  def _answer(self, line):
+    try:
+      request = simplejson.loads(line)
+      command = request['command']
+      if not isinstance(command, basestring):
+        raise TypeError(command)
+
+    except (ValueError, KeyError, TypeError):
+      return { 'ok': False,
+        'error': 'Requests must be json objects with a "command".' }
+
+    name = (command.split(None, 1) + [''])[0]
+    if name not in QUERIES:
+      response = { 'command': command.strip(), 'ok': False,
+        'error': '"%s" is not a query the server answers.' % name }
+    else:
+      response = self.mapper.execute(command)
+
+    if 'id' in request:
+      response['id'] = request['id']
+    return response
+
+class QueryServer(QueryMixIn, SocketServer.ThreadingMixIn,
+  SocketServer.TCPServer):
+  """Serve queries over TCP, with a thread per connection."""
+  allow_reuse_address = True
+  daemon_threads = True
+
+  def __init__(self, address, batch_mapper):
+    self.setup_mapper(batch_mapper)
+    SocketServer.TCPServer.__init__(self, address, QueryHandler)
+
+class UnixQueryServer(QueryMixIn, SocketServer.ThreadingMixIn,
+  SocketServer.UnixStreamServer):
+  """Serve queries over a Unix socket, with a thread per connection."""
+  daemon_threads = True
+
+  def __init__(self, path, batch_mapper):
+    self.setup_mapper(batch_mapper)
+    SocketServer.UnixStreamServer.__init__(self, path, QueryHandler)
+
+def main(argv):
+  """Load a database and serve queries until interrupted."""
+  parser = optparse.OptionParser(
+    usage='%prog --load FILE [--port PORT | --socket PATH]')
+  parser.add_option('-l', '--load', dest='filename',
+    help='the database to serve, with optional --lazy or --mapped flags')
+  parser.add_option('-p', '--port', dest='port', type='int', default=8642,
+    help='serve on localhost:PORT [default: %default]')
+  parser.add_option('-s', '--socket', dest='socket',
+    help='serve on the Unix socket at PATH instead of TCP')
+  options, args = parser.parse_args(argv)
+
+  if options.filename is None:
+    parser.error('Choose a database to serve with --load.')
+
+  batch_mapper = mapper.BatchMapper()
+  result = batch_mapper.execute('load ' + options.filename)
+  if not result['ok']:
+    parser.error(result['error'])
+
+  if options.socket is not None:
+    server = UnixQueryServer(options.socket, batch_mapper)
+  else:
+    server = QueryServer(('localhost', options.port), batch_mapper)
+
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    if options.socket is not None:
+      os.remove(options.socket)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -99,9 +99,11 @@ Using simplejson.tool from the shell to validate and pretty-print::
 """
 __version__ = '2.1.1'
 __all__ = [
-    'dump', 'dumps', 'load', 'loads',
+    'dump', 'dumps', 'load', 'loads', 'iterload', 'lazy_load', 'lazy_loads',
+    'parallel_load', 'parallel_loads',
+    'dump_lines', 'load_lines',
     'JSONDecoder', 'JSONDecodeError', 'JSONEncoder',
-    'OrderedDict',
+    'OrderedDict', 'Schema', 'Records',
 ]
 
 __author__ = 'Bob Ippolito <bob@redivi.com>'
@@ -110,14 +112,12 @@ from decimal import Decimal
 
 from decoder import JSONDecoder, JSONDecodeError
 from encoder import JSONEncoder
-def _import_OrderedDict():
-    import collections
-    try:
-        return collections.OrderedDict
-    except AttributeError:
-        import ordered_dict
-        return ordered_dict.OrderedDict
-OrderedDict = _import_OrderedDict()
+from stream import iterdecode, DEFAULT_CHUNK_SIZE
+from schema import Schema
+from records import Records
+from lazy import lazy_decode
+from parallel import parallel_decode, DEFAULT_TASK_SIZE
+from ordered_dict import OrderedDict
 
 def _import_c_make_encoder():
     try:
@@ -268,6 +268,40 @@ def dumps(obj, skipkeys=False, ensure_ascii=True, check_circular=True,
         use_decimal=use_decimal, **kw).encode(obj)
 
 
+def dump_lines(iterable, fp, skipkeys=False, ensure_ascii=True,
+        check_circular=True, allow_nan=True, cls=None, separators=None,
+        encoding='utf-8', default=None, use_decimal=False, **kw):
+    """Serialize each object in ``iterable`` to ``fp`` (a
+    ``.write()``-supporting file-like object) as one line of JSON, in the
+    `JSON Lines <http://jsonlines.org>`_ format.
+
+    One encoder is used for every line, and each line is written as soon as
+    it is encoded, so ``iterable`` may be a generator. Opening ``fp`` in
+    append mode adds to an existing file without rewriting it.
+
+    The arguments are the same as for :func:`dump`, except that there is no
+    ``indent`` since each object must stay on one line.
+
+    """
+    if (not skipkeys and ensure_ascii and
+        check_circular and allow_nan and
+        cls is None and separators is None and
+        encoding == 'utf-8' and default is None and not use_decimal
+        and not kw):
+        encoder = _default_encoder
+    else:
+        if cls is None:
+            cls = JSONEncoder
+        encoder = cls(skipkeys=skipkeys, ensure_ascii=ensure_ascii,
+            check_circular=check_circular, allow_nan=allow_nan,
+            separators=separators, encoding=encoding, default=default,
+            use_decimal=use_decimal, **kw)
+    encode = encoder.encode
+    write = fp.write
+    for obj in iterable:
+        write(encode(obj) + '\n')
+
+
 _default_decoder = JSONDecoder(encoding=None, object_hook=None,
                                object_pairs_hook=None)
 
@@ -382,6 +416,202 @@ def loads(s, encoding=None, cls=None, object_hook=None, parse_float=None,
             parse_constant is None and object_pairs_hook is None
             and not use_decimal and not kw):
         return _default_decoder.decode(s)
+    return _make_decoder(encoding=encoding, cls=cls, object_hook=object_hook,
+        parse_float=parse_float, parse_int=parse_int,
+        parse_constant=parse_constant, object_pairs_hook=object_pairs_hook,
+        use_decimal=use_decimal, **kw).decode(s)
+
+
+def load_lines(fp, encoding=None, cls=None, object_hook=None,
+        parse_float=None, parse_int=None, parse_constant=None,
+        object_pairs_hook=None, use_decimal=False, **kw):
+    """Deserialize each line of ``fp`` (an iterable of lines, such as a file
+    object, in the `JSON Lines <http://jsonlines.org>`_ format) and yield
+    the resulting Python objects one at a time. Blank lines are skipped.
+
+    One decoder (and scanner) is reused for every line, and only one line
+    is held in memory at a time.
+
+    If a line isn't valid JSON, :exc:`JSONDecodeError` is raised with the
+    line as its ``doc``; the exception's ``lineno`` is then the line's
+    number within ``fp``, counting from 1.
+
+    The remaining arguments are the same as for :func:`load`.
+
+    """
+    if (cls is None and encoding is None and object_hook is None and
+            parse_int is None and parse_float is None and
+            parse_constant is None and object_pairs_hook is None
+            and not use_decimal and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _make_decoder(encoding=encoding, cls=cls,
+            object_hook=object_hook, parse_float=parse_float,
+            parse_int=parse_int, parse_constant=parse_constant,
+            object_pairs_hook=object_pairs_hook, use_decimal=use_decimal,
+            **kw)
+    decode = decoder.decode
+    lineno = 0
+    for line in fp:
+        lineno += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield decode(line)
+        except JSONDecodeError, e:
+            e.lineno = lineno
+            raise
+
+
+def iterload(fp, path='item', chunk_size=DEFAULT_CHUNK_SIZE, encoding=None,
+        cls=None,
+        object_hook=None, parse_float=None, parse_int=None,
+        parse_constant=None, object_pairs_hook=None, use_decimal=False,
+        **kw):
+    """Incrementally deserialize the JSON document in ``fp`` (a
+    ``.read()``-supporting file-like object), yielding each value found at
+    ``path`` as soon as it has been read.
+
+    ``path`` is a dot-separated list of object keys leading to the values
+    to decode, where ``item`` stands for every element of an array. For
+    example, ``'routes.item'`` yields each element of the array stored under
+    the top-level ``"routes"`` key, and ``'item'`` (the default) yields each
+    element of a top-level array. An empty path yields the whole document.
+
+    The document is read ``chunk_size`` characters at a time (64KiB by
+    default). Everything not on ``path`` is skipped by matching brackets
+    without being decoded, so only one value at a time needs to fit in
+    memory. Malformed JSON raises :exc:`JSONDecodeError` when it is reached,
+    possibly after some values have been yielded.
+
+    The remaining arguments are the same as for :func:`load`.
+
+    """
+    if (cls is None and encoding is None and object_hook is None and
+            parse_int is None and parse_float is None and
+            parse_constant is None and object_pairs_hook is None
+            and not use_decimal and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _make_decoder(encoding=encoding, cls=cls,
+            object_hook=object_hook, parse_float=parse_float,
+            parse_int=parse_int, parse_constant=parse_constant,
+            object_pairs_hook=object_pairs_hook, use_decimal=use_decimal,
+            **kw)
+    return iterdecode(fp, decoder, path=path, chunk_size=chunk_size)
+
+
+def lazy_load(fp, encoding=None, cls=None, object_hook=None,
+        parse_float=None, parse_int=None, parse_constant=None,
+        object_pairs_hook=None, use_decimal=False, **kw):
+    """Lazily deserialize the JSON document in ``fp`` (a
+    ``.read()``-supporting file-like object). See :func:`lazy_loads`.
+
+    """
+    return lazy_loads(fp.read(),
+        encoding=encoding, cls=cls, object_hook=object_hook,
+        parse_float=parse_float, parse_int=parse_int,
+        parse_constant=parse_constant, object_pairs_hook=object_pairs_hook,
+        use_decimal=use_decimal, **kw)
+
+
+def lazy_loads(s, encoding=None, cls=None, object_hook=None,
+        parse_float=None, parse_int=None, parse_constant=None,
+        object_pairs_hook=None, use_decimal=False, **kw):
+    """Lazily deserialize ``s`` (a ``str`` or ``unicode`` instance
+    containing a JSON document).
+
+    Only the structure of the document is scanned up front: brackets are
+    matched (skipping over strings) to find where each value starts and
+    ends, without decoding anything. A top-level object is returned as a
+    read-only :class:`simplejson.lazy.LazyObject` mapping and a top-level
+    array as a :class:`simplejson.lazy.LazyArray` sequence, and each of
+    their values is decoded the first time it is accessed. Their ``lazy``
+    method returns a nested object or array lazily as well, so only the
+    subtrees that are used are ever decoded. Other documents are decoded
+    as usual.
+
+    Malformed JSON inside a value raises :exc:`JSONDecodeError` when the
+    value is decoded, not when the document is loaded.
+
+    The remaining arguments are the same as for :func:`load`.
+
+    """
+    if (cls is None and encoding is None and object_hook is None and
+            parse_int is None and parse_float is None and
+            parse_constant is None and object_pairs_hook is None
+            and not use_decimal and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _make_decoder(encoding=encoding, cls=cls,
+            object_hook=object_hook, parse_float=parse_float,
+            parse_int=parse_int, parse_constant=parse_constant,
+            object_pairs_hook=object_pairs_hook, use_decimal=use_decimal,
+            **kw)
+    return lazy_decode(s, decoder)
+
+
+def parallel_load(fp, processes=None, task_size=DEFAULT_TASK_SIZE,
+        encoding=None, cls=None, object_hook=None, parse_float=None,
+        parse_int=None, parse_constant=None, object_pairs_hook=None,
+        use_decimal=False, **kw):
+    """Deserialize the JSON document in ``fp`` (a ``.read()``-supporting
+    file-like object), decoding large arrays in parallel. See
+    :func:`parallel_loads`.
+
+    """
+    return parallel_loads(fp.read(), processes=processes,
+        task_size=task_size, encoding=encoding, cls=cls,
+        object_hook=object_hook, parse_float=parse_float,
+        parse_int=parse_int, parse_constant=parse_constant,
+        object_pairs_hook=object_pairs_hook, use_decimal=use_decimal, **kw)
+
+
+def parallel_loads(s, processes=None, task_size=DEFAULT_TASK_SIZE,
+        encoding=None, cls=None, object_hook=None, parse_float=None,
+        parse_int=None, parse_constant=None, object_pairs_hook=None,
+        use_decimal=False, **kw):
+    """Deserialize ``s`` (a ``str`` or ``unicode`` instance containing a
+    JSON document) to a Python object, decoding large arrays in parallel.
+
+    If the document is an array, or an object with array values, longer
+    than ``task_size`` characters (1MiB by default), the boundaries of the
+    array's elements are found by matching brackets, and runs of about
+    ``task_size`` characters of elements are decoded by a
+    :mod:`multiprocessing` pool of ``processes`` workers (one per CPU by
+    default). The results are put back together in order. Anything else is
+    decoded as usual.
+
+    Decoded values are sent back from the workers with :mod:`marshal`, or
+    pickled if hooks return anything else, so they must be picklable.
+    Loading them in this process costs about as much as decoding them with
+    the C speedups, so this pays off when decoding is slower than that:
+    without the speedups, or with expensive hooks such as
+    ``parse_float=Decimal`` or a :class:`Schema` building custom records.
+    Small documents are decoded without starting any processes.
+
+    The remaining arguments are the same as for :func:`load`.
+
+    """
+    if (cls is None and encoding is None and object_hook is None and
+            parse_int is None and parse_float is None and
+            parse_constant is None and object_pairs_hook is None
+            and not use_decimal and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _make_decoder(encoding=encoding, cls=cls,
+            object_hook=object_hook, parse_float=parse_float,
+            parse_int=parse_int, parse_constant=parse_constant,
+            object_pairs_hook=object_pairs_hook, use_decimal=use_decimal,
+            **kw)
+    return parallel_decode(s, decoder, processes=processes,
+        task_size=task_size)
+
+
+def _make_decoder(encoding=None, cls=None, object_hook=None,
+        parse_float=None, parse_int=None, parse_constant=None,
+        object_pairs_hook=None, use_decimal=False, **kw):
     if cls is None:
         cls = JSONDecoder
     if object_hook is not None:
@@ -398,13 +628,15 @@ def loads(s, encoding=None, cls=None, object_hook=None, parse_float=None,
         if parse_float is not None:
             raise TypeError("use_decimal=True implies parse_float=Decimal")
         kw['parse_float'] = Decimal
-    return cls(encoding=encoding, **kw).decode(s)
+    return cls(encoding=encoding, **kw)
 
 
 def _toggle_speedups(enabled):
     import simplejson.decoder as dec
     import simplejson.encoder as enc
     import simplejson.scanner as scan
+    import simplejson.lazy as lazy
+    import simplejson.parallel as par
     c_make_encoder = _import_c_make_encoder()
     if enabled:
         dec.scanstring = dec.c_scanstring or dec.py_scanstring
@@ -412,11 +644,15 @@ def _toggle_speedups(enabled):
         enc.encode_basestring_ascii = (enc.c_encode_basestring_ascii or 
             enc.py_encode_basestring_ascii)
         scan.make_scanner = scan.c_make_scanner or scan.py_make_scanner
+        lazy.skip_value = lazy.c_skip_value or lazy.py_skip_value
+        par.split_array = par.c_split_array or par.py_split_array
     else:
         dec.scanstring = dec.py_scanstring
         enc.c_make_encoder = None
         enc.encode_basestring_ascii = enc.py_encode_basestring_ascii
         scan.make_scanner = scan.py_make_scanner
+        lazy.skip_value = lazy.py_skip_value
+        par.split_array = par.py_split_array
     dec.make_scanner = scan.make_scanner
     global _default_decoder
     _default_decoder = JSONDecoder(
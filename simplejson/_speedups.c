@@ -36,6 +36,8 @@ typedef int Py_ssize_t;
 #endif
 
 #define DEFAULT_ENCODING "utf-8"
+/* The longest string value memoized when intern_strings is set */
+#define INTERN_MAX_LENGTH 64
 
 #define PyScanner_Check(op) PyObject_TypeCheck(op, &PyScannerType)
 #define PyScanner_CheckExact(op) (Py_TYPE(op) == &PyScannerType)
@@ -57,6 +59,10 @@ typedef struct _PyScannerObject {
     PyObject *parse_int;
     PyObject *parse_constant;
     PyObject *memo;
+    int intern_strings;
+    PyObject *schema;
+    PyObject *schema_plans;
+    int ordered;
 } PyScannerObject;
 
 static PyMemberDef scanner_members[] = {
@@ -67,6 +73,8 @@ static PyMemberDef scanner_members[] = {
     {"parse_float", T_OBJECT, offsetof(PyScannerObject, parse_float), READONLY, "parse_float"},
     {"parse_int", T_OBJECT, offsetof(PyScannerObject, parse_int), READONLY, "parse_int"},
     {"parse_constant", T_OBJECT, offsetof(PyScannerObject, parse_constant), READONLY, "parse_constant"},
+    {"intern_strings", T_INT, offsetof(PyScannerObject, intern_strings), READONLY, "intern_strings"},
+    {"schema", T_OBJECT, offsetof(PyScannerObject, schema), READONLY, "schema"},
     {NULL}
 };
 
@@ -81,6 +89,7 @@ typedef struct _PyEncoderObject {
     PyObject *sort_keys;
     PyObject *skipkeys;
     PyObject *key_memo;
+    PyObject *item_sort_key;
     int fast_encode;
     int allow_nan;
     int use_decimal;
@@ -96,6 +105,7 @@ static PyMemberDef encoder_members[] = {
     {"sort_keys", T_OBJECT, offsetof(PyEncoderObject, sort_keys), READONLY, "sort_keys"},
     {"skipkeys", T_OBJECT, offsetof(PyEncoderObject, skipkeys), READONLY, "skipkeys"},
     {"key_memo", T_OBJECT, offsetof(PyEncoderObject, key_memo), READONLY, "key_memo"},
+    {"item_sort_key", T_OBJECT, offsetof(PyEncoderObject, item_sort_key), READONLY, "item_sort_key"},
     {NULL}
 };
 
@@ -136,6 +146,10 @@ static int
 encoder_listencode_obj(PyEncoderObject *s, PyObject *rval, PyObject *obj, Py_ssize_t indent_level);
 static int
 encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ssize_t indent_level);
+static int
+encoder_listencode_records(PyEncoderObject *s, PyObject *rval, PyObject *records, Py_ssize_t indent_level);
+static int
+_is_records(PyObject *obj);
 static PyObject *
 _encoded_const(PyObject *obj);
 static void
@@ -148,6 +162,10 @@ static PyObject *
 _convertPyInt_FromSsize_t(Py_ssize_t *size_ptr);
 static PyObject *
 encoder_encode_float(PyEncoderObject *s, PyObject *obj);
+static PyObject *
+encoder_newline_indent(PyEncoderObject *s, Py_ssize_t indent_level);
+static int
+encoder_sort_items(PyEncoderObject *s, PyObject *items);
 
 #define S_CHAR(c) (c >= ' ' && c <= '~' && c != '\\' && c != '"')
 #define IS_WHITESPACE(c) (((c) == ' ') || ((c) == '\t') || ((c) == '\n') || ((c) == '\r'))
@@ -935,6 +953,8 @@ scanner_traverse(PyObject *self, visitproc visit, void *arg)
     Py_VISIT(s->parse_int);
     Py_VISIT(s->parse_constant);
     Py_VISIT(s->memo);
+    Py_VISIT(s->schema);
+    Py_VISIT(s->schema_plans);
     return 0;
 }
 
@@ -952,9 +972,205 @@ scanner_clear(PyObject *self)
     Py_CLEAR(s->parse_int);
     Py_CLEAR(s->parse_constant);
     Py_CLEAR(s->memo);
+    Py_CLEAR(s->schema);
+    Py_CLEAR(s->schema_plans);
+    return 0;
+}
+
+static int
+_is_ordered_dict(PyObject *obj)
+{
+    /* Return whether obj is simplejson.ordered_dict.OrderedDict itself,
+    or -1 on error */
+    static PyObject *OrderedDict = NULL;
+    if (OrderedDict == NULL) {
+        PyObject *ordered_dict = PyImport_ImportModule("simplejson.ordered_dict");
+        if (ordered_dict == NULL)
+            return -1;
+        OrderedDict = PyObject_GetAttrString(ordered_dict, "OrderedDict");
+        Py_DECREF(ordered_dict);
+        if (OrderedDict == NULL)
+            return -1;
+    }
+    return obj == OrderedDict;
+}
+
+static PyObject *
+_new_object(PyScannerObject *s, PyObject **keys_ptr)
+{
+    /* Return a new empty object to fill in with PyDict_SetItem: a dict, or
+    an OrderedDict if that is the object_pairs_hook, in which case
+    *keys_ptr is set to a new list for its keys. */
+    static PyObject *empty_tuple = NULL;
+    PyObject *rval;
+    PyTypeObject *type;
+    if (!s->ordered) {
+        *keys_ptr = NULL;
+        return PyDict_New();
+    }
+    if (empty_tuple == NULL) {
+        empty_tuple = PyTuple_New(0);
+        if (empty_tuple == NULL)
+            return NULL;
+    }
+    /* Skip OrderedDict.__init__, _finish_object sets its keys. */
+    type = (PyTypeObject *)s->pairs_hook;
+    rval = type->tp_new(type, empty_tuple, NULL);
+    if (rval == NULL)
+        return NULL;
+    *keys_ptr = PyList_New(0);
+    if (*keys_ptr == NULL) {
+        Py_DECREF(rval);
+        return NULL;
+    }
+    return rval;
+}
+
+static int
+_object_set_item(PyObject *rval, PyObject *keys, PyObject *key, PyObject *val)
+{
+    /* rval[key] = val, adding key to keys (unless NULL) the first time it
+    is set */
+    Py_ssize_t size = PyDict_Size(rval);
+    if (PyDict_SetItem(rval, key, val) < 0)
+        return -1;
+    if (keys != NULL && PyDict_Size(rval) != size)
+        return PyList_Append(keys, key);
+    return 0;
+}
+
+static int
+_finish_object(PyObject *rval, PyObject *keys)
+{
+    /* Give an OrderedDict from _new_object its list of keys, storing it
+    straight into its _keys slot */
+    static Py_ssize_t keys_offset = 0;
+    PyObject **slot;
+    if (keys_offset == 0) {
+        PyObject *descr = PyObject_GetAttrString((PyObject *)Py_TYPE(rval), "_keys");
+        if (descr == NULL)
+            return -1;
+        if (Py_TYPE(descr) != &PyMemberDescr_Type ||
+                ((PyMemberDescrObject *)descr)->d_member->type != T_OBJECT_EX) {
+            Py_DECREF(descr);
+            PyErr_SetString(PyExc_TypeError, "OrderedDict._keys must be a slot");
+            return -1;
+        }
+        keys_offset = ((PyMemberDescrObject *)descr)->d_member->offset;
+        Py_DECREF(descr);
+    }
+    slot = (PyObject **)((char *)rval + keys_offset);
+    Py_INCREF(keys);
+    Py_XDECREF(*slot);
+    *slot = keys;
     return 0;
 }
 
+static PyObject *
+_call_pairs_hook(PyScannerObject *s, PyObject *pairs)
+{
+    /* Return object_pairs_hook(pairs).
+
+    If the hook is a Schema, the object is built here from the Schema's
+    plan for its keys, so records are made without calling back into
+    the Schema.
+
+    Returns a new PyObject.
+    */
+    PyObject *keys;
+    PyObject *plan;
+    PyObject *factory;
+    PyObject *order;
+    PyObject *args;
+    PyObject *rval = NULL;
+    Py_ssize_t i;
+    Py_ssize_t num_pairs;
+    if (s->schema == Py_None) {
+        return PyObject_CallFunctionObjArgs(s->pairs_hook, pairs, NULL);
+    }
+
+    /* keys = tuple([key for key, value in pairs]) */
+    num_pairs = PyList_GET_SIZE(pairs);
+    keys = PyTuple_New(num_pairs);
+    if (keys == NULL)
+        return NULL;
+    for (i = 0; i < num_pairs; i++) {
+        PyObject *key = PyTuple_GET_ITEM(PyList_GET_ITEM(pairs, i), 0);
+        Py_INCREF(key);
+        PyTuple_SET_ITEM(keys, i, key);
+    }
+    plan = PyDict_GetItem(s->schema_plans, keys);
+    if (plan != NULL) {
+        Py_INCREF(plan);
+    }
+    else {
+        plan = PyObject_CallMethod(s->schema, "_plan", "(O)", keys);
+    }
+    Py_DECREF(keys);
+    if (plan == NULL)
+        return NULL;
+    if (!PyTuple_Check(plan) || PyTuple_GET_SIZE(plan) != 2) {
+        PyErr_SetString(PyExc_TypeError, "Schema plans must be 2-tuples");
+        goto done;
+    }
+    factory = PyTuple_GET_ITEM(plan, 0);
+    order = PyTuple_GET_ITEM(plan, 1);
+
+    if (order == Py_None) {
+        /* an object that isn't a record */
+        if (factory != (PyObject *)&PyDict_Type) {
+            rval = PyObject_CallFunctionObjArgs(factory, pairs, NULL);
+            goto done;
+        }
+        rval = PyDict_New();
+        if (rval == NULL)
+            goto done;
+        for (i = 0; i < num_pairs; i++) {
+            PyObject *item = PyList_GET_ITEM(pairs, i);
+            if (PyDict_SetItem(rval, PyTuple_GET_ITEM(item, 0), PyTuple_GET_ITEM(item, 1)) < 0) {
+                Py_CLEAR(rval);
+                goto done;
+            }
+        }
+        goto done;
+    }
+
+    /* args = tuple([pairs[i][1] for i in order]) */
+    if (!PyTuple_Check(order)) {
+        PyErr_SetString(PyExc_TypeError, "Schema plans must order fields with a tuple");
+        goto done;
+    }
+    args = PyTuple_New(PyTuple_GET_SIZE(order));
+    if (args == NULL)
+        goto done;
+    for (i = 0; i < PyTuple_GET_SIZE(order); i++) {
+        PyObject *value;
+        Py_ssize_t pair_idx = PyInt_AsSsize_t(PyTuple_GET_ITEM(order, i));
+        if (pair_idx == -1 && PyErr_Occurred()) {
+            Py_DECREF(args);
+            goto done;
+        }
+        if (pair_idx < 0 || pair_idx >= num_pairs) {
+            PyErr_SetString(PyExc_IndexError, "Schema plan index out of range");
+            Py_DECREF(args);
+            goto done;
+        }
+        value = PyTuple_GET_ITEM(PyList_GET_ITEM(pairs, pair_idx), 1);
+        Py_INCREF(value);
+        PyTuple_SET_ITEM(args, i, value);
+    }
+    if (factory == Py_None) {
+        rval = args;
+    }
+    else {
+        rval = PyObject_Call(factory, args, NULL);
+        Py_DECREF(args);
+    }
+done:
+    Py_DECREF(plan);
+    return rval;
+}
+
 static PyObject *
 _parse_object_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_t *next_idx_ptr) {
     /* Read a JSON object from PyString pystr.
@@ -974,7 +1190,8 @@ _parse_object_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_
     PyObject *val = NULL;
     char *encoding = PyString_AS_STRING(s->encoding);
     int strict = PyObject_IsTrue(s->strict);
-    int has_pairs_hook = (s->pairs_hook != Py_None);
+    int has_pairs_hook = (s->pairs_hook != Py_None && !s->ordered);
+    PyObject *keys = NULL;
     Py_ssize_t next_idx;
     if (has_pairs_hook) {
         pairs = PyList_New(0);
@@ -982,7 +1199,7 @@ _parse_object_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_
             return NULL;
     }
     else {
-        rval = PyDict_New();
+        rval = _new_object(s, &keys);
         if (rval == NULL)
             return NULL;
     }
@@ -1042,7 +1259,7 @@ _parse_object_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_
                 Py_DECREF(item);
             }
             else {
-                if (PyDict_SetItem(rval, key, val) < 0)
+                if (_object_set_item(rval, keys, key, val) < 0)
                     goto bail;
                 Py_CLEAR(key);
                 Py_CLEAR(val);
@@ -1073,9 +1290,17 @@ _parse_object_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_
         goto bail;
     }
 
+    if (keys != NULL) {
+        if (_finish_object(rval, keys) < 0)
+            goto bail;
+        Py_DECREF(keys);
+        *next_idx_ptr = idx + 1;
+        return rval;
+    }
+
     /* if pairs_hook is not None: rval = object_pairs_hook(pairs) */
     if (s->pairs_hook != Py_None) {
-        val = PyObject_CallFunctionObjArgs(s->pairs_hook, pairs, NULL);
+        val = _call_pairs_hook(s, pairs);
         if (val == NULL)
             goto bail;
         Py_DECREF(pairs);
@@ -1099,6 +1324,7 @@ bail:
     Py_XDECREF(key);
     Py_XDECREF(val);
     Py_XDECREF(pairs);
+    Py_XDECREF(keys);
     return NULL;
 }
 
@@ -1119,7 +1345,8 @@ _parse_object_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ss
     PyObject *key = NULL;
     PyObject *val = NULL;
     int strict = PyObject_IsTrue(s->strict);
-    int has_pairs_hook = (s->pairs_hook != Py_None);
+    int has_pairs_hook = (s->pairs_hook != Py_None && !s->ordered);
+    PyObject *keys = NULL;
     Py_ssize_t next_idx;
 
     if (has_pairs_hook) {
@@ -1128,7 +1355,7 @@ _parse_object_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ss
             return NULL;
     }
     else {
-        rval = PyDict_New();
+        rval = _new_object(s, &keys);
         if (rval == NULL)
             return NULL;
     }
@@ -1188,7 +1415,7 @@ _parse_object_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ss
                 Py_DECREF(item);
             }
             else {
-                if (PyDict_SetItem(rval, key, val) < 0)
+                if (_object_set_item(rval, keys, key, val) < 0)
                     goto bail;
                 Py_CLEAR(key);
                 Py_CLEAR(val);
@@ -1220,9 +1447,17 @@ _parse_object_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ss
         goto bail;
     }
 
+    if (keys != NULL) {
+        if (_finish_object(rval, keys) < 0)
+            goto bail;
+        Py_DECREF(keys);
+        *next_idx_ptr = idx + 1;
+        return rval;
+    }
+
     /* if pairs_hook is not None: rval = object_pairs_hook(pairs) */
     if (s->pairs_hook != Py_None) {
-        val = PyObject_CallFunctionObjArgs(s->pairs_hook, pairs, NULL);
+        val = _call_pairs_hook(s, pairs);
         if (val == NULL)
             goto bail;
         Py_DECREF(pairs);
@@ -1246,6 +1481,7 @@ bail:
     Py_XDECREF(key);
     Py_XDECREF(val);
     Py_XDECREF(pairs);
+    Py_XDECREF(keys);
     return NULL;
 }
 
@@ -1613,6 +1849,30 @@ _match_number_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t start, Py_
     return rval;
 }
 
+static PyObject *
+_intern_string(PyScannerObject *s, PyObject *value)
+{
+    /* Return the memoized copy of the string value if intern_strings is set
+    and it is short enough, otherwise value itself.
+
+    Steals the reference to value, and returns a new reference.
+    */
+    PyObject *memovalue;
+    if (value == NULL || !s->intern_strings || PyObject_Length(value) > INTERN_MAX_LENGTH)
+        return value;
+    memovalue = PyDict_GetItem(s->memo, value);
+    if (memovalue != NULL) {
+        Py_INCREF(memovalue);
+        Py_DECREF(value);
+        return memovalue;
+    }
+    if (PyDict_SetItem(s->memo, value, value) < 0) {
+        Py_DECREF(value);
+        return NULL;
+    }
+    return value;
+}
+
 static PyObject *
 scan_once_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_t *next_idx_ptr)
 {
@@ -1632,10 +1892,10 @@ scan_once_str(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_t *n
     switch (str[idx]) {
         case '"':
             /* string */
-            return scanstring_str(pystr, idx + 1,
+            return _intern_string(s, scanstring_str(pystr, idx + 1,
                 PyString_AS_STRING(s->encoding),
                 PyObject_IsTrue(s->strict),
-                next_idx_ptr);
+                next_idx_ptr));
         case '{':
             /* object */
             return _parse_object_str(s, pystr, idx + 1, next_idx_ptr);
@@ -1708,9 +1968,9 @@ scan_once_unicode(PyScannerObject *s, PyObject *pystr, Py_ssize_t idx, Py_ssize_
     switch (str[idx]) {
         case '"':
             /* string */
-            return scanstring_unicode(pystr, idx + 1,
+            return _intern_string(s, scanstring_unicode(pystr, idx + 1,
                 PyObject_IsTrue(s->strict),
-                next_idx_ptr);
+                next_idx_ptr));
         case '{':
             /* object */
             return _parse_object_unicode(s, pystr, idx + 1, next_idx_ptr);
@@ -1817,6 +2077,7 @@ scanner_init(PyObject *self, PyObject *args, PyObject *kwds)
 {
     /* Initialize Scanner object */
     PyObject *ctx;
+    PyObject *tmp;
     static char *kwlist[] = {"context", NULL};
     PyScannerObject *s;
 
@@ -1867,6 +2128,41 @@ scanner_init(PyObject *self, PyObject *args, PyObject *kwds)
     s->parse_constant = PyObject_GetAttrString(ctx, "parse_constant");
     if (s->parse_constant == NULL)
         goto bail;
+    s->ordered = _is_ordered_dict(s->pairs_hook);
+    if (s->ordered < 0)
+        goto bail;
+    /* Contexts that predate schema always call object_pairs_hook */
+    s->schema = PyObject_GetAttrString(ctx, "schema");
+    if (s->schema == NULL) {
+        if (!PyErr_ExceptionMatches(PyExc_AttributeError))
+            goto bail;
+        PyErr_Clear();
+        Py_INCREF(Py_None);
+        s->schema = Py_None;
+    }
+    if (s->schema != Py_None) {
+        s->schema_plans = PyObject_GetAttrString(s->schema, "_plans");
+        if (s->schema_plans == NULL)
+            goto bail;
+        if (!PyDict_Check(s->schema_plans)) {
+            PyErr_SetString(PyExc_TypeError, "Schema plans must be a dict");
+            goto bail;
+        }
+    }
+    /* Contexts that predate intern_strings don't intern */
+    tmp = PyObject_GetAttrString(ctx, "intern_strings");
+    if (tmp == NULL) {
+        if (!PyErr_ExceptionMatches(PyExc_AttributeError))
+            goto bail;
+        PyErr_Clear();
+        s->intern_strings = 0;
+    }
+    else {
+        s->intern_strings = PyObject_IsTrue(tmp);
+        Py_DECREF(tmp);
+        if (s->intern_strings < 0)
+            goto bail;
+    }
 
     return 0;
 
@@ -1878,6 +2174,8 @@ bail:
     Py_CLEAR(s->parse_float);
     Py_CLEAR(s->parse_int);
     Py_CLEAR(s->parse_constant);
+    Py_CLEAR(s->schema);
+    Py_CLEAR(s->schema_plans);
     return -1;
 }
 
@@ -1942,6 +2240,7 @@ encoder_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
         s->sort_keys = NULL;
         s->skipkeys = NULL;
         s->key_memo = NULL;
+        s->item_sort_key = NULL;
     }
     return (PyObject *)s;
 }
@@ -1950,19 +2249,24 @@ static int
 encoder_init(PyObject *self, PyObject *args, PyObject *kwds)
 {
     /* initialize Encoder object */
-    static char *kwlist[] = {"markers", "default", "encoder", "indent", "key_separator", "item_separator", "sort_keys", "skipkeys", "allow_nan", "key_memo", "use_decimal", NULL};
+    static char *kwlist[] = {"markers", "default", "encoder", "indent", "key_separator", "item_separator", "sort_keys", "skipkeys", "allow_nan", "key_memo", "use_decimal", "item_sort_key", NULL};
 
     PyEncoderObject *s;
     PyObject *markers, *defaultfn, *encoder, *indent, *key_separator;
     PyObject *item_separator, *sort_keys, *skipkeys, *allow_nan, *key_memo, *use_decimal;
+    PyObject *item_sort_key = Py_None;
 
     assert(PyEncoder_Check(self));
     s = (PyEncoderObject *)self;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOOOOOOOOOO:make_encoder", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOOOOOOOOOO|O:make_encoder", kwlist,
         &markers, &defaultfn, &encoder, &indent, &key_separator, &item_separator,
-        &sort_keys, &skipkeys, &allow_nan, &key_memo, &use_decimal))
+        &sort_keys, &skipkeys, &allow_nan, &key_memo, &use_decimal, &item_sort_key))
+        return -1;
+    if (item_sort_key != Py_None && !PyCallable_Check(item_sort_key)) {
+        PyErr_SetString(PyExc_TypeError, "item_sort_key must be None or callable");
         return -1;
+    }
 
     s->markers = markers;
     s->defaultfn = defaultfn;
@@ -1973,6 +2277,7 @@ encoder_init(PyObject *self, PyObject *args, PyObject *kwds)
     s->sort_keys = sort_keys;
     s->skipkeys = skipkeys;
     s->key_memo = key_memo;
+    s->item_sort_key = item_sort_key;
     s->fast_encode = (PyCFunction_Check(s->encoder) && PyCFunction_GetFunction(s->encoder) == (PyCFunction)py_encode_basestring_ascii);
     s->allow_nan = PyObject_IsTrue(allow_nan);
     s->use_decimal = PyObject_IsTrue(use_decimal);
@@ -1986,6 +2291,7 @@ encoder_init(PyObject *self, PyObject *args, PyObject *kwds)
     Py_INCREF(s->sort_keys);
     Py_INCREF(s->skipkeys);
     Py_INCREF(s->key_memo);
+    Py_INCREF(s->item_sort_key);
     return 0;
 }
 
@@ -2081,6 +2387,64 @@ encoder_encode_string(PyEncoderObject *s, PyObject *obj)
         return PyObject_CallFunctionObjArgs(s->encoder, obj, NULL);
 }
 
+static PyObject *
+encoder_newline_indent(PyEncoderObject *s, Py_ssize_t indent_level)
+{
+    /* Return '\n' + (indent * indent_level) */
+    static PyObject *newline = NULL;
+    PyObject *indent;
+    PyObject *rval;
+    if (newline == NULL) {
+        newline = PyString_InternFromString("\n");
+        if (newline == NULL)
+            return NULL;
+    }
+    indent = PySequence_Repeat(s->indent, indent_level);
+    if (indent == NULL)
+        return NULL;
+    rval = PyNumber_Add(newline, indent);
+    Py_DECREF(indent);
+    return rval;
+}
+
+static int
+encoder_sort_items(PyEncoderObject *s, PyObject *items)
+{
+    /* Sort a list of (key, value) items with item_sort_key, or by key */
+    static PyObject *sort = NULL;
+    PyObject *args;
+    PyObject *kwargs;
+    PyObject *method;
+    PyObject *rval;
+    if (s->item_sort_key == Py_None)
+        /* Keys are unique, so this orders the items by key alone */
+        return PyList_Sort(items);
+    if (sort == NULL) {
+        sort = PyString_InternFromString("sort");
+        if (sort == NULL)
+            return -1;
+    }
+    method = PyObject_GetAttr(items, sort);
+    if (method == NULL)
+        return -1;
+    args = PyTuple_New(0);
+    kwargs = Py_BuildValue("{sO}", "key", s->item_sort_key);
+    if (args == NULL || kwargs == NULL) {
+        Py_XDECREF(args);
+        Py_XDECREF(kwargs);
+        Py_DECREF(method);
+        return -1;
+    }
+    rval = PyObject_Call(method, args, kwargs);
+    Py_DECREF(args);
+    Py_DECREF(kwargs);
+    Py_DECREF(method);
+    if (rval == NULL)
+        return -1;
+    Py_DECREF(rval);
+    return 0;
+}
+
 static int
 _steal_list_append(PyObject *lst, PyObject *stolen)
 {
@@ -2136,6 +2500,11 @@ encoder_listencode_obj(PyEncoderObject *s, PyObject *rval, PyObject *obj, Py_ssi
     }
     else {
         PyObject *ident = NULL;
+        rv = _is_records(obj);
+        if (rv == -1)
+            return -1;
+        else if (rv)
+            return encoder_listencode_records(s, rval, obj, indent_level);
         if (s->markers != Py_None) {
             int has_key;
             ident = PyLong_FromVoidPtr(obj);
@@ -2188,8 +2557,12 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
     PyObject *key, *value;
     PyObject *iter = NULL;
     PyObject *item = NULL;
+    PyObject *items = NULL;
     PyObject *encoded = NULL;
+    PyObject *newline_indent = NULL;
+    PyObject *separator = NULL;
     int skipkeys;
+    int sort_keys;
     Py_ssize_t idx;
 
     if (open_dict == NULL || close_dict == NULL || empty_dict == NULL || iteritems == NULL) {
@@ -2223,20 +2596,46 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         goto bail;
 
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level += 1;
-        /*
-            newline_indent = '\n' + (_indent * _current_indent_level)
-            separator = _item_separator + newline_indent
-            buf += newline_indent
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        separator = PyNumber_Add(s->item_separator, newline_indent);
+        if (separator == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
+    }
+    else {
+        Py_INCREF(s->item_separator);
+        separator = s->item_separator;
     }
-
-    /* TODO: C speedup not implemented for sort_keys */
 
     skipkeys = PyObject_IsTrue(s->skipkeys);
+    sort_keys = PyObject_IsTrue(s->sort_keys);
+    if (skipkeys == -1 || sort_keys == -1)
+        goto bail;
     idx = 0;
-    iter = PyObject_CallMethodObjArgs(dct, iteritems, NULL);
+    if (sort_keys || s->item_sort_key != Py_None) {
+        items = PyMapping_Items(dct);
+        if (items == NULL)
+            goto bail;
+        if (!PyList_CheckExact(items)) {
+            PyObject *lst = PySequence_List(items);
+            Py_DECREF(items);
+            items = lst;
+            if (items == NULL)
+                goto bail;
+        }
+        if (encoder_sort_items(s, items))
+            goto bail;
+        iter = PyObject_GetIter(items);
+        Py_CLEAR(items);
+    }
+    else {
+        iter = PyObject_CallMethodObjArgs(dct, iteritems, NULL);
+    }
     if (iter == NULL)
         goto bail;
     while ((item = PyIter_Next(iter))) {
@@ -2261,13 +2660,15 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
             if (kstr == NULL)
                 goto bail;
         }
-        else if (PyInt_Check(key) || PyLong_Check(key)) {
-            kstr = PyObject_Str(key);
+        else if (key == Py_True || key == Py_False || key == Py_None) {
+            /* This must come before the PyInt_Check because
+               True and False are also 1 and 0.*/
+            kstr = _encoded_const(key);
             if (kstr == NULL)
                 goto bail;
         }
-        else if (key == Py_True || key == Py_False || key == Py_None) {
-            kstr = _encoded_const(key);
+        else if (PyInt_Check(key) || PyLong_Check(key)) {
+            kstr = PyObject_Str(key);
             if (kstr == NULL)
                 goto bail;
         }
@@ -2282,7 +2683,7 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         }
 
         if (idx) {
-            if (PyList_Append(rval, s->item_separator))
+            if (PyList_Append(rval, separator))
                 goto bail;
         }
 
@@ -2314,19 +2715,25 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         Py_CLEAR(ident);
     }
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level -= 1;
-        /*
-            yield '\n' + (_indent * _current_indent_level)
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
     }
+    Py_CLEAR(separator);
     if (PyList_Append(rval, close_dict))
         goto bail;
     return 0;
 
 bail:
+    Py_XDECREF(newline_indent);
+    Py_XDECREF(separator);
     Py_XDECREF(encoded);
     Py_XDECREF(item);
+    Py_XDECREF(items);
     Py_XDECREF(iter);
     Py_XDECREF(kstr);
     Py_XDECREF(ident);
@@ -2344,6 +2751,8 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
     PyObject *ident = NULL;
     PyObject *iter = NULL;
     PyObject *obj = NULL;
+    PyObject *newline_indent = NULL;
+    PyObject *separator = NULL;
     int is_true;
     int i = 0;
 
@@ -2384,17 +2793,24 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
     if (PyList_Append(rval, open_array))
         goto bail;
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level += 1;
-        /*
-            newline_indent = '\n' + (_indent * _current_indent_level)
-            separator = _item_separator + newline_indent
-            buf += newline_indent
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        separator = PyNumber_Add(s->item_separator, newline_indent);
+        if (separator == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
+    }
+    else {
+        Py_INCREF(s->item_separator);
+        separator = s->item_separator;
     }
     while ((obj = PyIter_Next(iter))) {
         if (i) {
-            if (PyList_Append(rval, s->item_separator))
+            if (PyList_Append(rval, separator))
                 goto bail;
         }
         if (encoder_listencode_obj(s, rval, obj, indent_level))
@@ -2411,23 +2827,162 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
         Py_CLEAR(ident);
     }
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level -= 1;
-        /*
-            yield '\n' + (_indent * _current_indent_level)
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
     }
+    Py_CLEAR(separator);
     if (PyList_Append(rval, close_array))
         goto bail;
     return 0;
 
 bail:
+    Py_XDECREF(newline_indent);
+    Py_XDECREF(separator);
     Py_XDECREF(obj);
     Py_XDECREF(iter);
     Py_XDECREF(ident);
     return -1;
 }
 
+static int
+_is_records(PyObject *obj)
+{
+    /* Return whether obj is a simplejson.records.Records, or -1 on error */
+    static PyObject *Records = NULL;
+    if (Records == NULL) {
+        PyObject *records = PyImport_ImportModule("simplejson.records");
+        if (records == NULL)
+            return -1;
+        Records = PyObject_GetAttrString(records, "Records");
+        Py_DECREF(records);
+        if (Records == NULL)
+            return -1;
+    }
+    return PyObject_IsInstance(obj, Records);
+}
+
+static int
+encoder_listencode_records(PyEncoderObject *s, PyObject *rval, PyObject *records, Py_ssize_t indent_level)
+{
+    /* Encode a simplejson.records.Records as a JSON array of objects, with
+    the text around each value taken from its template, rval is a PyList */
+    static PyObject *open_array = NULL;
+    static PyObject *close_array = NULL;
+    static PyObject *empty_array = NULL;
+    PyObject *template = NULL;
+    PyObject *iter = NULL;
+    PyObject *record = NULL;
+    PyObject *values = NULL;
+    PyObject *newline_indent = NULL;
+    PyObject *separator = NULL;
+    Py_ssize_t nfields;
+    Py_ssize_t record_level = indent_level;
+    Py_ssize_t i;
+    Py_ssize_t count = 0;
+
+    if (open_array == NULL || close_array == NULL || empty_array == NULL) {
+        open_array = PyString_InternFromString("[");
+        close_array = PyString_InternFromString("]");
+        empty_array = PyString_InternFromString("[]");
+        if (open_array == NULL || close_array == NULL || empty_array == NULL)
+            return -1;
+    }
+    if (s->indent != Py_None)
+        record_level += 1;
+    template = PyObject_CallMethod(records, "_template", "OOOOO&",
+        s->encoder, s->key_separator, s->item_separator, s->indent,
+        _convertPyInt_FromSsize_t, &record_level);
+    if (template == NULL)
+        goto bail;
+    if (!PyTuple_Check(template) || PyTuple_GET_SIZE(template) < 1) {
+        PyErr_SetString(PyExc_TypeError, "_template must return a non-empty tuple");
+        goto bail;
+    }
+    nfields = PyTuple_GET_SIZE(template) - 1;
+
+    iter = PyObject_GetIter(records);
+    if (iter == NULL)
+        goto bail;
+    if (s->indent != Py_None) {
+        newline_indent = encoder_newline_indent(s, record_level);
+        if (newline_indent == NULL)
+            goto bail;
+        separator = PyNumber_Add(s->item_separator, newline_indent);
+        if (separator == NULL)
+            goto bail;
+    }
+    else {
+        Py_INCREF(s->item_separator);
+        separator = s->item_separator;
+    }
+    while ((record = PyIter_Next(iter))) {
+        if (count == 0) {
+            if (PyList_Append(rval, open_array))
+                goto bail;
+            if (newline_indent != NULL && PyList_Append(rval, newline_indent))
+                goto bail;
+        }
+        else if (PyList_Append(rval, separator))
+            goto bail;
+        values = PySequence_Fast(record, "Records must be sequences of values");
+        if (values == NULL)
+            goto bail;
+        if (PySequence_Fast_GET_SIZE(values) != nfields) {
+            PyErr_Format(PyExc_ValueError, "Record has %zd values, expected %zd",
+                PySequence_Fast_GET_SIZE(values), nfields);
+            goto bail;
+        }
+        for (i = 0; i < nfields; i++) {
+            if (PyList_Append(rval, PyTuple_GET_ITEM(template, i)))
+                goto bail;
+            if (encoder_listencode_obj(s, rval, PySequence_Fast_GET_ITEM(values, i), record_level + 1))
+                goto bail;
+        }
+        if (PyList_Append(rval, PyTuple_GET_ITEM(template, nfields)))
+            goto bail;
+        Py_CLEAR(values);
+        Py_CLEAR(record);
+        count++;
+    }
+    Py_CLEAR(iter);
+    if (PyErr_Occurred())
+        goto bail;
+    if (count == 0) {
+        if (PyList_Append(rval, empty_array))
+            goto bail;
+    }
+    else {
+        if (s->indent != Py_None) {
+            Py_CLEAR(newline_indent);
+            newline_indent = encoder_newline_indent(s, indent_level);
+            if (newline_indent == NULL)
+                goto bail;
+            if (PyList_Append(rval, newline_indent))
+                goto bail;
+        }
+        if (PyList_Append(rval, close_array))
+            goto bail;
+    }
+    Py_XDECREF(newline_indent);
+    Py_DECREF(separator);
+    Py_DECREF(template);
+    return 0;
+
+bail:
+    Py_XDECREF(values);
+    Py_XDECREF(record);
+    Py_XDECREF(iter);
+    Py_XDECREF(newline_indent);
+    Py_XDECREF(separator);
+    Py_XDECREF(template);
+    return -1;
+}
+
 static void
 encoder_dealloc(PyObject *self)
 {
@@ -2451,6 +3006,7 @@ encoder_traverse(PyObject *self, visitproc visit, void *arg)
     Py_VISIT(s->sort_keys);
     Py_VISIT(s->skipkeys);
     Py_VISIT(s->key_memo);
+    Py_VISIT(s->item_sort_key);
     return 0;
 }
 
@@ -2470,6 +3026,7 @@ encoder_clear(PyObject *self)
     Py_CLEAR(s->sort_keys);
     Py_CLEAR(s->skipkeys);
     Py_CLEAR(s->key_memo);
+    Py_CLEAR(s->item_sort_key);
     return 0;
 }
 
@@ -2519,6 +3076,210 @@ PyTypeObject PyEncoderType = {
     0,                    /* tp_free */
 };
 
+#define JSON_CHAR_AT(i) (ustr != NULL ? ustr[i] : (Py_UNICODE)(unsigned char)str[i])
+
+static Py_ssize_t
+_skip_value(PyObject *pystr, Py_ssize_t idx)
+{
+    /* Find the end of the JSON value starting at idx in pystr (a PyString or
+    PyUnicode) without decoding it. Objects and arrays are skipped by
+    matching brackets, strings by finding the closing quote, and anything
+    else runs up to the next delimiter or whitespace.
+
+    Returns the index of the character after the value, or -1 with an
+    exception set if the value is unterminated.
+    */
+    char *str = NULL;
+    Py_UNICODE *ustr = NULL;
+    Py_ssize_t length;
+    Py_ssize_t start = idx;
+    Py_ssize_t depth = 0;
+    Py_UNICODE c;
+    if (PyUnicode_Check(pystr)) {
+        ustr = PyUnicode_AS_UNICODE(pystr);
+        length = PyUnicode_GET_SIZE(pystr);
+    }
+    else {
+        str = PyString_AS_STRING(pystr);
+        length = PyString_GET_SIZE(pystr);
+    }
+    if (idx < 0 || idx >= length) {
+        raise_errmsg("Expecting object", pystr, idx);
+        return -1;
+    }
+    c = JSON_CHAR_AT(idx);
+    if (c != '{' && c != '[' && c != '"') {
+        /* number or constant */
+        while (idx < length) {
+            c = JSON_CHAR_AT(idx);
+            if (c == ',' || c == ']' || c == '}' || c == ':' || IS_WHITESPACE(c))
+                break;
+            idx++;
+        }
+        if (idx == start) {
+            raise_errmsg("Expecting object", pystr, start);
+            return -1;
+        }
+        return idx;
+    }
+    for (; idx < length; idx++) {
+        c = JSON_CHAR_AT(idx);
+        if (c == '"') {
+            /* skip the string, and any escaped characters in it */
+            for (idx++; idx < length; idx++) {
+                c = JSON_CHAR_AT(idx);
+                if (c == '"')
+                    break;
+                if (c == '\\')
+                    idx++;
+            }
+            if (idx >= length)
+                break;
+            if (depth == 0)
+                return idx + 1;
+        }
+        else if (c == '{' || c == '[') {
+            depth++;
+        }
+        else if (c == '}' || c == ']') {
+            depth--;
+            if (depth == 0)
+                return idx + 1;
+        }
+    }
+    raise_errmsg("Unterminated value starting at", pystr, start);
+    return -1;
+}
+
+static Py_ssize_t
+_skip_whitespace(PyObject *pystr, Py_ssize_t idx)
+{
+    /* Return the index of the first non-whitespace character from idx */
+    if (PyUnicode_Check(pystr)) {
+        Py_UNICODE *ustr = PyUnicode_AS_UNICODE(pystr);
+        Py_ssize_t length = PyUnicode_GET_SIZE(pystr);
+        while (idx < length && IS_WHITESPACE(ustr[idx])) idx++;
+    }
+    else {
+        char *str = PyString_AS_STRING(pystr);
+        Py_ssize_t length = PyString_GET_SIZE(pystr);
+        while (idx < length && IS_WHITESPACE(str[idx])) idx++;
+    }
+    return idx;
+}
+
+static Py_UNICODE
+_char_at(PyObject *pystr, Py_ssize_t idx)
+{
+    /* Return the character at idx, or 0 past the end of pystr */
+    if (PyUnicode_Check(pystr)) {
+        if (idx >= PyUnicode_GET_SIZE(pystr))
+            return 0;
+        return PyUnicode_AS_UNICODE(pystr)[idx];
+    }
+    if (idx >= PyString_GET_SIZE(pystr))
+        return 0;
+    return (Py_UNICODE)(unsigned char)PyString_AS_STRING(pystr)[idx];
+}
+
+PyDoc_STRVAR(pydoc_skip_value,
+    "skip_value(basestring, idx) -> end\n"
+    "\n"
+    "Return the index just past the JSON value starting at idx, matching\n"
+    "brackets and skipping strings without decoding anything."
+);
+
+static PyObject *
+py_skip_value(PyObject* self UNUSED, PyObject *args)
+{
+    PyObject *pystr;
+    Py_ssize_t idx;
+    Py_ssize_t end;
+    if (!PyArg_ParseTuple(args, "OO&:skip_value", &pystr, _convertPyInt_AsSsize_t, &idx))
+        return NULL;
+    if (!PyString_Check(pystr) && !PyUnicode_Check(pystr)) {
+        PyErr_Format(PyExc_TypeError,
+                     "first argument must be a string, not %.80s",
+                     Py_TYPE(pystr)->tp_name);
+        return NULL;
+    }
+    end = _skip_value(pystr, idx);
+    if (end < 0)
+        return NULL;
+    return PyInt_FromSsize_t(end);
+}
+
+PyDoc_STRVAR(pydoc_split_array,
+    "split_array(basestring, idx, size) -> ([(start, end), ...], end)\n"
+    "\n"
+    "Split the elements of the JSON array starting at idx into runs of\n"
+    "about size characters without decoding them. Returns the (start, end)\n"
+    "indexes of each run, from the start of its first element to the end of\n"
+    "its last, and the index just past the array."
+);
+
+static PyObject *
+py_split_array(PyObject* self UNUSED, PyObject *args)
+{
+    PyObject *pystr;
+    PyObject *runs;
+    PyObject *run;
+    Py_ssize_t idx;
+    Py_ssize_t size;
+    Py_ssize_t run_start;
+    Py_ssize_t end;
+    Py_UNICODE c;
+    if (!PyArg_ParseTuple(args, "OO&n:split_array", &pystr, _convertPyInt_AsSsize_t, &idx, &size))
+        return NULL;
+    if (!PyString_Check(pystr) && !PyUnicode_Check(pystr)) {
+        PyErr_Format(PyExc_TypeError,
+                     "first argument must be a string, not %.80s",
+                     Py_TYPE(pystr)->tp_name);
+        return NULL;
+    }
+    if (idx < 0 || _char_at(pystr, idx) != '[') {
+        raise_errmsg("Expecting array", pystr, idx);
+        return NULL;
+    }
+    runs = PyList_New(0);
+    if (runs == NULL)
+        return NULL;
+    idx = _skip_whitespace(pystr, idx + 1);
+    if (_char_at(pystr, idx) == ']')
+        return Py_BuildValue("(Nn)", runs, idx + 1);
+
+    run_start = idx;
+    while (1) {
+        end = _skip_value(pystr, idx);
+        if (end < 0)
+            goto bail;
+        idx = _skip_whitespace(pystr, end);
+        c = _char_at(pystr, idx);
+        if (c != ',' && c != ']') {
+            raise_errmsg("Expecting , delimiter", pystr, idx);
+            goto bail;
+        }
+        if (c == ']' || end - run_start >= size) {
+            run = Py_BuildValue("(nn)", run_start, end);
+            if (run == NULL)
+                goto bail;
+            if (PyList_Append(runs, run) < 0) {
+                Py_DECREF(run);
+                goto bail;
+            }
+            Py_DECREF(run);
+            if (c == ']')
+                break;
+            run_start = _skip_whitespace(pystr, idx + 1);
+        }
+        idx = _skip_whitespace(pystr, idx + 1);
+    }
+    return Py_BuildValue("(Nn)", runs, idx + 1);
+bail:
+    Py_DECREF(runs);
+    return NULL;
+}
+
 static PyMethodDef speedups_methods[] = {
     {"encode_basestring_ascii",
         (PyCFunction)py_encode_basestring_ascii,
@@ -2528,6 +3289,14 @@ static PyMethodDef speedups_methods[] = {
         (PyCFunction)py_scanstring,
         METH_VARARGS,
         pydoc_scanstring},
+    {"skip_value",
+        (PyCFunction)py_skip_value,
+        METH_VARARGS,
+        pydoc_skip_value},
+    {"split_array",
+        (PyCFunction)py_split_array,
+        METH_VARARGS,
+        pydoc_split_array},
     {NULL, NULL, 0, NULL}
 };
 
@@ -5,6 +5,7 @@ import sys
 import struct
 
 from simplejson.scanner import make_scanner
+from simplejson.schema import Schema
 def _import_c_scanstring():
     try:
         from simplejson._speedups import scanstring
@@ -197,7 +198,7 @@ def JSONObject((s, end), encoding, strict, scan_once, object_hook,
         if nextchar == '}':
             if object_pairs_hook is not None:
                 result = object_pairs_hook(pairs)
-                return result, end
+                return result, end + 1
             pairs = {}
             if object_hook is not None:
                 pairs = object_hook(pairs)
@@ -337,7 +338,7 @@ class JSONDecoder(object):
 
     def __init__(self, encoding=None, object_hook=None, parse_float=None,
             parse_int=None, parse_constant=None, strict=True,
-            object_pairs_hook=None):
+            object_pairs_hook=None, intern_strings=False):
         """
         *encoding* determines the encoding used to interpret any
         :class:`str` objects decoded by this instance (``'utf-8'`` by
@@ -358,7 +359,9 @@ class JSONDecoder(object):
         that rely on the order that the key and value pairs are decoded (for
         example, :func:`collections.OrderedDict` will remember the order of
         insertion). If *object_hook* is also defined, the *object_pairs_hook*
-        takes priority.
+        takes priority. If *object_pairs_hook* is a
+        :class:`simplejson.Schema` (not a subclass), the C scanner builds its
+        records directly.
 
         *parse_float*, if specified, will be called with the string of every
         JSON float to be decoded.  By default, this is equivalent to
@@ -380,6 +383,12 @@ class JSONDecoder(object):
         ``True`` means that unescaped control characters are parse errors, if
         ``False`` then control characters will be allowed in strings.
 
+        If *intern_strings* is true (default: ``False``) then every object key
+        and every string value of up to 64 characters is deduplicated, so
+        repeated strings such as codes and names share one object. The memo
+        is cleared after each document (or each lazily decoded value), like
+        the one for object keys, so it never outlives what was decoded.
+
         """
         self.encoding = encoding
         self.object_hook = object_hook
@@ -392,6 +401,12 @@ class JSONDecoder(object):
         self.parse_array = JSONArray
         self.parse_string = scanstring
         self.memo = {}
+        self.intern_strings = intern_strings
+        # Subclasses may override __call__, so they are always called.
+        if type(object_pairs_hook) is Schema:
+            self.schema = object_pairs_hook
+        else:
+            self.schema = None
         self.scan_once = make_scanner(self)
 
     def decode(self, s, _w=WHITESPACE.match):
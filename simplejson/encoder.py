@@ -12,6 +12,7 @@ def _import_speedups():
 c_encode_basestring_ascii, c_make_encoder = _import_speedups()
 
 from simplejson.decoder import PosInf
+from simplejson.records import Records
 
 ESCAPE = re.compile(r'[\x00-\x1f\\"\b\f\n\r\t]')
 ESCAPE_ASCII = re.compile(r'([\\"]|[^\ -~])')
@@ -104,7 +105,7 @@ class JSONEncoder(object):
     def __init__(self, skipkeys=False, ensure_ascii=True,
             check_circular=True, allow_nan=True, sort_keys=False,
             indent=None, separators=None, encoding='utf-8', default=None,
-            use_decimal=False):
+            use_decimal=False, item_sort_key=None):
         """Constructor for JSONEncoder, with sensible defaults.
 
         If skipkeys is false, then it is a TypeError to attempt
@@ -129,6 +130,10 @@ class JSONEncoder(object):
         sorted by key; this is useful for regression tests to ensure
         that JSON serializations can be compared on a day-to-day basis.
 
+        If item_sort_key is a callable (not the default), then the items of
+        dictionaries will be sorted with it, as ``items.sort(key=item_sort_key)``
+        on their ``(key, value)`` pairs. This takes priority over sort_keys.
+
         If indent is a string, then JSON array elements and object members
         will be pretty-printed with a newline followed by that string repeated
         for each level of nesting. ``None`` (the default) selects the most compact
@@ -160,6 +165,9 @@ class JSONEncoder(object):
         self.allow_nan = allow_nan
         self.sort_keys = sort_keys
         self.use_decimal = use_decimal
+        if item_sort_key is not None and not callable(item_sort_key):
+            raise TypeError("item_sort_key must be None or callable")
+        self.item_sort_key = item_sort_key
         if isinstance(indent, (int, long)):
             indent = ' ' * indent
         self.indent = indent
@@ -267,17 +275,18 @@ class JSONEncoder(object):
 
 
         key_memo = {}
-        if (_one_shot and c_make_encoder is not None
-                and not self.indent and not self.sort_keys):
+        if _one_shot and c_make_encoder is not None:
             _iterencode = c_make_encoder(
                 markers, self.default, _encoder, self.indent,
                 self.key_separator, self.item_separator, self.sort_keys,
-                self.skipkeys, self.allow_nan, key_memo, self.use_decimal)
+                self.skipkeys, self.allow_nan, key_memo, self.use_decimal,
+                self.item_sort_key)
         else:
             _iterencode = _make_iterencode(
                 markers, self.default, _encoder, self.indent, floatstr,
                 self.key_separator, self.item_separator, self.sort_keys,
-                self.skipkeys, _one_shot, self.use_decimal)
+                self.skipkeys, _one_shot, self.use_decimal,
+                self.item_sort_key)
         try:
             return _iterencode(o, 0)
         finally:
@@ -313,7 +322,7 @@ class JSONEncoderForHTML(JSONEncoder):
 
 def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
         _key_separator, _item_separator, _sort_keys, _skipkeys, _one_shot,
-        _use_decimal,
+        _use_decimal, _item_sort_key,
         ## HACK: hand-optimized bytecode; turn globals into locals
         False=False,
         True=True,
@@ -329,6 +338,9 @@ def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
         long=long,
         str=str,
         tuple=tuple,
+        len=len,
+        zip=zip,
+        Records=Records,
     ):
 
     def _iterencode_list(lst, _current_indent_level):
@@ -405,7 +417,10 @@ def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
             newline_indent = None
             item_separator = _item_separator
         first = True
-        if _sort_keys:
+        if _item_sort_key:
+            items = dct.items()
+            items.sort(key=_item_sort_key)
+        elif _sort_keys:
             items = dct.items()
             items.sort(key=lambda kv: kv[0])
         else:
@@ -465,6 +480,57 @@ def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
         if markers is not None:
             del markers[markerid]
 
+    def _iterencode_records(records, _current_indent_level):
+        buf = '['
+        if _indent is not None:
+            _current_indent_level += 1
+            newline_indent = '\n' + (_indent * _current_indent_level)
+            separator = _item_separator + newline_indent
+            buf += newline_indent
+        else:
+            newline_indent = None
+            separator = _item_separator
+        template = records._template(_encoder, _key_separator,
+            _item_separator, _indent, _current_indent_level)
+        closing = template[-1]
+        nfields = len(template) - 1
+        first = True
+        for record in records:
+            if first:
+                first = False
+            else:
+                buf += closing + separator
+            if len(record) != nfields:
+                raise ValueError("Record has %d values, expected %d" %
+                    (len(record), nfields))
+            for prefix, value in zip(template, record):
+                buf += prefix
+                if isinstance(value, basestring):
+                    yield buf + _encoder(value)
+                elif value is None:
+                    yield buf + 'null'
+                elif value is True:
+                    yield buf + 'true'
+                elif value is False:
+                    yield buf + 'false'
+                elif isinstance(value, (int, long)):
+                    yield buf + str(value)
+                elif isinstance(value, float):
+                    yield buf + _floatstr(value)
+                else:
+                    yield buf
+                    for chunk in _iterencode(value, _current_indent_level + 1):
+                        yield chunk
+                buf = ''
+        if first:
+            yield '[]'
+            return
+        buf += closing
+        if newline_indent is not None:
+            _current_indent_level -= 1
+            buf += '\n' + (_indent * _current_indent_level)
+        yield buf + ']'
+
     def _iterencode(o, _current_indent_level):
         if isinstance(o, basestring):
             yield _encoder(o)
@@ -486,6 +552,9 @@ def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
                 yield chunk
         elif _use_decimal and isinstance(o, Decimal):
             yield str(o)
+        elif isinstance(o, Records):
+            for chunk in _iterencode_records(o, _current_indent_level):
+                yield chunk
         else:
             if markers is not None:
                 markerid = id(o)
@@ -0,0 +1,288 @@
+"""Lazy decoding of JSON documents, one subtree at a time
+"""
+import re
+from UserDict import DictMixin
+
+from simplejson.decoder import JSONDecodeError, WHITESPACE
+def _import_c_skip_value():
+    try:
+        from simplejson._speedups import skip_value
+        return skip_value
+    except ImportError:
+        return None
+c_skip_value = _import_c_skip_value()
+
+__all__ = ['LazyObject', 'LazyArray', 'lazy_value', 'lazy_decode',
+    'find_member']
+
+FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
+# A whole string or a single bracket, so brackets inside strings are skipped
+STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', FLAGS)
+# A whole string
+STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', FLAGS)
+# A number or constant, up to the next delimiter or whitespace
+SCALAR = re.compile(r'[^,:\]}\s]+', FLAGS)
+
+
+class LazyObject(DictMixin):
+    """A read-only mapping over a JSON object in a document.
+
+    Creating it scans the object's members, decoding only their keys and
+    matching brackets to find where each value starts and ends. Each value
+    is decoded the first time it is accessed.
+
+    """
+    def __init__(self, document, start, decoder):
+        self.document = document
+        self.decoder = decoder
+        self._keys = []
+        self._spans = {}
+        self._values = {}
+        self.end = _scan(document, start, '{', '}', self._member)
+
+    def _member(self, idx):
+        key, idx = self.decoder.parse_string(self.document, idx + 1,
+            self.decoder.encoding, self.decoder.strict)
+        idx = _skip_whitespace(self.document, idx)
+        if self.document[idx:idx + 1] != ':':
+            raise JSONDecodeError("Expecting : delimiter", self.document, idx)
+        start = _skip_whitespace(self.document, idx + 1)
+        end = skip_value(self.document, start)
+        if key not in self._spans:
+            self._keys.append(key)
+        self._spans[key] = (start, end)
+        return end
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            start, end = self._spans[key]
+        value = self._values[key] = self.decoder.raw_decode(
+            self.document, start)[0]
+        return value
+
+    def __contains__(self, key):
+        return key in self._spans
+
+    has_key = __contains__
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def lazy(self, key):
+        """Return the value of ``key`` as a :class:`LazyObject` or
+        :class:`LazyArray` if it is an object or array, without decoding it.
+        Other values are decoded as usual.
+
+        """
+        return lazy_value(self.document, self._spans[key][0], self.decoder)
+
+    def span(self, key):
+        """Return the ``(start, end)`` indexes of the value of ``key``."""
+        return self._spans[key]
+
+    def is_decoded(self, key):
+        """Return whether the value of ``key`` has been decoded yet."""
+        return key in self._values
+
+
+class LazyArray(object):
+    """A read-only sequence over a JSON array in a document.
+
+    Creating it finds where each element starts and ends by matching
+    brackets, and each element is decoded the first time it is accessed.
+
+    """
+    def __init__(self, document, start, decoder):
+        self.document = document
+        self.decoder = decoder
+        self._spans = []
+        self._values = {}
+        self.end = _scan(document, start, '[', ']', self._element)
+
+    def _element(self, idx):
+        end = skip_value(self.document, idx)
+        self._spans.append((idx, end))
+        return end
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in xrange(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self._spans)
+        try:
+            return self._values[i]
+        except KeyError:
+            start, end = self._spans[i]
+        value = self._values[i] = self.decoder.raw_decode(
+            self.document, start)[0]
+        return value
+
+    def __iter__(self):
+        for i in xrange(len(self._spans)):
+            yield self[i]
+
+    def __len__(self):
+        return len(self._spans)
+
+    def lazy(self, i):
+        """Return element ``i`` as a :class:`LazyObject` or
+        :class:`LazyArray` if it is an object or array, without decoding it.
+        Other values are decoded as usual.
+
+        """
+        return lazy_value(self.document, self._spans[i][0], self.decoder)
+
+    def member(self, i, key):
+        """Return the value of ``key`` in the object at element ``i``,
+        decoding nothing else. See :func:`find_member`.
+
+        """
+        return find_member(self.document, self._spans[i][0], key,
+            self.decoder)
+
+    def span(self, i):
+        """Return the ``(start, end)`` indexes of element ``i``."""
+        return self._spans[i]
+
+    def is_decoded(self, i):
+        """Return whether element ``i`` has been decoded yet."""
+        if i < 0:
+            i += len(self._spans)
+        return i in self._values
+
+
+def lazy_value(document, start, decoder):
+    """Return the value starting at ``start`` in ``document``: a
+    :class:`LazyObject` or :class:`LazyArray` for objects and arrays, and the
+    decoded value for anything else.
+
+    """
+    nextchar = document[start:start + 1]
+    if nextchar == '{':
+        return LazyObject(document, start, decoder)
+    elif nextchar == '[':
+        return LazyArray(document, start, decoder)
+    try:
+        return decoder.scan_once(document, start)[0]
+    except StopIteration:
+        raise JSONDecodeError("Expecting object", document, start)
+
+
+def find_member(document, start, key, decoder, _w=WHITESPACE.match):
+    """Return the decoded value of ``key`` in the object starting at
+    ``start`` in ``document``. Members are only scanned as far as the first
+    ``key``, and nothing else is decoded, so this is much cheaper than
+    creating a :class:`LazyObject` to read one value. Raise :exc:`KeyError`
+    if the object has no ``key``.
+
+    """
+    if document[start:start + 1] != '{':
+        raise JSONDecodeError("Expecting object", document, start)
+    parse_string = decoder.parse_string
+    idx = _w(document, start + 1).end()
+    if document[idx:idx + 1] == '}':
+        raise KeyError(key)
+    while True:
+        if document[idx:idx + 1] != '"':
+            raise JSONDecodeError("Expecting property name", document, idx)
+        name, idx = parse_string(document, idx + 1, decoder.encoding,
+            decoder.strict)
+        idx = _w(document, idx).end()
+        if document[idx:idx + 1] != ':':
+            raise JSONDecodeError("Expecting : delimiter", document, idx)
+        idx = _w(document, idx + 1).end()
+        if name == key:
+            if document[idx:idx + 1] == '"':
+                return parse_string(document, idx + 1, decoder.encoding,
+                    decoder.strict)[0]
+            return decoder.raw_decode(document, idx)[0]
+        idx = _w(document, skip_value(document, idx)).end()
+        nextchar = document[idx:idx + 1]
+        if nextchar == '}':
+            raise KeyError(key)
+        elif nextchar != ',':
+            raise JSONDecodeError("Expecting , delimiter", document, idx)
+        idx = _w(document, idx + 1).end()
+
+
+def lazy_decode(document, decoder):
+    """Return :func:`lazy_value` for the whole of ``document``, which must
+    not contain anything after its value but whitespace.
+
+    """
+    start = _skip_whitespace(document, 0)
+    value = lazy_value(document, start, decoder)
+    if isinstance(value, (LazyObject, LazyArray)):
+        end = value.end
+    else:
+        end = decoder.raw_decode(document, start)[1]
+    end = _skip_whitespace(document, end)
+    if end != len(document):
+        raise JSONDecodeError("Extra data", document, end, len(document))
+    return value
+
+
+def _scan(document, start, opening, closing, item):
+    """Call ``item`` with the index of each item of the container that
+    starts at ``start``, which returns the index just past the item. Return
+    the index just past the container.
+
+    """
+    if document[start:start + 1] != opening:
+        raise JSONDecodeError("Expecting object", document, start)
+    idx = _skip_whitespace(document, start + 1)
+    if document[idx:idx + 1] == closing:
+        return idx + 1
+    while True:
+        if opening == '{' and document[idx:idx + 1] != '"':
+            raise JSONDecodeError("Expecting property name", document, idx)
+        idx = _skip_whitespace(document, item(idx))
+        nextchar = document[idx:idx + 1]
+        if nextchar == closing:
+            return idx + 1
+        elif nextchar != ',':
+            raise JSONDecodeError("Expecting , delimiter", document, idx)
+        idx = _skip_whitespace(document, idx + 1)
+
+
+def py_skip_value(document, start):
+    """Return the index just past the value starting at ``start``, matching
+    brackets and skipping strings without decoding anything.
+
+    """
+    nextchar = document[start:start + 1]
+    if nextchar == '"':
+        m = STRING.match(document, start)
+        if m is None:
+            raise JSONDecodeError("Unterminated string starting at",
+                document, start)
+        return m.end()
+    elif nextchar not in ('{', '['):
+        m = SCALAR.match(document, start)
+        if m is None:
+            raise JSONDecodeError("Expecting object", document, start)
+        return m.end()
+    depth = 0
+    for match in STRUCTURE.finditer(document, start):
+        token = match.group()
+        if token in ('{', '['):
+            depth += 1
+        elif token in ('}', ']'):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise JSONDecodeError("Unterminated value starting at", document, start)
+
+skip_value = c_skip_value or py_skip_value
+
+
+def _skip_whitespace(document, idx, _w=WHITESPACE.match):
+    return _w(document, idx).end()
@@ -1,99 +1,115 @@
-"""Drop-in replacement for collections.OrderedDict by Raymond Hettinger
+"""A compact replacement for collections.OrderedDict
 
-http://code.activestate.com/recipes/576693/
+The keys are kept in a list alongside the dict, rather than in a linked
+list of nodes, so building one from a decoded JSON object costs little more
+than building a dict. The C scanner fills them in directly.
 
 """
-from UserDict import DictMixin
+from itertools import imap, izip
 
-# Modified from original to support Python 2.4, see
-# http://code.google.com/p/simplejson/issues/detail?id=53
-try:
-    all
-except NameError:
-    def all(seq):
-        for elem in seq:
-            if not elem:
-                return False
-        return True
 
-class OrderedDict(dict, DictMixin):
+class OrderedDict(dict):
+    """A :class:`dict` that remembers the order its keys were first set in.
+
+    Deleting a key other than the last is O(n), since it is removed from
+    the list of keys; JSON objects are mostly built once and then read.
+
+    """
+    __slots__ = ('_keys',)
 
     def __init__(self, *args, **kwds):
         if len(args) > 1:
             raise TypeError('expected at most 1 arguments, got %d' % len(args))
         try:
-            self.__end
+            self._keys
         except AttributeError:
-            self.clear()
+            self._keys = []
+        if args and not kwds and not self and type(args[0]) is list:
+            # A list of pairs, as passed to an object_pairs_hook, is added
+            # all at once unless it repeats a key.
+            dict.__init__(self, args[0])
+            keys = [key for key, value in args[0]]
+            if len(keys) == len(self):
+                self._keys = keys
+                return
+            dict.clear(self)
         self.update(*args, **kwds)
 
     def clear(self):
-        self.__end = end = []
-        end += [None, end, end]         # sentinel node for doubly linked list
-        self.__map = {}                 # key --> [key, prev, next]
         dict.clear(self)
+        del self._keys[:]
 
     def __setitem__(self, key, value):
         if key not in self:
-            end = self.__end
-            curr = end[1]
-            curr[2] = end[1] = self.__map[key] = [key, curr, end]
+            self._keys.append(key)
         dict.__setitem__(self, key, value)
 
     def __delitem__(self, key):
         dict.__delitem__(self, key)
-        key, prev, next = self.__map.pop(key)
-        prev[2] = next
-        next[1] = prev
+        if self._keys[-1] == key:
+            self._keys.pop()
+        else:
+            self._keys.remove(key)
 
     def __iter__(self):
-        end = self.__end
-        curr = end[2]
-        while curr is not end:
-            yield curr[0]
-            curr = curr[2]
+        return iter(self._keys)
 
     def __reversed__(self):
-        end = self.__end
-        curr = end[1]
-        while curr is not end:
-            yield curr[0]
-            curr = curr[1]
+        return reversed(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return map(self.__getitem__, self._keys)
+
+    def items(self):
+        return zip(self._keys, self.values())
+
+    iterkeys = __iter__
+
+    def itervalues(self):
+        return imap(self.__getitem__, self._keys)
+
+    def iteritems(self):
+        return izip(self._keys, self.itervalues())
 
     def popitem(self, last=True):
         if not self:
             raise KeyError('dictionary is empty')
-        # Modified from original to support Python 2.4, see
-        # http://code.google.com/p/simplejson/issues/detail?id=53
         if last:
-            key = reversed(self).next()
+            key = self._keys.pop()
+        else:
+            key = self._keys.pop(0)
+        return key, dict.pop(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, other=(), **kwds):
+        if hasattr(other, 'keys'):
+            for key in other.keys():
+                self[key] = other[key]
         else:
-            key = iter(self).next()
-        value = self.pop(key)
-        return key, value
+            for key, value in other:
+                self[key] = value
+        for key, value in kwds.iteritems():
+            self[key] = value
+
+    def pop(self, key, *default):
+        if key in self:
+            self._keys.remove(key)
+        return dict.pop(self, key, *default)
 
     def __reduce__(self):
         items = [[k, self[k]] for k in self]
-        tmp = self.__map, self.__end
-        del self.__map, self.__end
-        inst_dict = vars(self).copy()
-        self.__map, self.__end = tmp
+        inst_dict = getattr(self, '__dict__', None)
         if inst_dict:
-            return (self.__class__, (items,), inst_dict)
+            return (self.__class__, (items,), inst_dict.copy())
         return self.__class__, (items,)
 
-    def keys(self):
-        return list(self)
-
-    setdefault = DictMixin.setdefault
-    update = DictMixin.update
-    pop = DictMixin.pop
-    values = DictMixin.values
-    items = DictMixin.items
-    iterkeys = DictMixin.iterkeys
-    itervalues = DictMixin.itervalues
-    iteritems = DictMixin.iteritems
-
     def __repr__(self):
         if not self:
             return '%s()' % (self.__class__.__name__,)
@@ -102,17 +118,16 @@ class OrderedDict(dict, DictMixin):
     def copy(self):
         return self.__class__(self)
 
-    @classmethod
     def fromkeys(cls, iterable, value=None):
         d = cls()
         for key in iterable:
             d[key] = value
         return d
+    fromkeys = classmethod(fromkeys)
 
     def __eq__(self, other):
         if isinstance(other, OrderedDict):
-            return len(self)==len(other) and \
-                   all(p==q for p, q in  zip(self.items(), other.items()))
+            return dict.__eq__(self, other) and self._keys == other._keys
         return dict.__eq__(self, other)
 
     def __ne__(self, other):
@@ -0,0 +1,179 @@
+"""Decoding large JSON arrays in parallel across processes
+"""
+import re
+import marshal
+
+from simplejson.decoder import JSONDecodeError, WHITESPACE
+from simplejson.lazy import LazyObject, lazy_decode
+def _import_c_split_array():
+    try:
+        from simplejson._speedups import split_array
+        return split_array
+    except ImportError:
+        return None
+c_split_array = _import_c_split_array()
+
+__all__ = ['parallel_decode']
+
+FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
+# A whole string, a bracket or a comma, so anything in strings is skipped
+SEPARATORS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},]', FLAGS)
+
+#: Roughly how many characters of an array each task decodes.
+DEFAULT_TASK_SIZE = 1024 * 1024
+
+# How _decode_task sent back its result
+_MARSHALLED, _PICKLED, _ERROR = range(3)
+
+# The decoder used by each worker process, set by _init_worker
+_worker_decoder = None
+
+
+def _init_worker(decoder):
+    global _worker_decoder
+    _worker_decoder = decoder
+
+
+def _decode_task(task):
+    """Decode a run of elements, returning how the result was sent and the
+    result: marshalled, pickled or the message and index of an error.
+
+    """
+    start, text = task
+    try:
+        value = _worker_decoder.decode(text)
+    except JSONDecodeError, e:
+        # Report the error against the whole document, rather than pickling
+        # it with just the run.
+        return _ERROR, (e.msg, start + e.pos - 1)
+    try:
+        # Much cheaper to send back than a pickle, for plain JSON values.
+        return _MARSHALLED, marshal.dumps(value, 2)
+    except ValueError:
+        return _PICKLED, value
+
+
+def py_split_array(document, idx, size, _w=WHITESPACE.match):
+    """Split the elements of the array starting at ``idx`` into runs of
+    about ``size`` characters without decoding them. Return a list of the
+    ``(start, end)`` indexes of each run, from the start of its first
+    element to the end of its last, and the index just past the array.
+
+    Only brackets, commas and strings are looked at, so malformed elements
+    are left for the decoder to report.
+
+    """
+    if document[idx:idx + 1] != '[':
+        raise JSONDecodeError("Expecting array", document, idx)
+    runs = []
+    idx = _w(document, idx + 1).end()
+    if document[idx:idx + 1] == ']':
+        return runs, idx + 1
+    run_start = idx
+    depth = 1
+    for match in SEPARATORS.finditer(document, idx):
+        token = match.group()
+        if token in ('[', '{'):
+            depth += 1
+            continue
+        elif token in (']', '}'):
+            depth -= 1
+            if depth > 0:
+                continue
+        elif token != ',' or depth > 1:
+            continue
+        # The end of an element, at the , or the closing ]
+        end = match.start()
+        while document[end - 1:end].isspace():
+            end -= 1
+        if token == ']' or end - run_start >= size:
+            if end <= run_start:
+                raise JSONDecodeError("Expecting object", document, end)
+            runs.append((run_start, end))
+            if token == ']':
+                return runs, match.end()
+            run_start = _w(document, match.end()).end()
+    raise JSONDecodeError("Unterminated value starting at", document, idx)
+
+split_array = c_split_array or py_split_array
+
+
+def parallel_decode(document, decoder, processes=None,
+        task_size=DEFAULT_TASK_SIZE, _w=WHITESPACE.match):
+    """Decode ``document`` with ``decoder``, splitting large arrays between a
+    pool of ``processes`` worker processes (one per CPU by default). See
+    :func:`simplejson.parallel_loads`.
+
+    """
+    pool = _Pool(decoder, processes)
+    try:
+        start = _w(document, 0).end()
+        if document[start:start + 1] == '[':
+            value, end = pool.decode_array(document, start, task_size)
+            end = _w(document, end).end()
+            if end != len(document):
+                raise JSONDecodeError("Extra data", document, end,
+                    len(document))
+            return value
+
+        value = lazy_decode(document, decoder)
+        if not isinstance(value, LazyObject):
+            return value
+        pairs = []
+        for key in value:
+            start, end = value.span(key)
+            if document[start:start + 1] == '[' and end - start > task_size:
+                pairs.append((key,
+                    pool.decode_array(document, start, task_size)[0]))
+            else:
+                pairs.append((key, value[key]))
+    finally:
+        pool.close()
+    if decoder.object_pairs_hook is not None:
+        return decoder.object_pairs_hook(pairs)
+    obj = dict(pairs)
+    if decoder.object_hook is not None:
+        obj = decoder.object_hook(obj)
+    return obj
+
+
+class _Pool(object):
+    """Start a process pool the first time an array is large enough to
+    need one.
+
+    """
+    def __init__(self, decoder, processes):
+        self.decoder = decoder
+        self.processes = processes
+        self.pool = None
+
+    def decode_array(self, document, start, task_size):
+        """Decode the array starting at ``start`` by decoding runs of about
+        ``task_size`` characters of its elements in the pool and
+        concatenating the results in order. Return the array and the index
+        just past it.
+
+        """
+        runs, end = split_array(document, start, task_size)
+        if len(runs) < 2:
+            return self.decoder.raw_decode(document, start)
+        if self.pool is None:
+            import multiprocessing
+            self.pool = multiprocessing.Pool(self.processes, _init_worker,
+                (self.decoder,))
+        tasks = [(run_start, '[' + document[run_start:run_end] + ']')
+            for run_start, run_end in runs]
+        values = []
+        for kind, chunk in self.pool.imap(_decode_task, tasks):
+            if kind == _ERROR:
+                msg, pos = chunk
+                raise JSONDecodeError(msg, document, pos)
+            elif kind == _MARSHALLED:
+                chunk = marshal.loads(chunk)
+            values.extend(chunk)
+        return values, end
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
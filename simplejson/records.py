@@ -0,0 +1,55 @@
+"""Encoding arrays of objects that all have the same keys from records
+"""
+
+__all__ = ['Records']
+
+
+class Records(object):
+    """An iterable of records to encode as a JSON array of objects with the
+    keys in ``fields``.
+
+    Each record is a tuple (or list) of values in the order of ``fields``,
+    so no :class:`dict` is built for each object, and the keys are encoded
+    once for the whole array rather than once per object::
+
+        >>> import simplejson as json
+        >>> json.dumps(json.Records([(1, 'a'), (2, 'b')], ('id', 'name')))
+        '[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]'
+
+    ``iterable`` can be a generator, which is consumed as the array is
+    encoded. Keys are written in the order of ``fields``, even with
+    ``sort_keys``.
+
+    """
+    def __init__(self, iterable, fields):
+        fields = tuple(fields)
+        for field in fields:
+            if not isinstance(field, basestring):
+                raise TypeError("Field %r is not a string" % (field,))
+        if len(set(fields)) != len(fields):
+            raise ValueError("Duplicate field in %r" % (fields,))
+        self.iterable = iterable
+        self.fields = fields
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def _template(self, encoder, key_separator, item_separator, indent,
+            indent_level):
+        """Return the text written before each value of a record (the first
+        also opens the object) followed by the text that closes the object,
+        for objects at ``indent_level``.
+
+        """
+        if not self.fields:
+            return ('{}',)
+        if indent is None:
+            opening, separator, closing = '{', item_separator, '}'
+        else:
+            newline_indent = '\n' + indent * (indent_level + 1)
+            opening = '{' + newline_indent
+            separator = item_separator + newline_indent
+            closing = '\n' + indent * indent_level + '}'
+        keys = [encoder(field) + key_separator for field in self.fields]
+        return tuple([opening + keys[0]] +
+            [separator + key for key in keys[1:]] + [closing])
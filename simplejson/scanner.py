@@ -11,6 +11,9 @@ c_make_scanner = _import_c_make_scanner()
 
 __all__ = ['make_scanner']
 
+#: The longest string value that is interned when ``intern_strings`` is set.
+INTERN_MAX_LENGTH = 64
+
 NUMBER_RE = re.compile(
     r'(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?',
     (re.VERBOSE | re.MULTILINE | re.DOTALL))
@@ -28,6 +31,8 @@ def py_make_scanner(context):
     object_hook = context.object_hook
     object_pairs_hook = context.object_pairs_hook
     memo = context.memo
+    intern_strings = getattr(context, 'intern_strings', False)
+    memo_get = memo.setdefault
 
     def _scan_once(string, idx):
         try:
@@ -36,6 +41,11 @@ def py_make_scanner(context):
             raise StopIteration
 
         if nextchar == '"':
+            if intern_strings:
+                value, end = parse_string(string, idx + 1, encoding, strict)
+                if len(value) <= INTERN_MAX_LENGTH:
+                    value = memo_get(value, value)
+                return value, end
             return parse_string(string, idx + 1, encoding, strict)
         elif nextchar == '{':
             return parse_object((string, idx + 1), encoding, strict,
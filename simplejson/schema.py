@@ -0,0 +1,84 @@
+"""Decoding JSON objects with known sets of keys straight into records
+"""
+
+__all__ = ['Schema']
+
+
+class Schema(object):
+    """Build records from JSON objects whose keys match a known shape.
+
+    A :class:`Schema` is used as the ``object_pairs_hook`` of a decoder, so
+    the scanner hands it each object's ``(key, value)`` pairs and no
+    :class:`dict` is built for objects that become records::
+
+        >>> import simplejson as json
+        >>> schema = json.Schema()
+        >>> schema.record(('x', 'y'))
+        >>> result = json.loads('[{"y": 2, "x": 1}, {"z": 3}]',
+        ...                     object_pairs_hook=schema)
+        >>> result == [(1, 2), {'z': 3}]
+        True
+
+    Objects that don't match any record are built by ``default`` (``dict``
+    unless specified, :class:`OrderedDict` also works) from their pairs.
+
+    """
+    def __init__(self, default=dict):
+        self.default = default
+        # frozenset of keys -> (fields, factory)
+        self._records = {}
+        # tuple of keys in document order -> (factory, order), see _plan.
+        # The C scanner reads this directly.
+        self._plans = {}
+
+    def record(self, fields, factory=None):
+        """Decode objects with exactly the keys in ``fields`` by calling
+        ``factory`` with their values as positional arguments, in the order
+        of ``fields``. If ``factory`` is ``None``, a tuple of the values is
+        built instead.
+
+        ``factory`` can be a :func:`collections.namedtuple`, a class with
+        ``__slots__`` or any other callable, such as one that packs the
+        values into an :class:`array.array`.
+
+        """
+        fields = tuple(fields)
+        key = frozenset(fields)
+        if len(key) != len(fields):
+            raise ValueError("Duplicate field in %r" % (fields,))
+        self._records[key] = (fields, factory)
+        self._plans.clear()
+
+    def __call__(self, pairs):
+        keys = tuple([key for key, value in pairs])
+        try:
+            factory, order = self._plans[keys]
+        except KeyError:
+            factory, order = self._plan(keys)
+        if order is None:
+            return factory(pairs)
+        values = [pairs[i][1] for i in order]
+        if factory is None:
+            return tuple(values)
+        return factory(*values)
+
+    def _plan(self, keys):
+        """Work out how to build objects with ``keys`` (in document order)
+        and remember it, so it is only done once per distinct key order.
+
+        Return ``(factory, order)``, where ``order`` is a tuple of the
+        indexes of the pairs whose values are passed to ``factory``, or
+        ``None`` if ``factory`` is called with the pairs themselves.
+
+        """
+        plan = (self.default, None)
+        try:
+            fields, factory = self._records[frozenset(keys)]
+        except KeyError:
+            pass
+        else:
+            # A repeated key is left to the default to decide which wins.
+            if len(keys) == len(fields):
+                plan = (factory, tuple([keys.index(f) for f in fields]))
+        self._plans[keys] = plan
+        return plan
@@ -0,0 +1,264 @@
+"""Incremental decoding of JSON documents read in chunks
+"""
+import re
+
+from simplejson.decoder import JSONDecodeError, WHITESPACE
+
+__all__ = ['iterdecode']
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
+# The next character that matters when matching brackets
+STRUCTURE = re.compile(r'[\[\]{}"]', FLAGS)
+# The rest of a string after its opening quote, up to and including the
+# closing quote
+STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', FLAGS)
+# The first character after a number or constant
+SCALAR_END = re.compile(r'[ \t\n\r,\]}]', FLAGS)
+
+
+class ChunkReader(object):
+    """Hold the unconsumed part of a document as it is read in chunks.
+
+    ``buf`` only ever contains the text from the value being decoded
+    onwards, so memory use is bounded by the largest value that is decoded
+    (or the largest string that is skipped) rather than the document.
+
+    """
+    def __init__(self, fp, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        #: The number of characters read from ``fp`` so far
+        self.total = 0
+        #: The number of characters dropped from the front of ``buf``, the
+        #: newlines among them and the document index of the last one
+        self.offset = 0
+        self.lines = 0
+        self.newline = None
+
+    def fill(self, keep):
+        """Drop everything in ``buf`` before ``keep`` and append the next
+        chunk. Return the number of characters dropped (so callers can shift
+        their indexes), or ``None`` at the end of the document.
+
+        """
+        if self.eof:
+            return None
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return None
+        self.total += len(chunk)
+        newlines = self.buf.count('\n', 0, keep)
+        if newlines:
+            self.lines += newlines
+            self.newline = self.offset + self.buf.rindex('\n', 0, keep)
+        self.offset += keep
+        self.buf = self.buf[keep:] + chunk
+        self.pos -= keep
+        return keep
+
+    def peek(self, _w=WHITESPACE.match):
+        """Skip whitespace and return the next character, or ``''`` at the
+        end of the document.
+
+        """
+        while True:
+            self.pos = _w(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.fill(self.pos) is None:
+                return ''
+
+    def expect(self, chars, msg):
+        """Consume the next character, which must be one of ``chars``."""
+        nextchar = self.peek()
+        if not nextchar or nextchar not in chars:
+            raise self.error(msg)
+        self.pos += 1
+        return nextchar
+
+    def error(self, msg, pos=None):
+        if pos is None:
+            pos = self.pos
+        return JSONDecodeError(msg, self.buf, pos)
+
+    def linecol(self, pos):
+        """Return the line and column of index ``pos`` of ``buf`` within the
+        whole document, like :func:`simplejson.decoder.linecol`.
+
+        """
+        newlines = self.buf.count('\n', 0, pos)
+        if newlines:
+            colno = pos - self.buf.rindex('\n', 0, pos)
+        elif self.lines:
+            colno = self.offset + pos - self.newline
+        else:
+            colno = self.offset + pos
+        return self.lines + newlines + 1, colno
+
+    def relocate(self, err):
+        """Make the positions of ``err``, raised while decoding ``buf``,
+        count from the start of the document instead.
+
+        """
+        lineno, colno = self.linecol(err.pos)
+        if err.end is None:
+            err.args = ('%s: line %d column %d (char %d)' % (
+                err.msg, lineno, colno, self.offset + err.pos),)
+        else:
+            err.endlineno, err.endcolno = self.linecol(err.end)
+            err.args = ('%s: line %d column %d - line %d column %d '
+                '(char %d - %d)' % (err.msg, lineno, colno, err.endlineno,
+                err.endcolno, self.offset + err.pos, self.offset + err.end),)
+            err.end += self.offset
+        err.lineno, err.colno = lineno, colno
+        err.pos += self.offset
+        return err
+
+    def span(self, keep=True):
+        """Find the end of the value starting at ``pos`` by matching brackets
+        and skipping strings, reading more chunks as needed. Return the
+        ``(start, end)`` indexes of the value in ``buf`` and leave ``pos`` at
+        ``end``.
+
+        If ``keep`` is false, the value is being skipped and may be dropped
+        from the buffer as it is scanned; ``start`` is then meaningless.
+
+        """
+        start = idx = self.pos
+        nextchar = self.buf[start]
+        if nextchar in '[{':
+            depth = 0
+            while True:
+                m = STRUCTURE.search(self.buf, idx)
+                if m is None:
+                    idx = len(self.buf)
+                elif m.group() == '"':
+                    rest = STRING_REST.match(self.buf, m.end())
+                    if rest is not None:
+                        idx = rest.end()
+                        continue
+                    # The string continues in the next chunk.
+                    idx = m.start()
+                elif m.group() in '[{':
+                    depth += 1
+                    idx = m.end()
+                    continue
+                else:
+                    depth -= 1
+                    idx = m.end()
+                    if depth == 0:
+                        break
+                    continue
+                if keep:
+                    dropped = self.fill(start)
+                else:
+                    dropped = self.fill(idx)
+                if dropped is None:
+                    raise self.error("Unterminated value starting at", start)
+                start -= dropped
+                idx -= dropped
+        elif nextchar == '"':
+            while True:
+                rest = STRING_REST.match(self.buf, start + 1)
+                if rest is not None:
+                    idx = rest.end()
+                    break
+                dropped = self.fill(start)
+                if dropped is None:
+                    raise self.error("Unterminated string starting at", start)
+                start -= dropped
+        else:
+            while True:
+                m = SCALAR_END.search(self.buf, idx)
+                if m is not None:
+                    idx = m.start()
+                    break
+                idx = len(self.buf)
+                dropped = self.fill(start)
+                if dropped is None:
+                    break
+                start -= dropped
+                idx -= dropped
+        self.pos = idx
+        return start, idx
+
+
+def _iteritems(reader, decoder, path):
+    """Yield the decoded values at ``path`` (a list of keys, with ``'item'``
+    standing for every element of an array) within the value at
+    ``reader.pos``, skipping everything else.
+
+    """
+    nextchar = reader.peek()
+    if not nextchar:
+        raise reader.error("Expecting object")
+    if not path:
+        start, end = reader.span()
+        value, reader.pos = decoder.raw_decode(reader.buf, start)
+        yield value
+        return
+    if nextchar == '{':
+        reader.pos += 1
+        if reader.peek() == '}':
+            reader.pos += 1
+            return
+        while True:
+            if reader.peek() != '"':
+                raise reader.error("Expecting property name")
+            start, end = reader.span()
+            key, end = decoder.parse_string(reader.buf, start + 1,
+                decoder.encoding, decoder.strict)
+            reader.expect(':', "Expecting : delimiter")
+            if key == path[0]:
+                for value in _iteritems(reader, decoder, path[1:]):
+                    yield value
+            else:
+                _skip(reader)
+            if reader.expect(',}', "Expecting , delimiter") == '}':
+                return
+    elif nextchar == '[':
+        reader.pos += 1
+        if reader.peek() == ']':
+            reader.pos += 1
+            return
+        while True:
+            if path[0] == 'item':
+                for value in _iteritems(reader, decoder, path[1:]):
+                    yield value
+            else:
+                _skip(reader)
+            if reader.expect(',]', "Expecting , delimiter") == ']':
+                return
+    else:
+        _skip(reader)
+
+
+def _skip(reader):
+    if not reader.peek():
+        raise reader.error("Expecting object")
+    reader.span(keep=False)
+
+
+def iterdecode(fp, decoder, path='item', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield each value at ``path`` in the JSON document read from ``fp``,
+    decoded with ``decoder``. See :func:`simplejson.iterload`.
+
+    """
+    reader = ChunkReader(fp, chunk_size)
+    if path:
+        path = path.split('.')
+    else:
+        path = []
+    try:
+        for value in _iteritems(reader, decoder, path):
+            yield value
+        if reader.peek():
+            raise reader.error("Extra data")
+    except JSONDecodeError, err:
+        raise reader.relocate(err)
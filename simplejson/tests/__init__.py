@@ -17,9 +17,12 @@ def additional_tests(suite=None):
     import simplejson
     import simplejson.encoder
     import simplejson.decoder
+    import simplejson.schema
+    import simplejson.records
     if suite is None:
         suite = unittest.TestSuite()
-    for mod in (simplejson, simplejson.encoder, simplejson.decoder):
+    for mod in (simplejson, simplejson.encoder, simplejson.decoder,
+            simplejson.schema, simplejson.records):
         suite.addTest(doctest.DocTestSuite(mod))
     suite.addTest(doctest.DocFileSuite('../../index.rst'))
     return suite
@@ -36,13 +39,23 @@ def all_tests_suite():
         'simplejson.tests.test_fail',
         'simplejson.tests.test_float',
         'simplejson.tests.test_indent',
+        'simplejson.tests.test_intern',
+        'simplejson.tests.test_item_sort_key',
+        'simplejson.tests.test_iterload',
+        'simplejson.tests.test_lazy',
+        'simplejson.tests.test_lines',
+        'simplejson.tests.test_ordered_dict',
+        'simplejson.tests.test_parallel',
         'simplejson.tests.test_pass1',
         'simplejson.tests.test_pass2',
         'simplejson.tests.test_pass3',
+        'simplejson.tests.test_records',
         'simplejson.tests.test_recursion',
+        'simplejson.tests.test_schema',
         'simplejson.tests.test_scanstring',
         'simplejson.tests.test_separators',
         'simplejson.tests.test_speedups',
+        'simplejson.tests.test_tool',
         'simplejson.tests.test_unicode',
         'simplejson.tests.test_decimal',
     ])
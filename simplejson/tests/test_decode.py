@@ -52,6 +52,13 @@ class TestDecode(TestCase):
                                     object_hook=lambda x: None),
                          OrderedDict(p))
 
+    def test_empty_object_pairs_hook(self):
+        self.assertEqual([[], 1],
+            json.loads('[{}, 1]', object_pairs_hook=lambda x: x))
+        self.assertEqual((OrderedDict(), 4),
+            json.JSONDecoder(object_pairs_hook=OrderedDict).raw_decode(
+                '[{ }]', 1))
+
     def check_keys_reuse(self, source, loads):
         rval = loads(source)
         (a, b), (c, d) = sorted(rval[0]), sorted(rval[1])
@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+import simplejson as json
+from simplejson import decoder, scanner
+from simplejson.scanner import INTERN_MAX_LENGTH
+
+class TestIntern(TestCase):
+    def test_values_shared(self):
+        doc = '[{"ports": ["LIM", "BOG"]}, {"ports": ["BOG", "LIM"]}]'
+        for s in (doc, unicode(doc)):
+            first, second = json.loads(s, intern_strings=True)
+            self.assertTrue(first['ports'][0] is second['ports'][1])
+            self.assertTrue(first['ports'][1] is second['ports'][0])
+            self.assertEquals([{'ports': ['LIM', 'BOG']},
+                {'ports': ['BOG', 'LIM']}], [first, second])
+
+    def test_default_not_shared(self):
+        first, second = json.loads('["LIM", "LIM"]')
+        self.assertFalse(first is second)
+
+    def test_long_values(self):
+        long_value = 'x' * (INTERN_MAX_LENGTH + 1)
+        first, second = json.loads(json.dumps([long_value, long_value]),
+            intern_strings=True)
+        self.assertEquals(long_value, first)
+        self.assertFalse(first is second)
+
+    def test_not_shared_between_documents(self):
+        decoder = json.JSONDecoder(intern_strings=True)
+        first = decoder.decode('{"code": "SCL"}')
+        second = decoder.decode('{"code": "SCL"}')
+        self.assertFalse(first['code'] is second['code'])
+        self.assertEquals(decoder.memo, {})
+
+    def test_old_context(self):
+        # A context without intern_strings, as made for older versions
+        class Context(object):
+            encoding = 'utf-8'
+            strict = True
+            object_hook = object_pairs_hook = None
+            parse_float = float
+            parse_int = int
+            parse_constant = None
+            parse_object = staticmethod(decoder.JSONObject)
+            parse_array = staticmethod(decoder.JSONArray)
+            parse_string = staticmethod(decoder.scanstring)
+            schema = None
+            def __init__(self):
+                self.memo = {}
+        for make_scanner in (scanner.c_make_scanner,
+                             scanner.py_make_scanner):
+            if make_scanner is None:
+                continue
+            scan_once = make_scanner(Context())
+            value, end = scan_once('["LIM", "LIM"]', 0)
+            self.assertEquals(['LIM', 'LIM'], value)
+            self.assertFalse(value[0] is value[1])
+
+    def test_keys_and_values_shared(self):
+        obj = json.loads('{"a": "b", "b": "a"}', intern_strings=True)
+        for key, value in obj.items():
+            self.assertTrue(obj[value] is key)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+import simplejson as json
+from simplejson import OrderedDict
+
+class TestItemSortKey(TestCase):
+    def test_simple_first(self):
+        a = {'a': 1, 'c': 5, 'jack': 'jill', 'pick': 'axe', 'array': [1, 5, 6, 9], 'tuple': (83, 12, 3), 'crate': 'dog', 'zeak': 'oh'}
+        def simple_first(kv):
+            return (isinstance(kv[1], (list, dict, tuple)), kv[0])
+        self.assertEquals(
+            '{"a": 1, "c": 5, "crate": "dog", "jack": "jill", "pick": "axe", "zeak": "oh", "array": [1, 5, 6, 9], "tuple": [83, 12, 3]}',
+            json.dumps(a, item_sort_key=simple_first))
+
+    def test_overrides_sort_keys(self):
+        a = {'a': 3, 'b': 1, 'c': 2}
+        by_value = lambda kv: kv[1]
+        self.assertEquals('{"b": 1, "c": 2, "a": 3}',
+            json.dumps(a, item_sort_key=by_value, sort_keys=True))
+
+    def test_not_callable(self):
+        self.assertRaises(TypeError, json.JSONEncoder, item_sort_key=1)
+
+    def test_pretty_printing(self):
+        obj = {'routes': [{'ports': ['LIM', 'BOG'], 'distance': 1879}],
+            'metros': OrderedDict([('z', {}), ('a', [[]])]), 'b': u'\u1234'}
+        expect = '\n'.join([
+            '{',
+            '\t"b": "\\u1234",',
+            '\t"metros": {',
+            '\t\t"a": [',
+            '\t\t\t[]',
+            '\t\t],',
+            '\t\t"z": {}',
+            '\t},',
+            '\t"routes": [',
+            '\t\t{',
+            '\t\t\t"distance": 1879,',
+            '\t\t\t"ports": [',
+            '\t\t\t\t"LIM",',
+            '\t\t\t\t"BOG"',
+            '\t\t\t]',
+            '\t\t}',
+            '\t]',
+            '}'])
+        self.assertEquals(expect, json.dumps(obj, indent='\t', sort_keys=True,
+            separators=(',', ': ')))
+        self.assertEquals(expect, ''.join(json.JSONEncoder(indent='\t',
+            sort_keys=True, separators=(',', ': ')).iterencode(obj)))
+        # ensure_ascii=False mixes unicode into the indented output
+        self.assertEquals(expect.replace('\\u1234', u'\u1234'),
+            json.dumps(obj, indent=u'\t', sort_keys=True,
+                separators=(',', ': '), ensure_ascii=False))
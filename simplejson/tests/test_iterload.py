@@ -0,0 +1,87 @@
+from unittest import TestCase
+from StringIO import StringIO
+
+import simplejson as json
+from simplejson import OrderedDict
+
+DOC = '''{
+    "data sources": ["a", "{[\\\\\\"]}"],
+    "metros": [{"code": "LIM", "nested": [[], {}, [1, [2]]]}],
+    "routes": [
+        {"ports": ["LIM", "BOG"], "distance": 1879},
+        {"ports": ["MEX", "BOG"], "distance": 3158},
+        12345,
+        "]} \\"[{",
+        true, null, [], {}
+    ]
+}'''
+
+class TestIterload(TestCase):
+    def iterload(self, doc, path, **kw):
+        results = []
+        for chunk_size in (1, 2, 3, 7, 64, 4096):
+            results.append(list(json.iterload(StringIO(doc), path,
+                chunk_size=chunk_size, **kw)))
+        for result in results[1:]:
+            self.assertEquals(results[0], result)
+        return results[0]
+
+    def test_items(self):
+        self.assertEquals(self.iterload(DOC, 'routes.item'),
+            json.loads(DOC)['routes'])
+
+    def test_nested_path(self):
+        self.assertEquals(self.iterload(DOC, 'routes.item.ports.item'),
+            [u'LIM', u'BOG', u'MEX', u'BOG'])
+        self.assertEquals(self.iterload(DOC, 'metros.item.nested.item'),
+            [[], {}, [1, [2]]])
+        self.assertEquals(self.iterload(DOC, 'data sources'),
+            [json.loads(DOC)['data sources']])
+
+    def test_whole_document(self):
+        self.assertEquals(self.iterload(DOC, ''), [json.loads(DOC)])
+        self.assertEquals(self.iterload('  3.5e2 ', ''), [350.0])
+        self.assertEquals(self.iterload('[1, 22, 333]', 'item'), [1, 22, 333])
+
+    def test_missing_path(self):
+        self.assertEquals(self.iterload(DOC, 'airports.item'), [])
+        self.assertEquals(self.iterload('[]', 'item'), [])
+        self.assertEquals(self.iterload('{}', 'routes.item'), [])
+
+    def test_decoder_options(self):
+        items = self.iterload('[{"b": 1, "a": 2}]', 'item',
+            object_pairs_hook=OrderedDict)
+        self.assertEquals(items[0].keys(), [u'b', u'a'])
+
+    def test_lazy(self):
+        values = json.iterload(StringIO('[1, 2, }'), chunk_size=1)
+        self.assertEquals(values.next(), 1)
+        self.assertEquals(values.next(), 2)
+        self.assertRaises(json.JSONDecodeError, values.next)
+
+    def test_errors(self):
+        for doc in ('', '[1 2]', '{"routes": [1,]}', '{"routes" [1]}',
+                '{"routes": [1]', '{"routes": ["abc', '[1] 2', '[nul]'):
+            for chunk_size in (1, 3, 4096):
+                values = json.iterload(StringIO(doc), 'routes.item',
+                    chunk_size=chunk_size)
+                if doc.startswith('['):
+                    values = json.iterload(StringIO(doc), 'item',
+                        chunk_size=chunk_size)
+                self.assertRaises(json.JSONDecodeError, list, values)
+
+    def test_error_position(self):
+        for doc, path, expected in (
+                ('[1,2', 'item', (4, 1, 4)),
+                ('[1,\n 2,\n  }', 'item', (10, 3, 3)),
+                ('{"a": [1,\n2,\n "x]', 'a.item', (14, 3, 2))):
+            for chunk_size in (1, 3, 4096):
+                values = json.iterload(StringIO(doc), path,
+                    chunk_size=chunk_size)
+                try:
+                    list(values)
+                except json.JSONDecodeError, e:
+                    self.assertEquals((e.pos, e.lineno, e.colno), expected)
+                    self.assertTrue('(char %d)' % expected[0] in str(e))
+                else:
+                    self.fail('no error for %r' % (doc,))
@@ -0,0 +1,76 @@
+from unittest import TestCase
+from decimal import Decimal
+
+import simplejson as json
+from simplejson.lazy import LazyObject, LazyArray, find_member
+
+DOC = '''{
+    "data sources": ["a \\"quoted]\\" source"],
+    "metros": [{"code": "LIM", "coordinates": {"S": 12, "W": 77}},
+               {"code": "BOG", "name": "{Bogota]"}],
+    "routes": [{"ports": ["LIM", "BOG"], "distance": 1879}],
+    "count": 2
+}'''
+
+class TestLazy(TestCase):
+    def test_decoded_on_access(self):
+        for doc in (DOC, unicode(DOC)):
+            obj = json.lazy_loads(doc)
+            self.assertTrue(isinstance(obj, LazyObject))
+            self.assertEquals(['data sources', 'metros', 'routes', 'count'],
+                obj.keys())
+            self.assertFalse(obj.is_decoded('routes'))
+            self.assertEquals(json.loads(doc)['routes'], obj['routes'])
+            self.assertTrue(obj.is_decoded('routes'))
+            self.assertFalse(obj.is_decoded('metros'))
+            self.assertEquals(json.loads(doc), dict(obj.items()))
+
+    def test_nested(self):
+        metros = json.lazy_loads(DOC).lazy('metros')
+        self.assertTrue(isinstance(metros, LazyArray))
+        self.assertEquals(2, len(metros))
+        self.assertEquals(['LIM', 'BOG'],
+            [metros.lazy(i)['code'] for i in xrange(len(metros))])
+        self.assertFalse(metros.is_decoded(0))
+        self.assertEquals({'S': 12, 'W': 77},
+            metros.lazy(0).lazy('coordinates'))
+        self.assertEquals('{Bogota]', metros[-1]['name'])
+        self.assertTrue(metros.is_decoded(1))
+        start, end = metros.span(1)
+        self.assertEquals(metros[1], json.loads(DOC[start:end]))
+
+    def test_member(self):
+        metros = json.lazy_loads(DOC).lazy('metros')
+        self.assertEquals('LIM', metros.member(0, 'code'))
+        self.assertEquals('{Bogota]', metros.member(1, 'name'))
+        self.assertEquals({'S': 12, 'W': 77}, metros.member(0, 'coordinates'))
+        self.assertFalse(metros.is_decoded(0))
+        self.assertRaises(KeyError, metros.member, 1, 'coordinates')
+        self.assertRaises(KeyError, find_member, '{}', 0, 'a',
+            json.decoder.JSONDecoder())
+        # Members after the key aren't even scanned.
+        self.assertEquals(1, find_member('{"a": 1, "b": x}', 0, 'a',
+            json.decoder.JSONDecoder()))
+        for doc in ('[1]', '{"a" 1}', '{"b": 1 "a": 2}', '{1: 2}'):
+            self.assertRaises(json.JSONDecodeError, find_member,
+                doc, 0, 'a', json.decoder.JSONDecoder())
+
+    def test_scalars_and_arrays(self):
+        self.assertEquals(1, json.lazy_loads(' 1 '))
+        self.assertEquals([1, [2], {}], list(json.lazy_loads('[1, [2], {}]')))
+        self.assertEquals([], list(json.lazy_loads('[]')))
+
+    def test_hooks(self):
+        obj = json.lazy_loads('{"a": {"b": 1.5}}', use_decimal=True,
+            object_pairs_hook=json.OrderedDict)
+        self.assertEquals(json.OrderedDict([('b', Decimal('1.5'))]),
+            obj['a'])
+
+    def test_errors(self):
+        for doc in ('{"a": [1, 2}', '{"a" 1}', '[1 2]', '{"a": 1} x', '',
+                '{1: 2}'):
+            self.assertRaises(json.JSONDecodeError, json.lazy_loads, doc)
+        # Values are only checked when they're decoded.
+        obj = json.lazy_loads('{"a": [1, x], "b": 2}')
+        self.assertEquals(2, obj['b'])
+        self.assertRaises(json.JSONDecodeError, obj.__getitem__, 'a')
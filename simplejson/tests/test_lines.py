@@ -0,0 +1,42 @@
+from unittest import TestCase
+from StringIO import StringIO
+
+import simplejson as json
+from simplejson import OrderedDict
+
+class TestLines(TestCase):
+    def test_round_trip(self):
+        objs = [{'ports': ['LIM', 'BOG'], 'distance': 1879}, [1, 2.5],
+            u'\u1234 \n', None]
+        fp = StringIO()
+        json.dump_lines(iter(objs), fp)
+        self.assertEquals(len(fp.getvalue().splitlines()), len(objs))
+        fp.seek(0)
+        self.assertEquals(list(json.load_lines(fp)), objs)
+
+    def test_append(self):
+        fp = StringIO()
+        json.dump_lines([1], fp)
+        json.dump_lines([2, 3], fp, separators=(',', ':'))
+        self.assertEquals(fp.getvalue(), '1\n2\n3\n')
+
+    def test_blank_lines(self):
+        lines = ['{"a": 1}\n', '\n', '  \n', '[2]']
+        self.assertEquals(list(json.load_lines(lines)), [{'a': 1}, [2]])
+
+    def test_decoder_options(self):
+        lines = ['{"b": 1, "a": 2.5}']
+        obj = list(json.load_lines(lines, object_pairs_hook=OrderedDict,
+            use_decimal=True))[0]
+        self.assertEquals(obj.keys(), [u'b', u'a'])
+        self.assertEquals(str(obj['a']), '2.5')
+
+    def test_error_lineno(self):
+        values = json.load_lines(['1', '', '[2,]'])
+        self.assertEquals(values.next(), 1)
+        try:
+            values.next()
+        except json.JSONDecodeError, e:
+            self.assertEquals(e.lineno, 3)
+        else:
+            self.fail('Expected JSONDecodeError')
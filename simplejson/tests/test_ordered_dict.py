@@ -0,0 +1,54 @@
+from unittest import TestCase
+import pickle
+import copy
+
+import simplejson as json
+from simplejson.ordered_dict import OrderedDict
+
+class TestOrderedDict(TestCase):
+    def test_order(self):
+        od = OrderedDict([('b', 1), ('a', 2), ('c', 3)])
+        od['a'] = 4
+        od['d'] = 5
+        del od['c']
+        self.assertEquals(['b', 'a', 'd'], od.keys())
+        self.assertEquals([4, 5], od.values()[1:])
+        self.assertEquals([('b', 1), ('a', 4), ('d', 5)], list(od.iteritems()))
+        self.assertEquals(['d', 'a', 'b'], list(reversed(od)))
+        self.assertEquals(('d', 5), od.popitem())
+        self.assertEquals(('b', 1), od.popitem(last=False))
+        self.assertEquals(4, od.pop('a'))
+        self.assertEquals(None, od.pop('a', None))
+        self.assertRaises(KeyError, od.popitem)
+        od.setdefault('x', []).append(1)
+        od.update([('y', 2)], z=3)
+        self.assertEquals([('x', [1]), ('y', 2), ('z', 3)], od.items())
+        od.clear()
+        self.assertEquals([], od.keys())
+
+    def test_repeated_keys(self):
+        od = OrderedDict([('a', 1), ('b', 2), ('a', 3)])
+        self.assertEquals([('a', 3), ('b', 2)], od.items())
+
+    def test_equality_and_copies(self):
+        od = OrderedDict([('a', 1), ('b', [2])])
+        self.assertEquals(od, {'b': [2], 'a': 1})
+        self.assertNotEquals(od, OrderedDict([('b', [2]), ('a', 1)]))
+        for other in (od.copy(), copy.deepcopy(od), eval(repr(od)),
+                pickle.loads(pickle.dumps(od)),
+                pickle.loads(pickle.dumps(od, 2))):
+            self.assertEquals(od, other)
+            self.assertEquals(OrderedDict, type(other))
+        self.assertEquals(['x', 'y'], OrderedDict.fromkeys('xy').keys())
+
+    def test_decode(self):
+        doc = '{"b": 1, "a": {"x": [], "b": 2, "x": {}}, "c": {}}'
+        for s in (doc, unicode(doc)):
+            od = json.loads(s, object_pairs_hook=OrderedDict)
+            self.assertEquals(['b', 'a', 'c'], od.keys())
+            self.assertEquals(['x', 'b'], od['a'].keys())
+            self.assertEquals(OrderedDict, type(od['a']['x']))
+            self.assertEquals('{"b": 1, "a": {"x": {}, "b": 2}, "c": {}}',
+                json.dumps(od))
+            od['a']['y'] = 3
+            self.assertEquals(['x', 'b', 'y'], list(od['a']))
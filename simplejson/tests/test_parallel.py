@@ -0,0 +1,65 @@
+from unittest import TestCase
+from decimal import Decimal
+
+import simplejson as json
+from simplejson import parallel
+
+ROUTES = [{'ports': ['LIM', 'BOG'], 'distance': i} for i in xrange(50)]
+
+class TestParallel(TestCase):
+    def test_array(self):
+        doc = json.dumps(ROUTES)
+        for s in (doc, unicode(doc)):
+            self.assertEquals(ROUTES,
+                json.parallel_loads(s, processes=2, task_size=100))
+
+    def test_object(self):
+        obj = {'data sources': [], 'metros': [{'code': 'LIM'}] * 20,
+            'routes': ROUTES}
+        self.assertEquals(obj, json.parallel_loads(json.dumps(obj),
+            processes=2, task_size=100))
+        ordered = json.parallel_loads(json.dumps(obj), processes=2,
+            task_size=100, object_pairs_hook=json.OrderedDict)
+        self.assertEquals(json.OrderedDict, type(ordered))
+        self.assertEquals(json.OrderedDict, type(ordered['routes'][0]))
+
+    def test_unmarshallable(self):
+        doc = json.dumps([{'distance': i + 0.5} for i in xrange(30)])
+        result = json.parallel_loads(doc, processes=2, task_size=20,
+            use_decimal=True)
+        self.assertEquals(Decimal('29.5'), result[-1]['distance'])
+
+    def test_small(self):
+        self.assertEquals([1, [2]], json.parallel_loads('[1, [2]]'))
+        self.assertEquals('x', json.parallel_loads('"x"'))
+        self.assertEquals({}, json.parallel_loads(' {} '))
+
+    def test_split_array(self):
+        doc = ' [1, "a,]", {"b": [2, "}"]} , null,2.5e3]'
+        runs, end = parallel.split_array(doc, 1, 5)
+        self.assertEquals(len(doc), end)
+        self.assertEquals(['1, "a,]"', '{"b": [2, "}"]}', 'null,2.5e3'],
+            [doc[run_start:run_end] for run_start, run_end in runs])
+        self.assertEquals((runs, end), parallel.py_split_array(doc, 1, 5))
+        self.assertEquals(([], 2), parallel.split_array('[]', 0, 5))
+
+    def test_errors(self):
+        for doc in ('[1, 2', '[1 2]', '[1,]', '[1,,2]', '["a]', '[1] x',
+                '{"a": [1}'):
+            self.assertRaises(json.JSONDecodeError, json.parallel_loads, doc,
+                processes=2, task_size=1)
+
+    def test_error_in_worker(self):
+        doc = '[1, 2, {"a": x}, 4]'
+        try:
+            json.loads(doc)
+        except json.JSONDecodeError, e:
+            expected = e.pos
+        try:
+            json.parallel_loads(doc, processes=2, task_size=1)
+        except json.JSONDecodeError, e:
+            # Reported against the whole document, as decoding it would.
+            self.assertEquals(expected, e.pos)
+            self.assertEquals(doc, e.doc)
+        else:
+            self.fail('Expected JSONDecodeError')
@@ -0,0 +1,55 @@
+from unittest import TestCase
+from collections import namedtuple
+from decimal import Decimal
+
+import simplejson as json
+
+Route = namedtuple('Route', 'distance ports')
+
+ROUTES = [(1879, ('LIM', 'BOG')), (5786, [u'MAD', 'JFK']),
+    (None, {'note': 1.5})]
+
+class TestRecords(TestCase):
+    def dumps(self, obj, **kw):
+        """Encode ``obj`` with both the one-shot (C, if available) and the
+        iterative (Python) encoders, checking that they agree.
+
+        """
+        encoded = json.dumps(obj, **kw)
+        self.assertEquals(encoded,
+            ''.join(json.JSONEncoder(**kw).iterencode(obj)))
+        return encoded
+
+    def test_same_as_dicts(self):
+        fields = ('distance', 'ports')
+        dicts = [json.OrderedDict(zip(fields, route)) for route in ROUTES]
+        for kw in ({}, {'indent': '\t'}, {'indent': 2},
+                {'separators': (',', ':')}, {'ensure_ascii': False}):
+            self.assertEquals(json.dumps({'routes': dicts}, **kw),
+                self.dumps({'routes': json.Records(ROUTES, fields)}, **kw))
+            self.assertEquals(json.dumps([[dicts, []]], **kw),
+                self.dumps([[json.Records(ROUTES, fields),
+                    json.Records([], fields)]], **kw))
+
+    def test_generator(self):
+        records = json.Records((Route(i, ('A%d' % i, 'B%d' % i))
+            for i in xrange(3)), Route._fields)
+        self.assertEquals([{'distance': i, 'ports': ['A%d' % i, 'B%d' % i]}
+            for i in xrange(3)], json.loads(json.dumps(records)))
+
+    def test_values(self):
+        self.assertEquals('[{"a": 1.5, "b": true}, {"a": 1.10, "b": false}]',
+            self.dumps(json.Records([(1.5, True), (Decimal('1.10'), False)],
+                ('a', 'b')), use_decimal=True))
+        self.assertEquals('[{}, {}]', self.dumps(json.Records([(), []], ())))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, json.Records, [], ('a', 'a'))
+        self.assertRaises(TypeError, json.Records, [], ('a', 1))
+        for records in ([(1, 2), (3,)], [(1, 2, 3)]):
+            self.assertRaises(ValueError, json.dumps,
+                json.Records(records, ('a', 'b')))
+            self.assertRaises(ValueError, list,
+                json.JSONEncoder().iterencode(json.Records(records, ('a', 'b'))))
+        self.assertRaises(TypeError, json.dumps,
+            json.Records([(1, object())], ('a', 'b')))
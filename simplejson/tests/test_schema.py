@@ -0,0 +1,65 @@
+from unittest import TestCase
+from collections import namedtuple
+
+import simplejson as json
+from simplejson import scanner
+
+Route = namedtuple('Route', 'ports distance')
+
+class Point(object):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+class TestSchema(TestCase):
+    def test_records(self):
+        schema = json.Schema()
+        schema.record(('ports', 'distance'), Route)
+        schema.record(('x', 'y'), Point)
+        doc = ('{"routes": [{"ports": ["LIM", "BOG"], "distance": 1879},'
+            ' {"distance": 5786, "ports": ["MAD", "JFK"]}],'
+            ' "point": {"y": 2, "x": 1}}')
+        obj = json.loads(doc, object_pairs_hook=schema)
+        self.assertEquals([Route(['LIM', 'BOG'], 1879),
+            Route(['MAD', 'JFK'], 5786)], obj['routes'])
+        self.assertEquals((1, 2), (obj['point'].x, obj['point'].y))
+
+    def test_tuples_and_default(self):
+        schema = json.Schema(default=json.OrderedDict)
+        schema.record(('a', 'b'))
+        obj = json.loads('[{"b": 2, "a": 1}, {"b": 2}, {"b": 1, "a": 2, "c": 3}]',
+            object_pairs_hook=schema)
+        self.assertEquals((1, 2), obj[0])
+        self.assertEquals(json.OrderedDict([('b', 2)]), obj[1])
+        self.assertEquals(['b', 'a', 'c'], obj[2].keys())
+
+    def test_repeated_key(self):
+        schema = json.Schema()
+        schema.record(('a', 'b'))
+        self.assertEquals({'a': 3, 'b': 2},
+            json.loads('{"a": 1, "b": 2, "a": 3}', object_pairs_hook=schema))
+
+    def test_duplicate_field(self):
+        self.assertRaises(ValueError, json.Schema().record, ('a', 'a'))
+
+    def test_subclass_called(self):
+        class Counting(json.Schema):
+            calls = 0
+            def __call__(self, pairs):
+                Counting.calls += 1
+                return json.Schema.__call__(self, pairs)
+        schema = Counting()
+        schema.record(('ports', 'distance'), Route)
+        routes = json.loads('[{"ports": ["LIM"], "distance": 1}, {"a": 1}]',
+            object_pairs_hook=schema)
+        self.assertEquals([Route(['LIM'], 1), {'a': 1}], routes)
+        self.assertEquals(2, Counting.calls)
+
+    def test_old_context(self):
+        # A context without schema, as made for older versions
+        decoder = json.JSONDecoder(object_pairs_hook=list)
+        del decoder.schema
+        scan_once = scanner.make_scanner(decoder)
+        self.assertEquals([('a', 1)], scan_once('{"a": 1}', 0)[0])
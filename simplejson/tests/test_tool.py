@@ -0,0 +1,101 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+from decimal import Decimal
+from StringIO import StringIO
+
+import simplejson as json
+from simplejson import tool
+from simplejson.tests.test_pass1 import JSON
+
+DOC = '''{"z": [1, 2.50, {"b": [], "a": {}}], "a": "\\u00e9 \\"x\\"",
+    "big": [%s], "n": null}''' % ', '.join(['[%d, "%d"]' % (i, i)
+        for i in xrange(20)])
+
+class TestTool(TestCase):
+    def stream(self, doc, **kw):
+        out = StringIO()
+        tool.stream(StringIO(doc), out, **kw)
+        return out.getvalue()
+
+    def test_stream_keeps_order(self):
+        for chunk_size in (7, 64, 1024 * 1024):
+            out = self.stream(DOC, chunk_size=chunk_size)
+            self.assertEquals(json.loads(DOC), json.loads(out))
+            expected = json.dumps(
+                json.loads(DOC, object_pairs_hook=json.OrderedDict,
+                    use_decimal=True),
+                indent='    ', separators=(',', ': '), use_decimal=True)
+            self.assertEquals(expected, out)
+
+    def test_indent(self):
+        self.assertEquals('[\n\t{\n\t\t"a": [\n\t\t\t1\n\t\t]\n\t},\n\t[]\n]',
+            self.stream('[{"a":[1]},[]]', indent='\t', chunk_size=4))
+
+    def test_scalars(self):
+        for doc in ('1', '-1.5e3', '"x"', 'null', 'true', '  []  '):
+            self.assertEquals(json.dumps(json.loads(doc, use_decimal=True),
+                    use_decimal=True),
+                self.stream(doc, chunk_size=2))
+
+    def test_pass1(self):
+        self.assertEquals(json.loads(JSON),
+            json.loads(self.stream(JSON, chunk_size=16)))
+
+    def test_validate(self):
+        self.assertEquals(len(DOC), tool.stream(StringIO(DOC), chunk_size=16))
+        for doc, msg in [
+                ('', 'No JSON object could be decoded'),
+                ('[1, 2', 'Expecting , delimiter'),
+                ('[1, 2,]', 'Expecting object'),
+                ('{"a" 1}', 'Expecting : delimiter'),
+                ('{1: 2}', 'Expecting property name'),
+                ('[1] [2]', 'Extra data'),
+                ('["a\x01"]', 'Invalid control character'),
+                ('[01]', 'Expecting object'),
+                ('[nul]', 'Expecting object'),
+                ]:
+            for chunk_size in (3, 1024):
+                try:
+                    tool.stream(StringIO(doc), chunk_size=chunk_size)
+                except json.JSONDecodeError, e:
+                    self.assertTrue(e.msg.startswith(msg), (doc, e.msg))
+                else:
+                    self.fail('%r was accepted' % (doc,))
+
+    def test_error_position(self):
+        doc = '[\n' + '"abc",\n' * 100 + '  1 2]'
+        for chunk_size in (3, 64, 1024):
+            try:
+                tool.stream(StringIO(doc), chunk_size=chunk_size)
+            except json.JSONDecodeError, e:
+                self.assertEquals((len(doc) - 2, 102, 5),
+                    (e.pos, e.lineno, e.colno))
+            else:
+                self.fail('%r was accepted' % (doc,))
+
+    def test_validate_outfile(self):
+        directory = tempfile.mkdtemp()
+        try:
+            infile = os.path.join(directory, 'in.json')
+            outfile = os.path.join(directory, 'out.json')
+            for filename in (infile, outfile):
+                f = open(filename, 'w')
+                f.write(DOC)
+                f.close()
+            argv, stderr = sys.argv, sys.stderr
+            sys.argv = ['tool', '--validate', infile, outfile]
+            sys.stderr = StringIO()
+            try:
+                self.assertRaises(SystemExit, tool.main)
+                self.assertTrue('--validate takes no outfile' in
+                    sys.stderr.getvalue())
+            finally:
+                sys.argv, sys.stderr = argv, stderr
+            f = open(outfile)
+            self.assertEquals(DOC, f.read())
+            f.close()
+        finally:
+            shutil.rmtree(directory)
@@ -9,29 +9,208 @@ Usage::
     $ echo '{ 1.2:3.4}' | python -m simplejson.tool
     Expecting property name: line 1 column 2 (char 2)
 
+With ``--stream``, large documents are validated and re-indented a token
+at a time in constant memory, keeping keys in their original order, and
+the throughput is reported on stderr. ``--validate`` only checks the
+document::
+
+    $ python -m simplejson.tool --validate map_data.json
+    Valid JSON: 3624 bytes in 0.00s (12.3 MB/s)
+
 """
 import sys
+import time
+import optparse
+from decimal import Decimal
 import simplejson as json
+import simplejson.lazy
+from simplejson.decoder import JSONDecodeError, scanstring
+from simplejson.encoder import encode_basestring_ascii
+from simplejson.scanner import NUMBER_RE
+from simplejson.stream import ChunkReader, DEFAULT_CHUNK_SIZE
+
+CONSTANTS = ('null', 'true', 'false', 'NaN', 'Infinity', '-Infinity')
+
+# What stream() expects next
+VALUE, KEY, AFTER_VALUE = range(3)
+
+#: Objects and arrays up to this size are decoded and re-encoded whole when
+#: they're already in the buffer, instead of a token at a time.
+MAX_WHOLE_VALUE = 64 * 1024
+
+
+def stream(infile, outfile=None, indent='    ', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Validate the JSON document in ``infile`` a token at a time and, if
+    ``outfile`` is given, write it re-indented with ``indent``. Keys stay in
+    document order. Only the current chunk and the stack of open containers
+    are held in memory.
+
+    Small objects and arrays which are already in the current chunk are
+    checked and re-indented in one go by the decoder and encoder, which is
+    much faster than going through their tokens here.
+
+    Raise :exc:`JSONDecodeError` if the document is invalid, and return the
+    number of characters read.
+
+    """
+    reader = ChunkReader(infile, chunk_size)
+    decoder = json.JSONDecoder(object_pairs_hook=json.OrderedDict,
+        parse_float=Decimal)
+    encoder = json.JSONEncoder(indent=indent, separators=(',', ': '),
+        use_decimal=True)
+    out = []
+    write = out.append
+    stack = []
+    try:
+        if not reader.peek():
+            raise reader.error("No JSON object could be decoded")
+        state = VALUE
+        while True:
+            if state == VALUE:
+                nextchar = reader.peek()
+                whole = _whole_value(reader, decoder)
+                if whole is not None:
+                    if outfile is not None:
+                        write(encoder.encode(whole).replace('\n',
+                            '\n' + indent * len(stack)))
+                    state = AFTER_VALUE
+                elif nextchar in ('{', '['):
+                    reader.pos += 1
+                    closing = nextchar == '{' and '}' or ']'
+                    if reader.peek() == closing:
+                        reader.pos += 1
+                        write(nextchar + closing)
+                        state = AFTER_VALUE
+                    else:
+                        stack.append(closing)
+                        write(nextchar + '\n' + indent * len(stack))
+                        state = nextchar == '{' and KEY or VALUE
+                else:
+                    write(_scalar(reader))
+                    state = AFTER_VALUE
+            elif state == KEY:
+                if reader.peek() != '"':
+                    raise reader.error("Expecting property name")
+                write(_scalar(reader))
+                reader.expect(':', "Expecting : delimiter")
+                write(': ')
+                state = VALUE
+            else:
+                if not stack:
+                    break
+                closing = stack[-1]
+                if reader.expect(',' + closing,
+                        "Expecting , delimiter") == ',':
+                    write(',\n' + indent * len(stack))
+                    state = closing == '}' and KEY or VALUE
+                else:
+                    stack.pop()
+                    write('\n' + indent * len(stack) + closing)
+            if outfile is None:
+                del out[:]
+            elif len(out) > 4096:
+                outfile.write(''.join(out))
+                del out[:]
+        if reader.peek():
+            raise reader.error("Extra data")
+        if outfile is not None:
+            outfile.write(''.join(out))
+    except JSONDecodeError, err:
+        raise reader.relocate(err)
+    return reader.total
+
+
+def _whole_value(reader, decoder):
+    """If the object or array at ``reader.pos`` is small and ends within
+    the buffer, decode it and move past it. Otherwise return ``None``.
+
+    """
+    start = reader.pos
+    if reader.buf[start:start + 1] not in ('{', '['):
+        return None
+    try:
+        end = simplejson.lazy.skip_value(reader.buf, start)
+    except JSONDecodeError:
+        # Unterminated within the buffer; malformed values are reported
+        # by going through their tokens.
+        return None
+    if end - start > MAX_WHOLE_VALUE:
+        return None
+    try:
+        value, end = decoder.raw_decode(reader.buf, start)
+    except JSONDecodeError:
+        return None
+    reader.pos = end
+    return value
+
+
+def _scalar(reader):
+    """Read and check the string, number or constant at ``reader.pos``, and
+    return its text as the encoder would write it.
+
+    """
+    if not reader.peek():
+        raise reader.error("Expecting object")
+    start, end = reader.span()
+    token = reader.buf[start:end]
+    if token[:1] == '"':
+        # Decoding the string checks its escapes and control characters.
+        return encode_basestring_ascii(
+            scanstring(reader.buf, start + 1, None, True)[0])
+    elif token not in CONSTANTS:
+        m = NUMBER_RE.match(token)
+        if m is None or m.end() != len(token):
+            raise reader.error("Expecting object", start)
+        if m.group(2) or m.group(3):
+            return str(Decimal(token))
+    return token
+
 
 def main():
-    if len(sys.argv) == 1:
+    parser = optparse.OptionParser(
+        usage='%prog [--stream] [infile [outfile]]\n'
+              '       %prog --validate [infile]')
+    parser.add_option('--stream', action='store_true', default=False,
+        help='re-indent in constant memory, keeping key order')
+    parser.add_option('--validate', action='store_true', default=False,
+        help='only check the document, in constant memory')
+    options, args = parser.parse_args()
+    if options.validate and len(args) > 1:
+        # Opening the outfile would empty it, and nothing is written.
+        parser.error('--validate takes no outfile')
+    if len(args) == 0:
         infile = sys.stdin
         outfile = sys.stdout
-    elif len(sys.argv) == 2:
-        infile = open(sys.argv[1], 'rb')
+    elif len(args) == 1:
+        infile = open(args[0], 'rb')
         outfile = sys.stdout
-    elif len(sys.argv) == 3:
-        infile = open(sys.argv[1], 'rb')
-        outfile = open(sys.argv[2], 'wb')
+    elif len(args) == 2:
+        infile = open(args[0], 'rb')
+        outfile = open(args[1], 'wb')
     else:
         raise SystemExit(sys.argv[0] + " [infile [outfile]]")
+    if options.stream or options.validate:
+        if options.validate:
+            outfile = None
+        started = time.time()
+        try:
+            size = stream(infile, outfile)
+        except ValueError, e:
+            raise SystemExit(e)
+        elapsed = max(time.time() - started, 1e-6)
+        if outfile is not None:
+            outfile.write('\n')
+        sys.stderr.write('Valid JSON: %d bytes in %.2fs (%.1f MB/s)\n' % (
+            size, elapsed, size / elapsed / (1024 * 1024)))
+        return
     try:
         obj = json.load(infile,
                         object_pairs_hook=json.OrderedDict,
                         use_decimal=True)
     except ValueError, e:
         raise SystemExit(e)
-    json.dump(obj, outfile, sort_keys=True, indent='    ', use_decimal=True)
+    outfile.write(json.dumps(obj, sort_keys=True, indent='    ',
+                             use_decimal=True))
     outfile.write('\n')
 
 
@@ -0,0 +1,150 @@
+import math
+import random
+import string
+import simplejson
+
+# Synthetic Maps:
+#   Generates databases of any size, laid out like map_data.json, for
+#   benchmarking. Cities are grouped in clusters around random points on the
+#   globe, and most routes join cities of the same cluster.
+
+CONTINENTS = ['Africa', 'Asia', 'Australia', 'Europe', 'North America',
+  'South America']
+
+#: The mean radius of the earth in km, the unit of route distances.
+EARTH_RADIUS = 6371
+
+def generate(cities, degree=4, clusters=None, locality=0.8, seed=0):
+  """Return the data of a database as it is stored in json files, with a
+  connected network of routes.
+
+  Keyword arguments:
+  cities -- The number of cities.
+  degree -- The average number of routes from each city.
+  clusters -- The number of clusters of cities, about one per 50 cities if
+              left blank.
+  locality -- The fraction of the routes beyond those connecting the network
+              which join cities of the same cluster.
+  seed -- Seeds the random numbers, so the same arguments give the same map.
+
+  """
+  generator = random.Random(seed)
+  if clusters is None:
+    clusters = max(1, cities // 50)
+  clusters = min(clusters, cities)
+
+  centers = [ (generator.uniform(-60, 70), generator.uniform(-180, 180))
+    for i in range(clusters) ]
+  members = [ [] for center in centers ]
+  metros = []
+  positions = []
+
+  for index, code in enumerate(_codes(cities)):
+    cluster = index % clusters
+    latitude, longitude = _near(generator, centers[cluster])
+    members[cluster].append(index)
+    positions.append((latitude, longitude))
+    metros.append(_city(generator, code, cluster, latitude, longitude))
+
+  # A tree joins every city to one before it in its cluster, and each
+  # cluster's first city to an earlier cluster's, so every city is reachable.
+  pairs = set()
+  for cluster in range(clusters):
+    ports = members[cluster]
+    if cluster:
+      pairs.add(_pair(ports[0],
+        members[generator.randrange(cluster)][0]))
+    for i in range(1, len(ports)):
+      pairs.add(_pair(ports[i], ports[generator.randrange(i)]))
+
+  wanted = max(len(pairs), cities * degree // 2)
+  # Stop short of wanted if the clusters are too small to hold the routes.
+  attempts = 0
+  while len(pairs) < wanted and attempts < 10 * wanted:
+    attempts += 1
+    port_a = generator.randrange(cities)
+    if generator.random() < locality:
+      port_b = generator.choice(members[port_a % clusters])
+    else:
+      port_b = generator.randrange(cities)
+    if port_a != port_b:
+      pairs.add(_pair(port_a, port_b))
+
+  routes = []
+  for port_a, port_b in sorted(pairs):
+    routes.append({
+      'ports': [ metros[port_a]['code'], metros[port_b]['code'] ],
+      'distance': _distance(positions[port_a], positions[port_b])
+    })
+
+  return {
+    'data sources': [ 'synthetic.generate(%d, %d, %d, %r, %r)' %
+      (cities, degree, clusters, locality, seed) ],
+    'metros': metros,
+    'routes': routes
+  }
+
+def write(filename, data):
+  """Write the data from generate() to a json file."""
+  try:
+    json_file = open(filename, 'w')
+    try:
+      simplejson.dump(data, json_file, indent='\t')
+    finally:
+      json_file.close()
+  except IOError:
+    raise IOError('Error: Couldn\'t write to "%s".' % filename)
+
+def _codes(count):
+  """Return count distinct airport codes of at least three letters."""
+  length = 3
+  while 26 ** length < count:
+    length += 1
+
+  codes = []
+  for number in range(count):
+    letters = []
+    for i in range(length):
+      number, digit = divmod(number, 26)
+      letters.append(string.ascii_uppercase[digit])
+    codes.append(''.join(reversed(letters)))
+  return codes
+
+def _near(generator, center):
+  """Return a random latitude and longitude a few degrees from center."""
+  latitude = max(-89.0, min(89.0, generator.gauss(center[0], 3)))
+  longitude = (generator.gauss(center[1], 5) + 180) % 360 - 180
+  return latitude, longitude
+
+def _city(generator, code, cluster, latitude, longitude):
+  """Return a city's data dictionary, as stored in json files."""
+  coordinates = {}
+  coordinates[latitude < 0 and 'S' or 'N'] = int(round(abs(latitude)))
+  coordinates[longitude < 0 and 'W' or 'E'] = int(round(abs(longitude)))
+
+  return {
+    'code': code,
+    'name': 'City %s' % code,
+    'country': string.ascii_uppercase[cluster % 26] * 2,
+    'continent': CONTINENTS[cluster % len(CONTINENTS)],
+    'timezone': int(round(longitude / 15)),
+    'coordinates': coordinates,
+    'population': int(generator.lognormvariate(14, 1)),
+    'region': cluster % 4 + 1
+  }
+
+def _pair(port_a, port_b):
+  """Order the indexes of a route's cities, so each route is kept once."""
+  return min(port_a, port_b), max(port_a, port_b)
+
+def _distance(position_a, position_b):
+  """Return the great-circle distance between two positions in km."""
+  lat_a, lon_a = map(math.radians, position_a)
+  lat_b, lon_b = map(math.radians, position_b)
+  hav = math.sin((lat_b - lat_a) / 2) ** 2 + \
+    math.cos(lat_a) * math.cos(lat_b) * math.sin((lon_b - lon_a) / 2) ** 2
+  # Cities in the same place are still a short flight apart.
+  return max(1, int(round(2 * EARTH_RADIUS * math.asin(math.sqrt(hav)))))
+
+if __name__ == '__main__':
+  print 'To run the Pandemic Mapper, run "python mapper.py" instead.'
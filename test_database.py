@@ -1,8 +1,16 @@
+import os
+import tempfile
+import threading
 import unittest2
 import database
+import mapped_database
+import utils
 import read_methods as read
 import write_methods as write
 
+#: Read by the tests, so discover --changed reruns them when it changes
+test_data_files = ['test_data.json']
+
 # test_list data
 correct_list = [
 	('New York', 'JFK'),
@@ -84,10 +92,27 @@ correct_continents = {
 	'Africa': [('Kinshasa', 'FIH')]
 }
 
+def load_database():
+	return database.MapDatabase('test_data.json')
+
+def snapshot_database(map_database):
+	return dict(map_database._city_data), set(map_database._routes)
+
+def restore_database(map_database, snapshot):
+	# Imports only add cities and routes, so shallow copies undo them.
+	city_data, routes = snapshot
+	map_database._city_data.clear()
+	map_database._city_data.update(city_data)
+	map_database._routes.clear()
+	map_database._routes.update(routes)
+
+#: test_data.json is loaded once for the module and reset between tests.
+shared_database = unittest2.SharedFixture(load_database, scope='module',
+	snapshot=snapshot_database, restore=restore_database)
+
 class TestMapDatabase(unittest2.TestCase):
 	# read_methods tests.
-	def setUp(self):
-		self.database = database.MapDatabase('test_data.json')
+	database = shared_database
 
 	def test_list(self):
 		self.assertItemsEqual(correct_list, self.database.do(read.get_cities))
@@ -133,8 +158,218 @@ class TestMapDatabase(unittest2.TestCase):
 	def test_continents(self):
 		self.assertItemsEqual(correct_continents,
 			self.database.do(read.get_continents))
+
+	def test_trip(self):
+		pairs = [('LIM', 'BOG')]
+		self.assertEqual((self.database.do(read.get_distance, pairs),
+			self.database.do(read.get_time, pairs),
+			self.database.do(read.get_cost, pairs)),
+			self.database.do(read.get_trip, pairs))
+		self.assertRaises(ValueError, self.database.do, read.get_trip,
+			[('LIM', 'MAA')])
 	
+class TestImport(unittest2.TestCase):
+	database = shared_database
+
+	def setUp(self):
+		self.filenames = []
+
+	def tearDown(self):
+		for filename in self.filenames:
+			os.remove(filename)
+
+	def write_feed(self, lines):
+		handle, filename = tempfile.mkstemp(suffix='.jsonl')
+		os.write(handle, '\n'.join(lines))
+		os.close(handle)
+		self.filenames.append(filename)
+		return filename
+
+	def test_import(self):
+		cities = self.write_feed([
+			'{"code": "SCL", "name": "Santiago", "continent": "South America"}',
+			'',
+			'{"code": "MIA", "name": "Miami", "continent": "North America"}'
+		])
+		routes = self.write_feed([
+			'{"ports": ["SCL", "LIM"], "distance": 2453}',
+			'{"ports": ["MIA", "BOG"], "distance": 2427}'
+		])
+
+		self.assertEqual(2, self.database.do(write.import_cities, cities))
+		self.assertEqual(2, self.database.do(write.import_routes, routes))
+		route, distance, time, cost = \
+			self.database.do(read.shortest, 'SCL', 'MIA')
+		self.assertEqual('SCL -> LIM -> BOG -> MIA', route)
+		self.assertEqual(2453 + 1879 + 2427, distance)
+
+	def test_import_errors(self):
+		self.assertRaises(ValueError, self.database.do, write.import_cities,
+			self.write_feed(['{"code": "LIM", "name": "Lima"}']))
+		self.assertRaises(KeyError, self.database.do, write.import_routes,
+			self.write_feed(['{"ports": ["LIM", "XXX"], "distance": 1}']))
+		self.assertRaises(ValueError, self.database.do, write.import_routes,
+			self.write_feed(['{"ports": ']))
+		self.assertRaises(IOError, self.database.do, write.import_routes,
+			'no_such_feed.jsonl')
+
+class TestEditCity(unittest2.TestCase):
+	def test_edit_code(self):
+		# Editing changes the city in place, so it gets a database of its own.
+		map_database = load_database()
+		map_database.do(write.edit_city, 'JFK', 'NYC', key='code')
+
+		self.assertEqual('NYC', map_database._city_data['NYC']['code'])
+		self.assertEqual(set(['LON', 'MAD']),
+			utils.find_adjacent('NYC', map_database._routes))
+		self.assertEqual([], utils.routes_with(map_database._routes, 'JFK'))
+
+class TestLazyMapDatabase(TestMapDatabase):
+	def setUp(self):
+		self.database = database.MapDatabase('test_data.json', lazy=True)
+
+	def test_decoded_on_demand(self):
+		city_data = self.database._city_data
+		self.assertFalse(city_data.is_decoded('MAA'))
+		self.database.do(read.shortest, 'LIM', 'BOG')
+		self.assertFalse(city_data.is_decoded('MAA'))
+		self.assertEqual('Chennai', city_data['MAA']['name'])
+		self.assertTrue(city_data.is_decoded('MAA'))
+
+	def test_write_methods(self):
+		self.database.do(write.del_city, 'Chennai')
+		self.assertFalse('MAA' in self.database._city_data)
+		self.database.do(write.add_city, dict(jfk, code='JFX'))
+		self.assertEqual('New York', self.database._city_data['JFX']['name'])
+
+class TestMappedDatabase(TestMapDatabase):
+	def setUp(self):
+		handle, self.filename = tempfile.mkstemp(suffix='.pmdb')
+		os.close(handle)
+		source = database.MapDatabase('test_data.json')
+		source.do(write.save_mapped, self.filename)
+		self.source = source
+		self.database = mapped_database.MappedDatabase(self.filename)
+
+	def tearDown(self):
+		os.remove(self.filename)
+
+	def test_shortest(self):
+		self.assertEqual(self.source.do(read.shortest, 'LIM', 'BOG'),
+			self.database.do(read.shortest, 'LIM', 'BOG'))
+		self.assertEqual(self.source.do(read.get_url),
+			self.database.do(read.get_url))
+
+	def test_read_only(self):
+		self.assertRaises(TypeError, self.database.do, write.del_city, 'Lima')
+		self.assertRaises(TypeError, self.database.do, write.del_route,
+			'LIM', 'BOG')
+		self.assertRaises(TypeError, self.database.do, write.edit_city,
+			'LIM', 'Lima Metropolitana', key='name')
+		self.assertEqual('Lima', self.database._city_data['LIM']['name'])
+		self.assertRaises(TypeError, self.database.do, write.add_route,
+			'LIM', 'MAA', 1)
+
+	def test_not_mapped(self):
+		self.assertRaises(IOError, mapped_database.MappedDatabase,
+			'test_data.json')
+
+class TestReadWriteLock(unittest2.TestCase):
+	def setUp(self):
+		self.lock = database.ReadWriteLock()
+
+	def run_thread(self, target):
+		thread = threading.Thread(target=target)
+		thread.daemon = True
+		thread.start()
+		thread.join(0.2)
+		return thread
+
+	def test_shared_readers(self):
+		self.lock.acquire_read()
+		thread = self.run_thread(self.lock.acquire_read)
+		self.assertFalse(thread.isAlive())
+
+	def test_exclusive_writer(self):
+		self.lock.acquire_read()
+		writer = self.run_thread(self.lock.acquire_write)
+		self.assertTrue(writer.isAlive())
+
+		# A waiting writer goes ahead of new readers.
+		reader = self.run_thread(self.lock.acquire_read)
+		self.assertTrue(reader.isAlive())
+
+		self.lock.release_read()
+		writer.join(1.0)
+		self.assertFalse(writer.isAlive())
+		self.assertTrue(reader.isAlive())
+
+		self.lock.release_write()
+		reader.join(1.0)
+		self.assertFalse(reader.isAlive())
+
+	def test_marked_writer(self):
+		map_database = database.MapDatabase('test_data.json')
+
+		# Wherever it is defined, a marked method waits for exclusive access.
+		@utils.writer
+		def rename(code, name, city_data, routes):
+			city_data[code]['name'] = name
+
+		map_database._lock.acquire_read()
+		writer = self.run_thread(lambda: map_database.do(rename, 'LIM', 'L'))
+		self.assertTrue(writer.isAlive())
+		map_database._lock.release_read()
+		writer.join(1.0)
+		self.assertFalse(writer.isAlive())
+		self.assertEqual('L', map_database._city_data['LIM']['name'])
+
+		map_database._lock.acquire_read()
+		reader = self.run_thread(lambda: map_database.do(read.get_url))
+		self.assertFalse(reader.isAlive())
+		map_database._lock.release_read()
+
+	def test_concurrent_do(self):
+		map_database = database.MapDatabase('test_data.json')
+		errors = []
+
+		def edit():
+			try:
+				for i in range(200):
+					map_database.do(write.add_route, 'MAA', 'BGW', i)
+					map_database.do(write.del_route, 'MAA', 'BGW')
+			except Exception as error:
+				errors.append(error)
+
+		threads = [ threading.Thread(target=edit) ]
+		threads.extend([ threading.Thread(target=self.read_all,
+			args=(map_database, errors)) for i in range(3) ])
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual([], errors)
+		self.assertEqual(correct_avgdistance,
+			map_database.do(read.get_avg_distance))
+
+	def read_all(self, map_database, errors):
+		try:
+			for i in range(200):
+				map_database.do(read.get_avg_distance)
+				map_database.do(read.get_url)
+		except Exception as error:
+			errors.append(error)
+
 if __name__ == '__main__':
 	# Run the test cases with a bit of fancy formatting.
-	suite = unittest2.TestLoader().loadTestsFromTestCase(TestMapDatabase)
+	loader = unittest2.TestLoader()
+	suite = unittest2.TestSuite([
+		loader.loadTestsFromTestCase(TestMapDatabase),
+		loader.loadTestsFromTestCase(TestImport),
+		loader.loadTestsFromTestCase(TestEditCity),
+		loader.loadTestsFromTestCase(TestLazyMapDatabase),
+		loader.loadTestsFromTestCase(TestMappedDatabase),
+		loader.loadTestsFromTestCase(TestReadWriteLock)
+	])
 	unittest2.TextTestRunner(verbosity=2).run(suite)
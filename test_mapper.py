@@ -0,0 +1,61 @@
+import unittest2
+import simplejson
+from StringIO import StringIO
+import mapper
+import command_methods
+
+#: Read by the tests, so discover --changed reruns them when it changes
+test_data_files = ['test_data.json']
+
+class TestBatchMapper(unittest2.TestCase):
+	def setUp(self):
+		self.mapper = mapper.BatchMapper()
+		self.mapper.execute('load test_data.json')
+
+	def test_shortest(self):
+		result = self.mapper.execute('shortest LIM BOG')
+		self.assertTrue(result['ok'])
+		self.assertEqual(['LIM', 'BOG'], result['result']['route'])
+		self.assertEqual(1879, result['result']['distance'])
+
+	def test_stat(self):
+		result = self.mapper.execute('stat longflight')
+		self.assertEqual({'ports': ['MAD', 'JFK'], 'distance': 5786},
+			result['result'])
+
+	def test_errors(self):
+		self.assertEqual('No city named Nowhere.',
+			self.mapper.execute('uncity Nowhere')['error'])
+		self.assertFalse(self.mapper.execute('stat nothing')['ok'])
+		self.assertFalse(self.mapper.execute('newcity')['ok'])
+
+	def test_unexpected_error(self):
+		def broken(database, arg):
+			return [][0]
+		command_methods.COMMANDS['broken'] = broken
+		self.addCleanup(command_methods.COMMANDS.pop, 'broken')
+
+		result = self.mapper.execute('broken')
+		self.assertFalse(result['ok'])
+		self.assertEqual('IndexError: list index out of range', result['error'])
+
+	def test_no_database(self):
+		self.assertFalse(mapper.BatchMapper().execute('list')['ok'])
+
+	def test_run_batch(self):
+		output = StringIO()
+		script = ['load test_data.json', '', '# comment', 'route JFK', 'ls',
+			'exit', 'ls']
+		self.assertEqual(1, mapper.run_batch(script, output, buffer_size=1))
+
+		lines = output.getvalue().splitlines()
+		results = [ simplejson.loads(line) for line in lines ]
+		self.assertEqual(['load test_data.json', 'route JFK', 'ls'],
+			[ result['command'] for result in results ])
+		self.assertEqual('Please enter at least two city codes.',
+			results[1]['error'])
+		self.assertEqual(10, len(results[2]['result']))
+
+if __name__ == '__main__':
+	suite = unittest2.TestLoader().loadTestsFromTestCase(TestBatchMapper)
+	unittest2.TextTestRunner(verbosity=2).run(suite)
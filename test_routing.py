@@ -0,0 +1,215 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest2
+import mapped_database
+import read_methods as read
+import utils
+
+# Differential tests of routing engines:
+#   Random graphs are routed by utils.dijkstra, the oracle, and by each
+#   engine tested in TestRoutingEngines, which must find paths just as short.
+#   A new engine only needs a test calling check_engine. Every path must also
+#   cost what it claims when recomputed with read_methods.get_distance.
+#   A failing graph is shrunk to a smaller one that still fails before it is
+#   reported, along with the seed that reproduces it:
+#     ROUTING_SEED=<seed> ROUTING_CASES=1 python test_routing.py
+
+#: The number of graphs each engine is checked on, and the seed of the first.
+CASES = int(os.environ.get('ROUTING_CASES', 2000))
+SEED = int(os.environ.get('ROUTING_SEED', 0))
+
+MAX_CITIES = 8
+MAX_DISTANCE = 20 # Small distances make for ties between paths.
+
+def random_case(seed):
+	"""Return a random (city_data, routes, source, destination) case. The graph
+	may not be connected, and has at most one route between two cities.
+
+	"""
+	generator = random.Random(seed)
+	codes = [ 'C%d' % i for i in range(generator.randint(2, MAX_CITIES)) ]
+	density = generator.random()
+
+	routes = set()
+	for i, code_a in enumerate(codes):
+		for code_b in codes[i + 1:]:
+			if generator.random() < density:
+				ports = [ code_a, code_b ]
+				generator.shuffle(ports)
+				routes.add((ports[0], ports[1],
+					generator.randint(1, MAX_DISTANCE)))
+
+	source, destination = generator.sample(codes, 2)
+	return city_data_for(codes), routes, source, destination
+
+def city_data_for(codes):
+	return dict([ (code, {'code': code, 'name': code}) for code in codes ])
+
+def reference_shortest(source, destination, city_data, routes):
+	"""Find the shortest path with Bellman-Ford over the routes, without utils,
+	returning a (path, distance) tuple like utils.dijkstra. Raise KeyError if
+	there is no path.
+
+	"""
+	distances = {destination: 0}
+	next = {}
+	for i in range(len(city_data)):
+		for code_a, code_b, distance in routes:
+			for here, there in ((code_a, code_b), (code_b, code_a)):
+				if there not in distances:
+					continue
+				alt_distance = distances[there] + distance
+				if here not in distances or alt_distance < distances[here]:
+					distances[here] = alt_distance
+					next[here] = there
+
+	path = []
+	curr = source
+	while curr != destination:
+		path.append((curr, next[curr]))
+		curr = next[curr]
+	return path, distances[source]
+
+class MappedEngine:
+	"""Route with utils.dijkstra on a mapped copy of each graph, which finds
+	adjacent cities and routes through its route graph.
+
+	"""
+
+	def __init__(self, filename):
+		self.filename = filename
+
+	def __call__(self, source, destination, city_data, routes):
+		mapped_database.write(self.filename, city_data, routes, [])
+		mapped = mapped_database.MappedDatabase(self.filename)
+		return mapped.do(utils.dijkstra, source, destination)
+
+def check_path(path, distance, source, destination, city_data, routes):
+	"""Return why a path is wrong, or None if it goes from source to
+	destination and costs distance.
+
+	"""
+	if not path or path[0][0] != source or path[-1][1] != destination:
+		return 'path %r does not go from %s to %s' % (path, source, destination)
+	for (a, b), (c, d) in zip(path, path[1:]):
+		if b != c:
+			return 'path %r is broken between %s and %s' % (path, b, c)
+	try:
+		cost = read.get_distance(path, city_data, routes)
+	except ValueError, error:
+		return 'path %r takes a missing route: %s' % (path, error)
+	if cost != distance:
+		return 'path %r costs %r, not %r' % (path, cost, distance)
+	return None
+
+def compare(engine, case):
+	"""Return how engine disagrees with utils.dijkstra on case, or None."""
+	city_data, routes, source, destination = case
+	try:
+		oracle = utils.dijkstra(source, destination, city_data, set(routes))
+	except KeyError:
+		oracle = None
+	try:
+		found = engine(source, destination, city_data, set(routes))
+	except KeyError:
+		found = None
+
+	if oracle is None or found is None:
+		if oracle is not found:
+			return 'only one found a path: dijkstra %r, engine %r' % \
+				(oracle, found)
+		return None
+
+	for name, (path, distance) in (('dijkstra', oracle), ('engine', found)):
+		problem = check_path(path, distance, source, destination, city_data,
+			routes)
+		if problem is not None:
+			return '%s: %s' % (name, problem)
+	if oracle[1] != found[1]:
+		return 'dijkstra found %r, but the engine found %r' % (oracle, found)
+	return None
+
+def shrink(case, fails):
+	"""Return a smaller case than case for which fails(case) still returns a
+	reason, by removing routes and cities and shortening routes while it does.
+
+	"""
+	city_data, routes, source, destination = case
+	codes = sorted(city_data)
+	routes = sorted(routes)
+	progress = True
+	while progress:
+		progress = False
+		candidates = []
+		for route in routes:
+			candidates.append((codes, [ r for r in routes if r != route ]))
+		for code in codes:
+			if code not in (source, destination):
+				candidates.append(([ c for c in codes if c != code ],
+					[ r for r in routes if code not in r ]))
+		for i, route in enumerate(routes):
+			if route[2] > 1:
+				candidates.append((codes,
+					routes[:i] + [ route[:2] + (1,) ] + routes[i + 1:]))
+
+		for candidate_codes, candidate_routes in candidates:
+			candidate = (city_data_for(candidate_codes), set(candidate_routes),
+				source, destination)
+			if fails(candidate):
+				codes, routes, progress = candidate_codes, candidate_routes, True
+				break
+
+	return city_data_for(codes), set(routes), source, destination
+
+def describe(case):
+	city_data, routes, source, destination = case
+	return 'cities %s, routes %s, from %s to %s' % (sorted(city_data),
+		sorted(routes), source, destination)
+
+class TestRoutingEngines(unittest2.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.directory = tempfile.mkdtemp()
+
+	@classmethod
+	def tearDownClass(cls):
+		shutil.rmtree(cls.directory)
+
+	def check_engine(self, engine):
+		fails = lambda case: compare(engine, case)
+		for seed in range(SEED, SEED + CASES):
+			case = random_case(seed)
+			if fails(case) is None:
+				continue
+			smallest = shrink(case, fails)
+			self.fail('ROUTING_SEED=%d: %s\nShrunk to %s: %s' % (seed,
+				describe(case), describe(smallest), fails(smallest)))
+
+	def test_reference(self):
+		self.check_engine(reference_shortest)
+
+	def test_mapped(self):
+		self.check_engine(MappedEngine(os.path.join(self.directory, 'map.db')))
+
+	def test_shrink(self):
+		# An engine which is a little off once there are three routes.
+		def engine(source, destination, city_data, routes):
+			path, distance = reference_shortest(source, destination, city_data,
+				routes)
+			return path, distance + (len(routes) >= 3)
+
+		fails = lambda case: compare(engine, case)
+		case = city_data_for(['A', 'B', 'C', 'D', 'E']), set([('A', 'B', 5),
+			('B', 'C', 7), ('C', 'D', 2), ('A', 'E', 9), ('D', 'E', 4)]), 'A', 'D'
+		self.assertTrue(fails(case))
+
+		city_data, routes, source, destination = shrink(case, fails)
+		self.assertEqual(3, len(routes))
+		self.assertEqual([1, 1, 1], [ route[2] for route in routes ])
+		self.assertTrue(fails((city_data, routes, source, destination)))
+
+if __name__ == '__main__':
+	suite = unittest2.TestLoader().loadTestsFromTestCase(TestRoutingEngines)
+	unittest2.TextTestRunner(verbosity=2).run(suite)
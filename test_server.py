@@ -0,0 +1,71 @@
+import socket
+import threading
+import unittest2
+import simplejson
+import mapper
+import server
+
+#: Read by the tests, so discover --changed reruns them when it changes
+test_data_files = ['test_data.json']
+
+class TestQueryServer(unittest2.TestCase):
+	def setUp(self):
+		batch_mapper = mapper.BatchMapper()
+		batch_mapper.execute('load test_data.json')
+		self.server = server.QueryServer(('localhost', 0), batch_mapper)
+		thread = threading.Thread(target=self.server.serve_forever)
+		thread.daemon = True
+		thread.start()
+
+		self.connection = socket.create_connection(self.server.server_address)
+		self.responses = self.connection.makefile('rb')
+
+	def tearDown(self):
+		self.responses.close()
+		self.connection.close()
+		self.server.shutdown()
+		self.server.server_close()
+
+	def request(self, line):
+		self.connection.sendall(line + '\n')
+		return simplejson.loads(self.responses.readline())
+
+	def test_query(self):
+		response = self.request('{"id": 7, "command": "shortest LIM BOG"}')
+		self.assertEqual(7, response['id'])
+		self.assertEqual(['LIM', 'BOG'], response['result']['route'])
+
+		response = self.request('{"command": "stat avgpop"}')
+		self.assertEqual({'population': 12775000}, response['result'])
+
+	def test_bad_request(self):
+		self.assertFalse(self.request('shortest LIM BOG')['ok'])
+		self.assertFalse(self.request('{"command": 3}')['ok'])
+		self.assertFalse(self.request('{"command": "fly"}')['ok'])
+
+	def test_read_only(self):
+		for command in ('uncity Lima', 'unroute LIM BOG', 'newroute LIM MEX 1',
+			'save test_data.json', 'load test_data.json',
+			'import cities test_data.json'):
+			response = self.request(simplejson.dumps({'id': 1,
+				'command': command}))
+			self.assertFalse(response['ok'])
+			self.assertEqual(1, response['id'])
+
+		response = self.request('{"command": "info Lima"}')
+		self.assertTrue(response['ok'])
+
+	def test_unexpected_error(self):
+		def execute(command):
+			raise IndexError('list index out of range')
+		self.server.mapper.execute = execute
+
+		response = self.request('{"command": "list"}')
+		self.assertEqual('IndexError: list index out of range',
+			response['error'])
+		# The connection is still answered.
+		self.assertFalse(self.request('{"command": "list"}')['ok'])
+
+if __name__ == '__main__':
+	suite = unittest2.TestLoader().loadTestsFromTestCase(TestQueryServer)
+	unittest2.TextTestRunner(verbosity=2).run(suite)
@@ -29,7 +29,8 @@ SUPPORT, UPDATES, ENHANCEMENTS, OR MODIFICATIONS.
 __all__ = ['TestResult', 'TestCase', 'TestSuite',
            'TextTestRunner', 'TestLoader', 'FunctionTestCase', 'main',
            'defaultTestLoader', 'SkipTest', 'skip', 'skipIf', 'skipUnless',
-           'expectedFailure', 'TextTestResult', '__version__', 'collector']
+           'expectedFailure', 'TextTestResult', 'ParallelTestRunner',
+           'SharedFixture', 'BenchmarkCase', '__version__', 'collector']
 
 __version__ = '0.5.1'
 
@@ -44,12 +45,15 @@ from unittest2.case import (
     skipUnless, expectedFailure
 )
 from unittest2.suite import BaseTestSuite, TestSuite
+from unittest2.fixtures import SharedFixture
+from unittest2.benchmark import BenchmarkCase
 from unittest2.loader import (
     TestLoader, defaultTestLoader, makeSuite, getTestCaseNames,
     findTestCases
 )
 from unittest2.main import TestProgram, main, main_
 from unittest2.runner import TextTestRunner, TextTestResult
+from unittest2.parallel import ParallelTestRunner
 
 try:
     from unittest2.signals import (
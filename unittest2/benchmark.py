@@ -0,0 +1,182 @@
+"""Tests which time their test method against a baseline"""
+
+import os
+import sys
+import timeit
+
+try:
+    import json
+except ImportError:
+    # Python 2.4 and 2.5
+    import simplejson as json
+
+from unittest2.case import TestCase
+
+__unittest = True
+
+#: The statistics kept for each benchmark, in seconds per call
+STATISTICS = ('min', 'median', 'p95')
+
+# Baselines already read, by path
+_baselines = {}
+
+
+def _load(path):
+    try:
+        f = open(path)
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return data
+
+
+def summarize(times):
+    """Return the ``STATISTICS`` of a list of times as a dict."""
+    times = sorted(times)
+    count = len(times)
+    if count % 2:
+        median = times[count // 2]
+    else:
+        median = (times[count // 2 - 1] + times[count // 2]) / 2.0
+    # the nearest rank: at least 95% of the times are no longer
+    p95 = times[max(0, -(-count * 95 // 100) - 1)]
+    return {'min': times[0], 'median': median, 'p95': p95}
+
+
+def formatTime(seconds):
+    """Format ``seconds`` with the unit that suits it."""
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds >= 1.0 / scale:
+            return '%.3f%s' % (seconds * scale, unit)
+    return '%.1fns' % (seconds * 1e9)
+
+
+class Baseline(object):
+    """The statistics of each benchmark, by test id, kept as JSON in the
+    file at ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.benchmarks = _load(path)
+
+    def get(self, test_id):
+        return self.benchmarks.get(test_id)
+
+    def record(self, test_id, stats):
+        """Keep ``stats`` for ``test_id`` and write the file. It is read
+        again first, so that entries written meanwhile by tests in other
+        processes are kept."""
+        self.benchmarks = _load(self.path)
+        self.benchmarks[test_id] = dict([(name, stats[name])
+                                         for name in STATISTICS])
+        f = open(self.path, 'w')
+        try:
+            json.dump(self.benchmarks, f, indent=2, sort_keys=True)
+        finally:
+            f.close()
+
+
+def getBaseline(path):
+    """Return the :class:`Baseline` for the file at ``path``, reading it the
+    first time it is asked for."""
+    path = os.path.abspath(path)
+    baseline = _baselines.get(path)
+    if baseline is None:
+        baseline = _baselines[path] = Baseline(path)
+    return baseline
+
+
+class BenchmarkCase(TestCase):
+    """A test case whose test methods are benchmarks.
+
+    Each test method is called ``warmup`` times and then in ``repeat``
+    samples, calibrating how many calls make up a sample so that one takes
+    at least ``minTime`` seconds. ``setUp`` and ``tearDown`` run once
+    around all of them, so the method must be repeatable. The minimum,
+    median and 95th percentile time per call are given to the result's
+    ``addBenchmark``, which :class:`TextTestRunner` reports.
+
+    If ``baselineFile`` is set (relative to the directory of the module
+    the class is defined in), the median is compared with the one stored
+    there for the test, and the test fails if it is more than
+    ``maxRegression`` (a fraction) slower. A test with nothing stored yet
+    has its statistics stored; remove its entry to measure it again.
+    """
+
+    warmup = 1
+    repeat = 10
+    minTime = 0.01
+    baselineFile = None
+    maxRegression = 0.5
+
+    def _callTestMethod(self, method):
+        for _ in xrange(self.warmup):
+            method()
+        number = self._calibrate(method)
+        times = [self._time(method, number) / number
+                 for _ in xrange(self.repeat)]
+        stats = summarize(times)
+        stats['number'] = number
+        stats['repeat'] = self.repeat
+        addBenchmark = getattr(self._resultForDoCleanups, 'addBenchmark',
+                               None)
+        if addBenchmark is not None:
+            addBenchmark(self, stats)
+        self._checkBaseline(stats)
+
+    def _time(self, method, number):
+        timer = timeit.default_timer
+        start = timer()
+        for _ in xrange(number):
+            method()
+        return timer() - start
+
+    def _calibrate(self, method):
+        """Return the number of calls which take at least ``minTime``."""
+        number = 1
+        while True:
+            elapsed = self._time(method, number)
+            if elapsed >= self.minTime:
+                return number
+            if elapsed <= 0:
+                number *= 10
+            else:
+                # aim a little over, so the next try is likely enough
+                number = max(number + 1,
+                             int(number * 1.2 * self.minTime / elapsed))
+
+    def getBaseline(self):
+        """Return the :class:`Baseline` for ``baselineFile``, or None."""
+        if self.baselineFile is None:
+            return None
+        path = self.baselineFile
+        module = sys.modules.get(self.__class__.__module__)
+        moduleFile = getattr(module, '__file__', None)
+        if moduleFile is not None:
+            path = os.path.join(os.path.dirname(os.path.abspath(moduleFile)),
+                                path)
+        return getBaseline(path)
+
+    def _checkBaseline(self, stats):
+        baseline = self.getBaseline()
+        if baseline is None:
+            return
+        stored = baseline.get(self.id())
+        if stored is None:
+            baseline.record(self.id(), stats)
+            return
+        if self.maxRegression is None:
+            return
+        allowed = stored['median'] * (1 + self.maxRegression)
+        if stats['median'] > allowed:
+            self.fail('median %s per call is %.0f%% slower than the '
+                      'baseline %s (at most %.0f%% allowed)' %
+                      (formatTime(stats['median']),
+                       (stats['median'] / stored['median'] - 1) * 100,
+                       formatTime(stored['median']),
+                       self.maxRegression * 100))
@@ -0,0 +1,370 @@
+"""Remembering what test discovery found, and how tests went, between runs"""
+
+import os
+import re
+import sys
+import time
+import types
+import unittest
+
+try:
+    import json
+except ImportError:
+    # Python 2.4 and 2.5
+    import simplejson as json
+
+__unittest = True
+
+#: The name of the file the cache is kept in, in the top level directory
+CACHE_FILE = '.unittest2-cache'
+
+#: The name of the file the history of test outcomes and durations is kept
+#: in, in the top level directory
+HISTORY_FILE = '.unittest2-history'
+
+#: A test which failed within this many runs counts as recently failed
+RECENT_RUNS = 5
+
+_VERSION = 1
+
+# 'setUpClass (module.Class)' and so on
+_FIXTURE_ID = re.compile(r'^\w+ \((.*)\)$')
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+
+def _source(module):
+    path = getattr(module, '__file__', None)
+    if not path:
+        return None
+    if path[-4:] in ('.pyc', '.pyo') and os.path.exists(path[:-1]):
+        path = path[:-1]
+    return os.path.abspath(path)
+
+
+def _read(path):
+    """Return the versioned dict kept in ``path``, or an empty one."""
+    try:
+        f = open(path)
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+    except (IOError, ValueError):
+        data = {}
+    if not isinstance(data, dict) or data.get('version') != _VERSION:
+        data = {}
+    return data
+
+
+def _write(path, data):
+    data['version'] = _VERSION
+    try:
+        f = open(path, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+    except (IOError, OSError):
+        pass
+
+
+def listEntries(path):
+    """Return ``(name, isdir)`` for the files and directories in ``path``."""
+    entries = []
+    for name in os.listdir(path):
+        full_path = os.path.join(path, name)
+        if os.path.isfile(full_path):
+            entries.append((name, False))
+        elif os.path.isdir(full_path):
+            entries.append((name, True))
+    return entries
+
+
+def _testIds(test, ids):
+    try:
+        children = iter(test)
+    except TypeError:
+        ids.append(test.id())
+    else:
+        for child in children:
+            _testIds(child, ids)
+    return ids
+
+
+class DiscoveryCache(object):
+    """Directory listings and test modules seen by discovery, kept in a file
+    in the top level directory of the project between runs.
+
+    A directory is only listed again once its mtime changes, though it is
+    still stat'ed every run. For each test module the mtime and size of its
+    file and of every module in the project it uses (found through the
+    modules, classes and functions in its namespace) are kept, so that a
+    module whose tests have passed and which hasn't changed since can be
+    left out. The ids of its tests are kept only to say how many tests
+    were left out; a module that is run is always imported and loaded.
+
+    Modules are recorded as pending when they are loaded, and only kept by
+    :meth:`confirm` once their tests have run, so a run that is interrupted
+    doesn't count them as passed. Other files a module's tests read, such
+    as data files, only count if the module lists them (relative to its own
+    directory) in ``test_data_files``.
+    """
+
+    def __init__(self, filename=CACHE_FILE):
+        self.filename = filename
+        self.path = None
+        self.topLevelDir = None
+        self.directories = {}
+        self.modules = {}
+        # the modules recorded in this run whose tests haven't run yet
+        self.pending = {}
+        # the modules recorded and the modules left out in this run
+        self.recorded = []
+        self.unchanged = []
+
+    def open(self, top_level_dir):
+        """Load the cache from ``top_level_dir``, if it has one."""
+        path = os.path.join(top_level_dir, self.filename)
+        if path == self.path:
+            return
+        self.path = path
+        self.topLevelDir = top_level_dir
+        data = _read(path)
+        self.directories = data.get('directories', {})
+        self.modules = data.get('modules', {})
+
+    def save(self):
+        """Write the cache back, if it could be written. Pending modules
+        are left out."""
+        if self.path is None:
+            return
+        _write(self.path, {'directories': self.directories,
+                           'modules': self.modules})
+
+    def listdir(self, path):
+        """Return the ``(name, isdir)`` pairs for the files and directories
+        in ``path``, listing it only if it has changed."""
+        mtime = os.stat(path).st_mtime
+        cached = self.directories.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        entries = listEntries(path)
+        # A change within the mtime's resolution of the listing could be
+        # missed, so recent listings are not kept.
+        if time.time() - mtime > 2:
+            self.directories[path] = [mtime, entries]
+        return entries
+
+    def isChanged(self, name):
+        """Return whether test module ``name`` or a module it uses has
+        changed since it was recorded, or it hasn't been recorded."""
+        entry = self.modules.get(name)
+        if entry is None:
+            return True
+        for path, stamp in entry['stamps'].iteritems():
+            if _stamp(path) != stamp:
+                return True
+        return False
+
+    def skip(self, name):
+        """Note that unchanged test module ``name`` is being left out."""
+        self.unchanged.append(name)
+
+    def skippedTests(self):
+        """Return the number of tests in the modules left out."""
+        return sum([len(self.modules[name]['tests'])
+                    for name in self.unchanged])
+
+    def record(self, name, module, test):
+        """Record test module ``name``, and ``test`` loaded from it, as
+        pending until :meth:`confirm`."""
+        stamps = self._dependencies(module)
+        directory = os.path.dirname(_source(module) or '')
+        for path in getattr(module, 'test_data_files', ()):
+            path = os.path.abspath(os.path.join(directory, path))
+            stamps[path] = _stamp(path)
+        self.modules.pop(name, None)
+        self.pending[name] = {'stamps': stamps, 'tests': _testIds(test, [])}
+        self.recorded.append(name)
+
+    def _dependencies(self, module):
+        prefix = os.path.join(self.topLevelDir, '')
+        stamps = {}
+        seen = {}
+        stack = [module]
+        while stack:
+            module = stack.pop()
+            if id(module) in seen:
+                continue
+            seen[id(module)] = module
+            path = _source(module)
+            if path is None or not path.startswith(prefix):
+                continue
+            stamps[path] = _stamp(path)
+            for value in module.__dict__.values():
+                if not isinstance(value, types.ModuleType):
+                    try:
+                        value = sys.modules.get(value.__module__)
+                    except Exception:
+                        # no __module__, or not a string
+                        continue
+                if value is not None:
+                    stack.append(value)
+        return stamps
+
+    def invalidate(self, ids=None):
+        """Forget the modules recorded in this run that have tests with
+        these ids (all of them if ``ids`` is None), so they run next time."""
+        for name in self.recorded:
+            if name not in self.pending:
+                continue
+            if ids is None:
+                del self.pending[name]
+                continue
+            prefix = name + '.'
+            for test_id in ids:
+                match = _FIXTURE_ID.match(test_id)
+                if match is not None:
+                    test_id = match.group(1)
+                if test_id == name or test_id.startswith(prefix):
+                    del self.pending[name]
+                    break
+
+    def confirm(self):
+        """Keep the pending modules which weren't invalidated, once their
+        tests have run."""
+        self.modules.update(self.pending)
+        self.pending = {}
+
+
+def _fixtureTarget(test_id):
+    """Return the class or module a fixture's id names, or the id itself."""
+    match = _FIXTURE_ID.match(test_id)
+    if match is not None:
+        return match.group(1)
+    return test_id
+
+
+class TestHistory(object):
+    """The outcome and duration of each test over past runs, kept in a file
+    in the top level directory of the project, to run the tests most likely
+    to fail soonest first.
+
+    :meth:`order` puts tests which failed in the last :data:`RECENT_RUNS`
+    runs first, most recent first, then tests it hasn't seen, then the
+    rest, fastest first. With ``failfast`` a run then stops at a failure
+    as early as it can. The tests of a class, and the classes of a module
+    with module fixtures, are kept together so that no fixture runs more
+    than once; class and module fixtures count towards them.
+    """
+
+    def __init__(self, filename=HISTORY_FILE):
+        self.filename = filename
+        self.path = None
+        self.runs = 0
+        # test id -> {'time': seconds, 'failed': the run it last failed in}
+        self.tests = {}
+
+    def open(self, top_level_dir):
+        """Load the history from ``top_level_dir``, if it has one."""
+        self.path = os.path.join(top_level_dir, self.filename)
+        data = _read(self.path)
+        self.runs = data.get('runs', 0)
+        self.tests = data.get('tests', {})
+
+    def save(self):
+        """Write the history back, if it could be written."""
+        if self.path is None:
+            return
+        _write(self.path, {'runs': self.runs, 'tests': self.tests})
+
+    def record(self, result):
+        """Record the outcomes and durations of the tests ``result`` saw as
+        a new run. Tests which didn't run, as after a ``failfast`` stop, are
+        left as they were, and results without ``durations`` only update
+        the outcomes."""
+        self.runs += 1
+        times = {}
+        for test, wall, cpu in getattr(result, 'durations', ()):
+            test_id = _fixtureTarget(test.id())
+            times[test_id] = times.get(test_id, 0.0) + wall
+        for test_id, wall in times.iteritems():
+            self.tests.setdefault(test_id, {})['time'] = wall
+        failed = [test for test, _ in result.errors + result.failures]
+        failed.extend(result.unexpectedSuccesses)
+        for test in failed:
+            test_id = _fixtureTarget(test.id())
+            self.tests.setdefault(test_id, {})['failed'] = self.runs
+
+    def key(self, ids, fixtures=()):
+        """Return the sort key of the tests with ``ids``, and the class and
+        module ``fixtures`` they share. Tests which recently failed come
+        first, then new tests, then the rest, each fastest first."""
+        failed = None
+        new = False
+        total = 0.0
+        for test_id in list(ids) + list(fixtures):
+            entry = self.tests.get(test_id)
+            if entry is None:
+                # classes and modules without fixtures are never recorded
+                new = new or test_id in ids
+                continue
+            total += entry.get('time', 0.0)
+            run = entry.get('failed')
+            if (run is not None and self.runs - run < RECENT_RUNS and
+                (failed is None or run > failed)):
+                failed = run
+        if failed is not None:
+            return (0, -failed, total)
+        if new:
+            return (1, 0, total)
+        return (2, 0, total)
+
+    def order(self, test):
+        """Return a suite of the tests in ``test``, in the order to run."""
+        from unittest2.parallel import partition
+        from unittest2.suite import TestSuite
+
+        groups = []
+        for tests in partition(test):
+            classes = []
+            byClass = {}
+            for test in tests:
+                cases = byClass.get(test.__class__)
+                if cases is None:
+                    cases = byClass[test.__class__] = []
+                    classes.append(cases)
+                cases.append(test)
+            groups.append(self._sorted([self._sorted(cases)
+                                        for cases in classes]))
+        ordered = []
+        for classes in self._sorted(groups):
+            for cases in classes:
+                ordered.extend(cases)
+        return TestSuite(ordered)
+
+    def _sorted(self, items):
+        def key(item):
+            ids, fixtures = [], {}
+            _collectIds(item, ids, fixtures)
+            return self.key(ids, fixtures)
+        return sorted(items, key=key)
+
+
+def _collectIds(item, ids, fixtures):
+    if isinstance(item, list):
+        for child in item:
+            _collectIds(child, ids, fixtures)
+        return
+    _testIds(item, ids)
+    if isinstance(item, unittest.TestCase):
+        cls = item.__class__
+        fixtures['%s.%s' % (cls.__module__, cls.__name__)] = True
+        fixtures[cls.__module__] = True
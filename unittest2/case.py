@@ -20,6 +20,11 @@ __unittest = True
 
 DIFF_OMITTED = ('\nDiff is %s characters long. '
                  'Set self.maxDiff to None to see it.')
+DIFF_SKIPPED = ('\nDiff is over %s characters long. '
+                'Set self.maxDiff to None to see it.')
+
+# The most differences listed when a diff would be too long to show
+_MAX_DIFFERENCES = 10
 
 class SkipTest(Exception):
     """
@@ -337,7 +342,7 @@ class TestCase(unittest.TestCase):
                 result.addError(self, sys.exc_info())
             else:
                 try:
-                    testMethod()
+                    self._callTestMethod(testMethod)
                 except self.failureException:
                     result.addFailure(self, sys.exc_info())
                 except _ExpectedFailure, e:
@@ -380,6 +385,9 @@ class TestCase(unittest.TestCase):
                 if stopTestRun is not None:
                     stopTestRun()
 
+    def _callTestMethod(self, method):
+        method()
+
     def doCleanups(self):
         """Execute all cleanup functions. Normally called for you after
         tearDown."""
@@ -680,6 +688,8 @@ class TestCase(unittest.TestCase):
                 seq2_repr = seq2_repr[:30] + '...'
             elements = (seq_type_name.capitalize(), seq1_repr, seq2_repr)
             differing = '%ss differ: %s != %s\n' % elements
+            # elements are cut short unless the whole diff is wanted
+            short = self.maxDiff is not None
 
             for i in xrange(min(len1, len2)):
                 try:
@@ -698,7 +708,8 @@ class TestCase(unittest.TestCase):
 
                 if item1 != item2:
                     differing += ('\nFirst differing element %d:\n%s\n%s\n' %
-                                 (i, item1, item2))
+                                 (i, safe_str(item1, short),
+                                  safe_str(item2, short)))
                     break
             else:
                 if (len1 == len2 and seq_type is None and
@@ -711,7 +722,7 @@ class TestCase(unittest.TestCase):
                              'elements.\n' % (seq_type_name, len1 - len2))
                 try:
                     differing += ('First extra element %d:\n%s\n' %
-                                  (len2, seq1[len2]))
+                                  (len2, safe_str(seq1[len2], short)))
                 except (TypeError, IndexError, NotImplementedError):
                     differing += ('Unable to index element %d '
                                   'of first %s\n' % (len2, seq_type_name))
@@ -720,16 +731,19 @@ class TestCase(unittest.TestCase):
                              'elements.\n' % (seq_type_name, len2 - len1))
                 try:
                     differing += ('First extra element %d:\n%s\n' %
-                                  (len1, seq2[len1]))
+                                  (len1, safe_str(seq2[len1], short)))
                 except (TypeError, IndexError, NotImplementedError):
                     differing += ('Unable to index element %d '
                                   'of second %s\n' % (len1, seq_type_name))
         standardMsg = differing
-        diffMsg = '\n' + '\n'.join(
-            difflib.ndiff(pprint.pformat(seq1).splitlines(),
-                          pprint.pformat(seq2).splitlines()))
-
-        standardMsg = self._truncateMessage(standardMsg, diffMsg)
+        if self._diffTooLong(seq1, seq2):
+            standardMsg += self._listDifferences(
+                self._sequenceDifferences(seq1, seq2))
+        else:
+            diffMsg = '\n' + '\n'.join(
+                difflib.ndiff(pprint.pformat(seq1).splitlines(),
+                              pprint.pformat(seq2).splitlines()))
+            standardMsg = self._truncateMessage(standardMsg, diffMsg)
         msg = self._formatMessage(msg, standardMsg)
         self.fail(msg)
 
@@ -739,6 +753,101 @@ class TestCase(unittest.TestCase):
             return message + diff
         return message + (DIFF_OMITTED % len(diff))
 
+    def _diffTooLong(self, first, second):
+        """Return whether a diff of first and second is sure to be longer
+        than maxDiff, without making it.
+
+        Every element of both appears in the diff, so the lengths of their
+        reprs (of their characters, for strings) are added up, stopping as
+        soon as they pass maxDiff.
+        """
+        max_diff = self.maxDiff
+        if max_diff is None:
+            return False
+        for obj in (first, second):
+            if isinstance(obj, basestring):
+                if len(obj) > max_diff:
+                    return True
+                continue
+            if isinstance(obj, dict):
+                obj = obj.iteritems()
+            length = 0
+            try:
+                for item in obj:
+                    length += len(safe_repr(item))
+                    if length > max_diff:
+                        return True
+            except (TypeError, IndexError, NotImplementedError):
+                # not something whose elements can be gone through
+                return False
+        return False
+
+    def _listDifferences(self, differences):
+        """Format up to _MAX_DIFFERENCES lines from the ``differences``
+        iterator, in place of a diff that would be too long."""
+        lines = []
+        for line in differences:
+            if len(lines) == _MAX_DIFFERENCES:
+                lines.append('...')
+                break
+            lines.append(line)
+        return '\n' + '\n'.join(lines) + DIFF_SKIPPED % self.maxDiff
+
+    def _sequenceDifferences(self, seq1, seq2):
+        try:
+            len1 = len(seq1)
+            len2 = len(seq2)
+            for i in xrange(min(len1, len2)):
+                item1 = seq1[i]
+                item2 = seq2[i]
+                if item1 != item2:
+                    yield 'Element %d: %s != %s' % (
+                        i, safe_repr(item1, True), safe_repr(item2, True))
+            if len1 > len2:
+                yield 'Elements %d to %d only in first' % (len2, len1 - 1)
+            elif len2 > len1:
+                yield 'Elements %d to %d only in second' % (len1, len2 - 1)
+        except (TypeError, IndexError, NotImplementedError):
+            return
+
+    def _dictDifferences(self, d1, d2):
+        keys = d1.keys()
+        keys.extend([key for key in d2 if key not in d1])
+        try:
+            keys.sort()
+        except TypeError:
+            pass
+        for key in keys:
+            if key not in d2:
+                yield 'Key %s only in first: %s' % (
+                    safe_repr(key, True), safe_repr(d1[key], True))
+            elif key not in d1:
+                yield 'Key %s only in second: %s' % (
+                    safe_repr(key, True), safe_repr(d2[key], True))
+            elif d1[key] != d2[key]:
+                yield 'Key %s: %s != %s' % (safe_repr(key, True),
+                    safe_repr(d1[key], True), safe_repr(d2[key], True))
+
+    def _lineDifferences(self, first, second):
+        lines1 = first.splitlines(True)
+        lines2 = second.splitlines(True)
+        # Only the lines between the common beginning and end are shown.
+        start = 0
+        end = min(len(lines1), len(lines2))
+        while start < end and lines1[start] == lines2[start]:
+            start += 1
+        end1, end2 = len(lines1), len(lines2)
+        while (end1 > start and end2 > start and
+               lines1[end1 - 1] == lines2[end2 - 1]):
+            end1 -= 1
+            end2 -= 1
+        yield 'First differing line %d:' % (start + 1,)
+        half = (_MAX_DIFFERENCES - 1) // 2
+        for line in lines1[start:min(end1, start + half)]:
+            yield '- ' + safe_repr(line, True)
+        for line in lines2[start:min(end2, start + half)]:
+            yield '+ ' + safe_repr(line, True)
+
     def assertListEqual(self, list1, list2, msg=None):
         """A list-specific equality assertion.
 
@@ -837,10 +946,14 @@ class TestCase(unittest.TestCase):
 
         if d1 != d2:
             standardMsg = '%s != %s' % (safe_repr(d1, True), safe_repr(d2, True))
-            diff = ('\n' + '\n'.join(difflib.ndiff(
-                           pprint.pformat(d1).splitlines(),
-                           pprint.pformat(d2).splitlines())))
-            standardMsg = self._truncateMessage(standardMsg, diff)
+            if self._diffTooLong(d1, d2):
+                standardMsg += self._listDifferences(
+                    self._dictDifferences(d1, d2))
+            else:
+                diff = ('\n' + '\n'.join(difflib.ndiff(
+                               pprint.pformat(d1).splitlines(),
+                               pprint.pformat(d2).splitlines())))
+                standardMsg = self._truncateMessage(standardMsg, diff)
             self.fail(self._formatMessage(msg, standardMsg))
 
     def assertDictContainsSubset(self, expected, actual, msg=None):
@@ -917,9 +1030,13 @@ class TestCase(unittest.TestCase):
 
         if first != second:
             standardMsg = '%s != %s' % (safe_repr(first, True), safe_repr(second, True))
-            diff = '\n' + ''.join(difflib.ndiff(first.splitlines(True),
-                                                       second.splitlines(True)))
-            standardMsg = self._truncateMessage(standardMsg, diff)
+            if self._diffTooLong(first, second):
+                standardMsg += self._listDifferences(
+                    self._lineDifferences(first, second))
+            else:
+                diff = '\n' + ''.join(difflib.ndiff(first.splitlines(True),
+                                                           second.splitlines(True)))
+                standardMsg = self._truncateMessage(standardMsg, diff)
             self.fail(self._formatMessage(msg, standardMsg))
 
     def assertLess(self, a, b, msg=None):
@@ -0,0 +1,93 @@
+"""Expensive fixtures shared between tests"""
+
+__unittest = True
+
+SCOPES = ('class', 'module', 'session')
+
+# Fixtures which hold a value, for the suite to release
+_live = []
+
+
+class SharedFixture(object):
+    """A value which is built once by calling ``factory`` and then shared by
+    the tests of a class, a module or the whole run, depending on ``scope``.
+
+    It is set as an attribute of a :class:`TestCase`, and built the first
+    time a test gets the attribute::
+
+        class TestMap(unittest2.TestCase):
+            database = unittest2.SharedFixture(load_database, scope='module')
+
+            def test_cities(self):
+                self.database.do(...)
+
+    A value that tests change should be given ``snapshot`` and ``restore``
+    functions: ``snapshot(value)`` is called once when the value is built,
+    and ``restore(value, snapshot)`` before each test that gets the value
+    after another test has. Tests which don't use the fixture cost nothing.
+
+    :class:`TestSuite` releases the value when the last test of its scope
+    has run (at the end of the run for ``'session'``), calling
+    ``finalize(value)`` if it is given. Setting the attribute on a test, as
+    a subclass's ``setUp`` might, hides the shared value from that test.
+    """
+
+    def __init__(self, factory, scope='class', snapshot=None, restore=None,
+                 finalize=None):
+        if scope not in SCOPES:
+            raise ValueError('scope must be one of %s, not %r' %
+                             (', '.join(SCOPES), scope))
+        if (snapshot is None) != (restore is None):
+            raise TypeError('snapshot and restore must be given together')
+        self.factory = factory
+        self.scope = scope
+        self.snapshot = snapshot
+        self.restore = restore
+        self.finalize = finalize
+        self.name = getattr(factory, '__name__', repr(factory))
+        # key -> [value, snapshot, last test to get it]
+        self._values = {}
+
+    def __repr__(self):
+        return '<SharedFixture %s scope=%s>' % (self.name, self.scope)
+
+    def _key(self, cls):
+        if self.scope == 'class':
+            return cls
+        elif self.scope == 'module':
+            return cls.__module__
+        return None
+
+    def __get__(self, test, cls):
+        if test is None:
+            return self
+        key = self._key(cls)
+        entry = self._values.get(key)
+        if entry is None:
+            value = self.factory()
+            state = None
+            if self.snapshot is not None:
+                state = self.snapshot(value)
+            entry = self._values[key] = [value, state, test]
+            if self not in _live:
+                _live.append(self)
+        elif entry[2] is not test:
+            if self.restore is not None:
+                self.restore(entry[0], entry[1])
+            entry[2] = test
+        return entry[0]
+
+    def release(self, key):
+        """Forget the value for ``key`` (a class, a module name or None for
+        the session), calling ``finalize`` with it."""
+        entry = self._values.pop(key, None)
+        if not self._values and self in _live:
+            _live.remove(self)
+        if entry is not None and self.finalize is not None:
+            self.finalize(entry[0])
+
+
+def liveFixtures(scope, key):
+    """Return the fixtures of ``scope`` holding a value for ``key``."""
+    return [fixture for fixture in _live
+            if fixture.scope == scope and key in fixture._values]
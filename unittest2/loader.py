@@ -10,6 +10,7 @@ import unittest
 from fnmatch import fnmatch
 
 from unittest2 import case, suite
+from unittest2.cache import listEntries
 
 try:
     from os.path import relpath
@@ -59,10 +60,18 @@ class TestLoader(unittest.TestLoader):
     """
     This class is responsible for loading tests according to various criteria
     and returning them wrapped in a TestSuite
+
+    If ``cache`` is set to a :class:`~unittest2.cache.DiscoveryCache`,
+    discovery lists directories and records what test modules use through
+    it, and with ``changedOnly`` set it leaves out the test modules that
+    haven't changed since their tests last passed. Every other module is
+    imported and loaded as usual.
     """
     testMethodPrefix = 'test'
     sortTestMethodsUsing = cmp
     suiteClass = suite.TestSuite
+    cache = None
+    changedOnly = False
     _top_level_dir = None
 
     def loadTestsFromTestCase(self, testCaseClass):
@@ -221,7 +230,11 @@ class TestLoader(unittest.TestLoader):
         if is_not_importable:
             raise ImportError('Start directory is not importable: %r' % start_dir)
 
+        if self.cache is not None:
+            self.cache.open(self._top_level_dir)
         tests = list(self._find_tests(start_dir, pattern))
+        if self.cache is not None:
+            self.cache.save()
         return self.suiteClass(tests)
 
     def _get_name_from_path(self, path):
@@ -244,11 +257,9 @@ class TestLoader(unittest.TestLoader):
     
     def _find_tests(self, start_dir, pattern):
         """Used by discovery. Yields test suites it loads."""
-        paths = os.listdir(start_dir)
-
-        for path in paths:
+        for path, isdir in self._listdir(start_dir):
             full_path = os.path.join(start_dir, path)
-            if os.path.isfile(full_path):
+            if not isdir:
                 if not VALID_MODULE_NAME.match(path):
                     # valid Python identifiers only
                     continue
@@ -256,6 +267,10 @@ class TestLoader(unittest.TestLoader):
                     continue
                 # if the test file matches, load it
                 name = self._get_name_from_path(full_path)
+                if (self.changedOnly and self.cache is not None and
+                    not self.cache.isChanged(name)):
+                    self.cache.skip(name)
+                    continue
                 try:
                     module = self._get_module_from_name(name)
                 except:
@@ -271,8 +286,11 @@ class TestLoader(unittest.TestLoader):
                         msg = ("%r module incorrectly imported from %r. Expected %r. "
                                "Is this module globally installed?")
                         raise ImportError(msg % (mod_name, module_dir, expected_dir))
-                    yield self.loadTestsFromModule(module)
-            elif os.path.isdir(full_path):
+                    tests = self.loadTestsFromModule(module)
+                    if self.cache is not None:
+                        self.cache.record(name, module, tests)
+                    yield tests
+            else:
                 if not os.path.isfile(os.path.join(full_path, '__init__.py')):
                     continue
 
@@ -299,6 +317,11 @@ class TestLoader(unittest.TestLoader):
                         yield _make_failed_load_tests(package.__name__, e,
                                                       self.suiteClass)
 
+    def _listdir(self, start_dir):
+        if self.cache is not None:
+            return self.cache.listdir(start_dir)
+        return listEntries(start_dir)
+
 defaultTestLoader = TestLoader()
 
 
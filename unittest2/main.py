@@ -4,7 +4,7 @@ import sys
 import os
 import types
 
-from unittest2 import loader, runner
+from unittest2 import cache, loader, parallel, reporter, runner
 try:
     from unittest2.signals import installHandler
 except ImportError:
@@ -15,6 +15,15 @@ __unittest = True
 FAILFAST     = "  -f, --failfast   Stop on first failure\n"
 CATCHBREAK   = "  -c, --catch      Catch control-C and display results\n"
 BUFFEROUTPUT = "  -b, --buffer     Buffer stdout and stderr during test runs\n"
+PROCESSES    = "  -j N             Run tests in N processes (0 for one per CPU)\n"
+DURATIONS    = ("  --durations N    List the N slowest tests and fixtures (0 for all)\n"
+                "  --durations-file FILE\n"
+                "                   Write the time taken by each test to FILE as JSON\n")
+REPORT       = ("  --report FILE    Write each result to FILE as soon as it is known\n"
+                "  --report-format FORMAT\n"
+                "                   jsonl (JSON lines, the default) or junit (XML)\n")
+PRIORITIZE   = ("  --prioritize     Run recently failed tests first, then the fastest,\n"
+                "                   keeping their history in .unittest2-history\n")
 
 USAGE_AS_MAIN = """\
 Usage: %(progName)s [options] [tests]
@@ -23,7 +32,7 @@ Options:
   -h, --help       Show this message
   -v, --verbose    Verbose output
   -q, --quiet      Minimal output
-%(failfast)s%(catchbreak)s%(buffer)s
+%(failfast)s%(catchbreak)s%(buffer)s%(processes)s%(durations)s%(report)s%(prioritize)s
 Examples:
   %(progName)s test_module                       - run tests from test_module
   %(progName)s test_module.TestClass             - run tests from
@@ -37,10 +46,16 @@ Alternative Usage: %(progName)s discover [options]
 
 Options:
   -v, --verbose    Verbose output
-%(failfast)s%(catchbreak)s%(buffer)s  -s directory     Directory to start discovery ('.' default)
+%(failfast)s%(catchbreak)s%(buffer)s%(processes)s%(durations)s%(report)s%(prioritize)s  -s directory     Directory to start discovery ('.' default)
   -p pattern       Pattern to match test files ('test*.py' default)
   -t directory     Top level directory of project (default to
                    start directory)
+  --cache          Keep directory listings, and the files each test
+                   module uses, in the top level directory
+  --changed        Only run test modules which have changed, or use
+                   modules which have, since their tests passed (implies
+                   --cache). Data files only count if a test module lists
+                   them in test_data_files
 
 For test discovery all test modules must be importable from the top
 level directory of the project.
@@ -53,7 +68,7 @@ Options:
   -h, --help       Show this message
   -v, --verbose    Verbose output
   -q, --quiet      Minimal output
-%(failfast)s%(catchbreak)s%(buffer)s
+%(failfast)s%(catchbreak)s%(buffer)s%(processes)s%(durations)s%(report)s%(prioritize)s
 Examples:
   %(progName)s                               - run default set of tests
   %(progName)s MyTestSuite                   - run suite 'MyTestSuite'
@@ -70,12 +85,16 @@ class TestProgram(object):
     USAGE = USAGE_FROM_MODULE
     
     # defaults for testing
-    failfast = catchbreak = buffer = progName = None
+    failfast = catchbreak = buffer = progName = processes = None
+    durations = durationsFile = discoveryCache = None
+    report = reportFormat = prioritize = topLevelDir = history = None
 
     def __init__(self, module='__main__', defaultTest=None,
                  argv=None, testRunner=None,
                  testLoader=loader.defaultTestLoader, exit=True,
-                 verbosity=1, failfast=None, catchbreak=None, buffer=None):
+                 verbosity=1, failfast=None, catchbreak=None, buffer=None,
+                 processes=None, durations=None, durationsFile=None,
+                 report=None, reportFormat=None, prioritize=None):
         if isinstance(module, basestring):
             self.module = __import__(module)
             for part in module.split('.')[1:]:
@@ -90,6 +109,12 @@ class TestProgram(object):
         self.failfast = failfast
         self.catchbreak = catchbreak
         self.buffer = buffer
+        self.processes = processes
+        self.durations = durations
+        self.durationsFile = durationsFile
+        self.report = report
+        self.reportFormat = reportFormat
+        self.prioritize = prioritize
         self.defaultTest = defaultTest
         self.testRunner = testRunner
         self.testLoader = testLoader
@@ -101,7 +126,9 @@ class TestProgram(object):
         if msg:
             print msg
         usage = {'progName': self.progName, 'catchbreak': '', 'failfast': '',
-                 'buffer': ''}
+                 'buffer': '', 'processes': PROCESSES,
+                 'durations': DURATIONS, 'report': REPORT,
+                 'prioritize': PRIORITIZE}
         if self.failfast != False:
             usage['failfast'] = FAILFAST
         if self.catchbreak != False and installHandler is not None:
@@ -117,9 +144,11 @@ class TestProgram(object):
             return
 
         import getopt
-        long_opts = ['help', 'verbose', 'quiet', 'failfast', 'catch', 'buffer']
+        long_opts = ['help', 'verbose', 'quiet', 'failfast', 'catch', 'buffer',
+                     'durations=', 'durations-file=', 'report=',
+                     'report-format=', 'prioritize']
         try:
-            options, args = getopt.getopt(argv[1:], 'hHvqfcb', long_opts)
+            options, args = getopt.getopt(argv[1:], 'hHvqfcbj:', long_opts)
             for opt, value in options:
                 if opt in ('-h','-H','--help'):
                     self.usageExit()
@@ -139,6 +168,24 @@ class TestProgram(object):
                     if self.buffer is None:
                         self.buffer = True
                     # Should this raise an exception if -b is not valid?
+                if opt == '-j':
+                    if self.processes is None:
+                        self.processes = self._parseNumber(opt, value)
+                if opt == '--durations':
+                    if self.durations is None:
+                        self.durations = self._parseNumber(opt, value)
+                if opt == '--durations-file':
+                    if self.durationsFile is None:
+                        self.durationsFile = value
+                if opt == '--report':
+                    if self.report is None:
+                        self.report = value
+                if opt == '--report-format':
+                    if self.reportFormat is None:
+                        self.reportFormat = self._parseFormat(value)
+                if opt == '--prioritize':
+                    if self.prioritize is None:
+                        self.prioritize = True
             if len(args) == 0 and self.defaultTest is None:
                 # createTests will load tests from self.module
                 self.testNames = None
@@ -153,6 +200,21 @@ class TestProgram(object):
         except getopt.error, msg:
             self.usageExit(msg)
 
+    def _parseNumber(self, opt, value):
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            self.usageExit('%s must be a number, not %r' % (opt, value))
+        return number
+
+    def _parseFormat(self, value):
+        if value not in reporter.FORMATS:
+            self.usageExit('--report-format must be one of %s, not %r' %
+                           (', '.join(sorted(reporter.FORMATS)), value))
+        return value
+
     def createTests(self):
         if self.testNames is None:
             self.test = self.testLoader.loadTestsFromModule(self.module)
@@ -180,12 +242,41 @@ class TestProgram(object):
             parser.add_option('-b', '--buffer', dest='buffer', default=False,
                               help='Buffer stdout and stderr during tests', 
                               action='store_true')
+        parser.add_option('-j', dest='processes', default=None,
+                          help='Run tests in N processes (0 for one per CPU)',
+                          metavar='N')
+        parser.add_option('--durations', dest='durations', default=None,
+                          help='List the N slowest tests and fixtures '
+                               '(0 for all)', metavar='N')
+        parser.add_option('--durations-file', dest='durationsFile',
+                          default=None, metavar='FILE',
+                          help='Write the time taken by each test to FILE '
+                               'as JSON')
+        parser.add_option('--report', dest='report', default=None,
+                          metavar='FILE', help='Write each result to FILE as '
+                                               'soon as it is known')
+        parser.add_option('--report-format', dest='reportFormat',
+                          default=None, metavar='FORMAT',
+                          help='jsonl (JSON lines, the default) or junit '
+                               '(XML)')
+        parser.add_option('--prioritize', dest='prioritize', default=False,
+                          help='Run recently failed tests first, then the '
+                               'fastest, keeping their history in the top '
+                               'level directory', action='store_true')
         parser.add_option('-s', '--start-directory', dest='start', default='.',
                           help="Directory to start discovery ('.' default)")
         parser.add_option('-p', '--pattern', dest='pattern', default='test*.py',
                           help="Pattern to match tests ('test*.py' default)")
         parser.add_option('-t', '--top-level-directory', dest='top', default=None,
                           help='Top level directory of project (defaults to start directory)')
+        parser.add_option('--cache', dest='cache', default=False,
+                          help='Keep directory listings, and the files each '
+                               'test module uses, in the top level directory',
+                          action='store_true')
+        parser.add_option('--changed', dest='changed', default=False,
+                          help='Only run test modules which have changed, or '
+                               'use modules which have, since their tests '
+                               'passed (implies --cache)', action='store_true')
 
         options, args = parser.parse_args(argv)
         if len(args) > 3:
@@ -202,6 +293,19 @@ class TestProgram(object):
             self.catchbreak = options.catchbreak
         if self.buffer is None:
             self.buffer = options.buffer
+        if self.processes is None and options.processes is not None:
+            self.processes = self._parseNumber('-j', options.processes)
+        if self.durations is None and options.durations is not None:
+            self.durations = self._parseNumber('--durations',
+                                               options.durations)
+        if self.durationsFile is None:
+            self.durationsFile = options.durationsFile
+        if self.report is None:
+            self.report = options.report
+        if self.reportFormat is None and options.reportFormat is not None:
+            self.reportFormat = self._parseFormat(options.reportFormat)
+        if self.prioritize is None:
+            self.prioritize = options.prioritize
         
         if options.verbose:
             self.verbosity = 2
@@ -211,18 +315,43 @@ class TestProgram(object):
         top_level_dir = options.top
 
         loader = Loader()
+        if options.cache or options.changed:
+            loader.cache = self.discoveryCache = cache.DiscoveryCache()
+            loader.changedOnly = options.changed
         self.test = loader.discover(start_dir, pattern, top_level_dir)
+        self.topLevelDir = getattr(loader, '_top_level_dir', None)
+        if options.changed and self.discoveryCache.unchanged:
+            sys.stderr.write('Not running %d tests in %d unchanged modules\n' %
+                             (self.discoveryCache.skippedTests(),
+                              len(self.discoveryCache.unchanged)))
 
     def runTests(self):
         if self.catchbreak:
             installHandler()
+        if self.prioritize:
+            self.history = cache.TestHistory()
+            self.history.open(self.topLevelDir or os.getcwd())
+            self.test = self.history.order(self.test)
         if self.testRunner is None:
-            self.testRunner = runner.TextTestRunner
+            if self.processes is not None and self.processes != 1:
+                self.testRunner = parallel.ParallelTestRunner
+            else:
+                self.testRunner = runner.TextTestRunner
         if isinstance(self.testRunner, (type, types.ClassType)):
+            kwargs = dict(verbosity=self.verbosity, failfast=self.failfast,
+                          buffer=self.buffer)
+            if self.processes is not None and self.processes != 1:
+                kwargs['processes'] = self.processes or None
+            if self.durations is not None:
+                kwargs['durations'] = self.durations
+            if self.durationsFile is not None:
+                kwargs['durationsFile'] = self.durationsFile
+            if self.report is not None:
+                kwargs['report'] = self.report
+                if self.reportFormat is not None:
+                    kwargs['reportFormat'] = self.reportFormat
             try:
-                testRunner = self.testRunner(verbosity=self.verbosity,
-                                             failfast=self.failfast,
-                                             buffer=self.buffer)
+                testRunner = self.testRunner(**kwargs)
             except TypeError:
                 # didn't accept the verbosity, buffer or failfast arguments
                 testRunner = self.testRunner()
@@ -230,6 +359,19 @@ class TestProgram(object):
             # it is assumed to be a TestRunner instance
             testRunner = self.testRunner
         self.result = testRunner.run(self.test)
+        if self.discoveryCache is not None:
+            # Modules only count as passed once all their tests have.
+            if self.result.shouldStop:
+                self.discoveryCache.invalidate()
+            else:
+                self.discoveryCache.invalidate(
+                    [test.id() for test, _ in
+                     self.result.errors + self.result.failures])
+            self.discoveryCache.confirm()
+            self.discoveryCache.save()
+        if self.history is not None:
+            self.history.record(self.result)
+            self.history.save()
         if self.exit:
             sys.exit(not self.result.wasSuccessful())
 
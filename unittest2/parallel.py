@@ -0,0 +1,250 @@
+"""Running tests in parallel across processes"""
+
+import os
+import sys
+import unittest
+from Queue import Empty
+
+from unittest2 import result, runner
+from unittest2.suite import BaseTestSuite, TestSuite, _ErrorHolder
+
+__unittest = True
+
+
+# Suites which just run their tests in order, so they can be opened up
+_PLAIN_RUNS = (TestSuite.run.im_func, BaseTestSuite.run.im_func,
+               unittest.TestSuite.run.im_func)
+
+
+def _flatten(test, tests):
+    """Append the tests in ``test`` to ``tests`` in the order they would run,
+    opening up plain suites. Suites with their own ``run`` are kept whole.
+
+    """
+    if (isinstance(test, unittest.TestSuite) and
+        type(test).run.im_func in _PLAIN_RUNS):
+        for child in test:
+            _flatten(child, tests)
+    else:
+        tests.append(test)
+
+
+def _cases(tests):
+    """Return every test case within ``tests``, including those in suites
+    that were kept whole, so both processes can name them by index."""
+    cases = []
+    for test in tests:
+        try:
+            children = iter(test)
+        except TypeError:
+            cases.append(test)
+        else:
+            cases.extend(_cases(children))
+    return cases
+
+
+def partition(test):
+    """Split ``test`` into a list of lists of tests which can run in separate
+    processes.
+
+    Tests of a class always share a partition so ``setUpClass`` runs once
+    for them, and all the tests of a module share one if the module has a
+    ``setUpModule`` or ``tearDownModule``. Partitions are in the order their
+    first test would run.
+
+    """
+    tests = []
+    _flatten(test, tests)
+    partitions = []
+    byKey = {}
+    for test in tests:
+        if not isinstance(test, unittest.TestCase):
+            # suites of other types and other test-like objects
+            partitions.append([test])
+            continue
+        cls = test.__class__
+        module = sys.modules.get(cls.__module__)
+        if (getattr(module, 'setUpModule', None) is not None or
+            getattr(module, 'tearDownModule', None) is not None):
+            key = cls.__module__
+        else:
+            key = (cls.__module__, cls.__name__, id(cls))
+        group = byKey.get(key)
+        if group is None:
+            group = byKey[key] = []
+            partitions.append(group)
+        group.append(test)
+    return partitions
+
+
+class _RecordingResult(result.TestResult):
+    """Records what happens to each test as picklable events, naming tests by
+    their index in the partition, to be replayed in the parent process."""
+
+    def __init__(self, tests):
+        super(_RecordingResult, self).__init__()
+        self.indexes = dict([(id(test), i)
+                             for i, test in enumerate(_cases(tests))])
+        self.events = []
+
+    def _record(self, name, test, *args):
+        index = self.indexes.get(id(test))
+        if index is None:
+            # an error from setUpClass, setUpModule and so on
+            description = str(test)
+        else:
+            description = None
+        self.events.append((name, index, description) + args)
+
+    def startTest(self, test):
+        super(_RecordingResult, self).startTest(test)
+        self._record('startTest', test)
+
+    def stopTest(self, test):
+        super(_RecordingResult, self).stopTest(test)
+        self._record('stopTest', test)
+
+    def addError(self, test, err):
+        super(_RecordingResult, self).addError(test, err)
+        self._record('addError', test, self.errors[-1][1])
+
+    def addFailure(self, test, err):
+        super(_RecordingResult, self).addFailure(test, err)
+        self._record('addFailure', test, self.failures[-1][1])
+
+    def addSuccess(self, test):
+        super(_RecordingResult, self).addSuccess(test)
+        self._record('addSuccess', test)
+
+    def addSkip(self, test, reason):
+        super(_RecordingResult, self).addSkip(test, reason)
+        self._record('addSkip', test, reason)
+
+    def addExpectedFailure(self, test, err):
+        super(_RecordingResult, self).addExpectedFailure(test, err)
+        self._record('addExpectedFailure', test,
+                     self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super(_RecordingResult, self).addUnexpectedSuccess(test)
+        self._record('addUnexpectedSuccess', test)
+
+    def addDuration(self, test, wall, cpu):
+        super(_RecordingResult, self).addDuration(test, wall, cpu)
+        self._record('addDuration', test, wall, cpu)
+
+    def addBenchmark(self, test, stats):
+        super(_RecordingResult, self).addBenchmark(test, stats)
+        self._record('addBenchmark', test, stats)
+
+
+def _runPartition(tests, failfast, buffer):
+    recording = _RecordingResult(tests)
+    recording.failfast = failfast
+    recording.buffer = buffer
+    TestSuite(tests)(recording)
+    return recording.events
+
+
+def _work(partitions, failfast, buffer, tasks, results):
+    """Run partitions in a worker process until there are none left.
+
+    The worker is forked with ``partitions``, so the test objects themselves
+    are inherited rather than pickled; only indexes and events are sent.
+
+    """
+    for index in iter(tasks.get, None):
+        results.put((index, _runPartition(partitions[index], failfast,
+                                          buffer)))
+
+
+def _nextResult(results, workers):
+    """Wait for the next ``(index, events)`` from a worker."""
+    while True:
+        try:
+            return results.get(timeout=0.1)
+        except Empty:
+            if not [worker for worker in workers if worker.is_alive()]:
+                raise RuntimeError('Test processes exited without running '
+                                   'every test')
+
+
+def _replay(events, tests, result):
+    """Replay the events recorded by a worker on ``result``."""
+    cases = _cases(tests)
+    for event in events:
+        name, index, description = event[:3]
+        if index is None:
+            test = _ErrorHolder(description)
+        else:
+            test = cases[index]
+        method = getattr(result, name, None)
+        if method is None:
+            # addDuration or addBenchmark on a result which doesn't
+            # collect them
+            continue
+        method(test, *event[3:])
+
+
+class ParallelTestRunner(runner.TextTestRunner):
+    """A test runner that runs partitions of the suite (see :func:`partition`)
+    in ``processes`` worker processes, one per CPU by default, and reports
+    their results as :class:`TextTestRunner` does, in suite order.
+
+    Workers are forked from the running process, so on platforms without
+    ``fork`` (or ``multiprocessing``) the tests run serially instead. They
+    aren't daemons, so tests may start processes of their own.
+    """
+
+    def __init__(self, stream=sys.stderr, descriptions=True, verbosity=1,
+                 failfast=False, buffer=False, resultclass=None,
+                 durations=None, durationsFile=None, processes=None,
+                 report=None, reportFormat='jsonl'):
+        super(ParallelTestRunner, self).__init__(stream, descriptions,
+            verbosity, failfast, buffer, resultclass, durations, durationsFile,
+            report, reportFormat)
+        self.processes = processes
+
+    def _runTests(self, test, result):
+        try:
+            import multiprocessing
+        except ImportError:
+            multiprocessing = None
+        partitions = partition(test)
+        if (multiprocessing is None or not hasattr(os, 'fork') or
+            len(partitions) < 2 or self.processes == 1):
+            return super(ParallelTestRunner, self)._runTests(test, result)
+
+        processes = min(self.processes or multiprocessing.cpu_count(),
+                        len(partitions))
+        tasks = multiprocessing.Queue()
+        results = multiprocessing.Queue()
+        for index in range(len(partitions)):
+            tasks.put(index)
+        for _ in range(processes):
+            tasks.put(None)
+
+        workers = []
+        stopped = True
+        try:
+            for _ in range(processes):
+                worker = multiprocessing.Process(target=_work,
+                    args=(partitions, self.failfast, self.buffer,
+                          tasks, results))
+                worker.start()
+                workers.append(worker)
+            finished = {}
+            for index, tests in enumerate(partitions):
+                while index not in finished:
+                    finished.update([_nextResult(results, workers)])
+                _replay(finished.pop(index), tests, result)
+                if result.shouldStop:
+                    # failfast or ctrl-C
+                    break
+            else:
+                stopped = False
+        finally:
+            for worker in workers:
+                if stopped:
+                    worker.terminate()
+                worker.join()
@@ -0,0 +1,249 @@
+"""Writing test results as they happen, as JSON lines or JUnit XML"""
+
+import re
+import time
+
+try:
+    import json
+except ImportError:
+    # Python 2.4 and 2.5
+    import simplejson as json
+
+from xml.sax.saxutils import escape, quoteattr
+
+from unittest2.runner import TextTestResult
+
+__unittest = True
+
+# Characters XML 1.0 can't hold, even escaped
+_XML_INVALID = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+class JSONLinesReport(object):
+    """Writes a JSON object per line for each test as it finishes, with its
+    'id', 'outcome', 'time' and 'traceback' or 'reason' if it has one, and a
+    last line with the 'summary' of the run."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def startRun(self):
+        pass
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, sort_keys=True) + '\n')
+        self.stream.flush()
+
+    def stopRun(self, summary):
+        self.write({'summary': summary})
+
+
+class JUnitReport(object):
+    """Writes a JUnit XML ``<testsuite>`` with a ``<testcase>`` for each test
+    as it finishes.
+
+    As the counts aren't known until the end, the ``<testsuite>`` has none;
+    readers of these reports count the test cases themselves.
+    """
+
+    # outcome -> (element, message) for tests which didn't pass
+    ELEMENTS = {
+        'error': ('error', None),
+        'failure': ('failure', None),
+        'skip': ('skipped', None),
+        'unexpectedSuccess': ('failure', 'Unexpected success'),
+    }
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def startRun(self):
+        self.stream.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                          '<testsuite name="unittest2">\n')
+        self.stream.flush()
+
+    def write(self, record):
+        classname, name = ([''] + record['id'].rsplit('.', 1))[-2:]
+        lines = ['<testcase classname=%s name=%s time="%.3f"' %
+                 (_attribute(classname), _attribute(name),
+                  record.get('time', 0.0))]
+        element, message = self.ELEMENTS.get(record['outcome'],
+                                              (None, None))
+        if element is None:
+            lines.append('/>\n')
+        else:
+            text = record.get('traceback') or ''
+            if message is None:
+                message = record.get('reason') or _lastLine(text)
+            lines.append('>\n<%s message=%s' % (element, _attribute(message)))
+            if text:
+                lines.append('>%s</%s>\n' % (escape(_text(text)), element))
+            else:
+                lines.append('/>\n')
+            lines.append('</testcase>\n')
+        self.stream.write(''.join(lines))
+        self.stream.flush()
+
+    def stopRun(self, summary):
+        self.stream.write('</testsuite>\n')
+        self.stream.flush()
+
+
+def _text(text):
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'replace')
+    return _XML_INVALID.sub(u'?', text).encode('utf-8')
+
+
+def _attribute(text):
+    return quoteattr(_text(text))
+
+
+def _lastLine(text):
+    lines = text.strip().splitlines()
+    return lines and lines[-1] or ''
+
+
+#: The formats results can be written in, by name
+FORMATS = {
+    'jsonl': JSONLinesReport,
+    'junit': JUnitReport,
+}
+
+
+class _Timed(object):
+    """Stands in for a test or fixture in ``durations``."""
+
+    __slots__ = ('_id', '_description')
+
+    def __init__(self, test):
+        self._id = test.id()
+        self._description = str(test)
+
+    def id(self):
+        return self._id
+
+    def __str__(self):
+        return self._description
+
+
+class StreamingTestResult(TextTestResult):
+    """A :class:`TextTestResult` which writes each result to ``report`` (a
+    file name or a stream) in ``reportFormat`` as soon as the test finishes,
+    instead of keeping it.
+
+    Tracebacks are formatted once, to be written to the report and to the
+    text stream straight away, and aren't kept: ``errors``, ``failures`` and
+    ``expectedFailures`` hold ``(test, None)``. ``durations`` holds just the
+    id and description of each test and fixture with its times, rather than
+    the test and whatever it refers to, so that ``--durations`` and
+    ``--prioritize`` still work.
+    """
+
+    def __init__(self, stream, descriptions, verbosity, report,
+                 reportFormat='jsonl'):
+        super(StreamingTestResult, self).__init__(stream, descriptions,
+                                                  verbosity)
+        if reportFormat not in FORMATS:
+            raise ValueError('reportFormat must be one of %s, not %r' %
+                             (', '.join(sorted(FORMATS)), reportFormat))
+        self._reportFile = None
+        if isinstance(report, basestring):
+            report = self._reportFile = open(report, 'w')
+        self.report = FORMATS[reportFormat](report)
+        self._record = None
+        self._started = None
+
+    def startTestRun(self):
+        super(StreamingTestResult, self).startTestRun()
+        self._started = time.time()
+        self.report.startRun()
+
+    def startTest(self, test):
+        super(StreamingTestResult, self).startTest(test)
+        self._record = {'id': test.id()}
+
+    def stopTest(self, test):
+        super(StreamingTestResult, self).stopTest(test)
+        record, self._record = self._record, None
+        if record is not None and 'outcome' in record:
+            self.report.write(record)
+
+    def _finish(self, test, outcome, traceback=None, reason=None):
+        record = self._record
+        if record is None or record['id'] != test.id():
+            # an error in a class or module fixture, outside any test
+            record = {'id': test.id()}
+        record['outcome'] = outcome
+        if traceback is not None:
+            record['traceback'] = traceback
+        if reason is not None:
+            record['reason'] = reason
+        if record is not self._record:
+            self.report.write(record)
+
+    def _show(self, flavour, test, traceback):
+        if self.dots:
+            self.stream.writeln()
+        self.printErrorList(flavour, [(test, traceback)])
+
+    def addError(self, test, err):
+        super(StreamingTestResult, self).addError(test, err)
+        test, traceback = self.errors.pop()
+        self.errors.append((test, None))
+        self._show('ERROR', test, traceback)
+        self._finish(test, 'error', traceback)
+
+    def addFailure(self, test, err):
+        super(StreamingTestResult, self).addFailure(test, err)
+        test, traceback = self.failures.pop()
+        self.failures.append((test, None))
+        self._show('FAIL', test, traceback)
+        self._finish(test, 'failure', traceback)
+
+    def addSuccess(self, test):
+        super(StreamingTestResult, self).addSuccess(test)
+        self._finish(test, 'success')
+
+    def addSkip(self, test, reason):
+        super(StreamingTestResult, self).addSkip(test, reason)
+        self._finish(test, 'skip', reason=reason)
+
+    def addExpectedFailure(self, test, err):
+        super(StreamingTestResult, self).addExpectedFailure(test, err)
+        test, traceback = self.expectedFailures.pop()
+        self.expectedFailures.append((test, None))
+        self._finish(test, 'expectedFailure', traceback)
+
+    def addUnexpectedSuccess(self, test):
+        super(StreamingTestResult, self).addUnexpectedSuccess(test)
+        self._finish(test, 'unexpectedSuccess')
+
+    def addDuration(self, test, wall, cpu):
+        self.durations.append((_Timed(test), wall, cpu))
+        if self._testStarted is not None and self._testStarted[0] is test:
+            self._testStarted = None
+        if self._record is not None and self._record['id'] == test.id():
+            self._record['time'] = wall
+            self._record['cpu'] = cpu
+
+    def printErrors(self):
+        # they were shown as they happened
+        if self.dots or self.showAll:
+            self.stream.writeln()
+
+    def stopTestRun(self):
+        super(StreamingTestResult, self).stopTestRun()
+        summary = {'testsRun': self.testsRun,
+                   'errors': len(self.errors),
+                   'failures': len(self.failures),
+                   'skipped': len(self.skipped),
+                   'expectedFailures': len(self.expectedFailures),
+                   'unexpectedSuccesses': len(self.unexpectedSuccesses),
+                   'successful': self.wasSuccessful()}
+        if self._started is not None:
+            summary['time'] = time.time() - self._started
+        self.report.stopRun(summary)
+        if self._reportFile is not None:
+            self._reportFile.close()
+            self._reportFile = None
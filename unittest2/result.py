@@ -33,9 +33,16 @@ class TestResult(unittest.TestResult):
     failures and errors that occurred among those test runs. The collections
     contain tuples of (testcase, exceptioninfo), where exceptioninfo is the
     formatted traceback of the error that occurred.
+
+    The wall clock and CPU time each test took, from startTest to stopTest,
+    and the time taken by class and module fixtures are collected in
+    ``durations`` as (test, wall, cpu) tuples, and the statistics of each
+    benchmark (see :class:`BenchmarkCase`) in ``benchmarks`` as (test,
+    stats) tuples.
     """
     _previousTestClass = None
     _moduleSetUpFailed = False
+    _testStarted = None
     
     def __init__(self):
         self.failfast = False
@@ -52,11 +59,15 @@ class TestResult(unittest.TestResult):
         self._original_stdout = sys.stdout
         self._original_stderr = sys.stderr
         self._mirrorOutput = False
+        self.durations = []
+        self._testStarted = None
+        self.benchmarks = []
     
     def startTest(self, test):
         "Called when the given test is about to be run"
         self.testsRun += 1
         self._mirrorOutput = False
+        self._testStarted = (test,) + util.clock()
         if self.buffer:
             if self._stderr_buffer is None:
                 self._stderr_buffer = StringIO()
@@ -72,6 +83,10 @@ class TestResult(unittest.TestResult):
 
     def stopTest(self, test):
         """Called when the given test has been run"""
+        started = self._testStarted
+        if started is not None and started[0] is test:
+            wall, cpu = util.clock()
+            self.addDuration(test, wall - started[1], cpu - started[2])
         if self.buffer:
             if self._mirrorOutput:
                 output = sys.stdout.getvalue()
@@ -119,6 +134,23 @@ class TestResult(unittest.TestResult):
         "Called when a test has completed successfully"
         pass
 
+    def addDuration(self, test, wall, cpu):
+        """Called with the wall clock and CPU time, in seconds, that a test
+        or a class or module fixture took.
+
+        A duration added while a test is running replaces the one that would
+        be measured for it, as when the test really ran in another process.
+        """
+        self.durations.append((test, wall, cpu))
+        if self._testStarted is not None and self._testStarted[0] is test:
+            self._testStarted = None
+
+    def addBenchmark(self, test, stats):
+        """Called with the statistics of a benchmark, a dict of its 'min',
+        'median' and 'p95' time per call in seconds and the 'number' of
+        calls in each of 'repeat' samples."""
+        self.benchmarks.append((test, stats))
+
     def addSkip(self, test, reason):
         """Called when a test is skipped."""
         self.skipped.append((test, reason))
@@ -142,7 +174,13 @@ class TestResult(unittest.TestResult):
         self.shouldStop = True
 
     def _exc_info_to_string(self, err, test):
-        """Converts a sys.exc_info()-style tuple of values into a string."""
+        """Converts a sys.exc_info()-style tuple of values into a string.
+
+        An error already formatted as a string, as the parallel runner's
+        workers send back, is kept as it is.
+        """
+        if isinstance(err, basestring):
+            return err
         exctype, value, tb = err
         # Skip test runner traceback levels
         while tb and self._is_relevant_tb_level(tb):
@@ -5,6 +5,7 @@ import time
 import unittest
 
 from unittest2 import result
+from unittest2.benchmark import formatTime
 
 try:
     from unittest2.signals import registerResult
@@ -131,20 +132,45 @@ class TextTestRunner(unittest.TextTestRunner):
 
     It prints out the names of tests as they are run, errors as they
     occur, and a summary of the results at the end of the test run.
+
+    If ``durations`` is given, the slowest that many tests and fixtures (all
+    of them for 0) are listed before the summary, and if ``durationsFile``
+    is given the time taken by every test and fixture is written to it as
+    JSON. The statistics of any benchmarks that ran are listed too.
+
+    If ``report`` (a file name or a stream) is given, each result is written
+    to it as soon as its test finishes, in ``reportFormat`` ('jsonl' for
+    JSON lines or 'junit' for JUnit XML), by a
+    :class:`~unittest2.reporter.StreamingTestResult`; a ``resultclass`` can't
+    be used with it.
     """
     resultclass = TextTestResult
 
     def __init__(self, stream=sys.stderr, descriptions=True, verbosity=1,
-                    failfast=False, buffer=False, resultclass=None):
+                    failfast=False, buffer=False, resultclass=None,
+                    durations=None, durationsFile=None, report=None,
+                    reportFormat='jsonl'):
         self.stream = _WritelnDecorator(stream)
         self.descriptions = descriptions
         self.verbosity = verbosity
         self.failfast = failfast
         self.buffer = buffer
+        self.durations = durations
+        self.durationsFile = durationsFile
+        self.report = report
+        self.reportFormat = reportFormat
         if resultclass is not None:
             self.resultclass = resultclass
+        if report is not None and (resultclass is not None or
+                                   self.resultclass is not TextTestResult):
+            raise ValueError('resultclass can not be used with report')
 
     def _makeResult(self):
+        if self.report is not None:
+            from unittest2.reporter import StreamingTestResult
+            return StreamingTestResult(self.stream, self.descriptions,
+                                       self.verbosity, self.report,
+                                       self.reportFormat)
         return self.resultclass(self.stream, self.descriptions, self.verbosity)
 
     def run(self, test):
@@ -159,7 +185,7 @@ class TextTestRunner(unittest.TextTestRunner):
         if startTestRun is not None:
             startTestRun()
         try:
-            test(result)
+            self._runTests(test, result)
         finally:
             stopTestRun = getattr(result, 'stopTestRun', None)
             if stopTestRun is not None:
@@ -168,6 +194,15 @@ class TextTestRunner(unittest.TextTestRunner):
                 result.printErrors()
         stopTime = time.time()
         timeTaken = stopTime - startTime
+        durations = getattr(result, 'durations', None)
+        if durations is not None:
+            if self.durations is not None:
+                self._printDurations(durations)
+            if self.durationsFile is not None:
+                self._writeDurations(durations, startTime, timeTaken)
+        benchmarks = getattr(result, 'benchmarks', None)
+        if benchmarks:
+            self._printBenchmarks(benchmarks)
         if hasattr(result, 'separator2'):
             self.stream.writeln(result.separator2)
         run = result.testsRun
@@ -204,3 +239,39 @@ class TextTestRunner(unittest.TextTestRunner):
         else:
             self.stream.write("\n")
         return result
+
+    def _runTests(self, test, result):
+        test(result)
+
+    def _printDurations(self, durations):
+        slowest = sorted(durations, key=lambda d: d[1], reverse=True)
+        if self.durations:
+            slowest = slowest[:self.durations]
+        self.stream.writeln("Slowest durations (wall, cpu):")
+        for test, wall, cpu in slowest:
+            self.stream.writeln("%8.3fs %8.3fs  %s" % (wall, cpu, test))
+        self.stream.writeln()
+
+    def _printBenchmarks(self, benchmarks):
+        self.stream.writeln("Benchmarks (min, median, p95 per call):")
+        for test, stats in benchmarks:
+            self.stream.writeln("%10s %10s %10s  %s" %
+                                (formatTime(stats['min']),
+                                 formatTime(stats['median']),
+                                 formatTime(stats['p95']), test))
+        self.stream.writeln()
+
+    def _writeDurations(self, durations, startTime, timeTaken):
+        try:
+            import json
+        except ImportError:
+            # Python 2.4 and 2.5
+            import simplejson as json
+        tests = [{'id': test.id(), 'wall': wall, 'cpu': cpu}
+                 for test, wall, cpu in durations]
+        f = open(self.durationsFile, 'w')
+        try:
+            json.dump({'started': startTime, 'timeTaken': timeTaken,
+                       'durations': tests}, f, indent=2, sort_keys=True)
+        finally:
+            f.close()
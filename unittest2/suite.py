@@ -2,7 +2,7 @@
 
 import sys
 import unittest
-from unittest2 import case, util
+from unittest2 import case, fixtures, util
 
 __unittest = True
 
@@ -84,6 +84,7 @@ class TestSuite(BaseTestSuite):
         self._wrapped_run(result)
         self._tearDownPreviousClass(None, result)
         self._handleModuleTearDown(result)
+        self._releaseFixtures(result, 'session', None)
         return result
 
     def debug(self):
@@ -92,6 +93,7 @@ class TestSuite(BaseTestSuite):
         self._wrapped_run(debug, True)
         self._tearDownPreviousClass(None, debug)
         self._handleModuleTearDown(debug)
+        self._releaseFixtures(debug, 'session', None)
 
     ################################
     # private methods
@@ -136,15 +138,17 @@ class TestSuite(BaseTestSuite):
             
         setUpClass = getattr(currentClass, 'setUpClass', None)
         if setUpClass is not None:
+            className = util.strclass(currentClass)
+            errorName = 'setUpClass (%s)' % className
+            started = util.clock()
             try:
                 setUpClass()
             except Exception, e:
                 if isinstance(result, _DebugResult):
                     raise
                 currentClass._classSetupFailed = True
-                className = util.strclass(currentClass)
-                errorName = 'setUpClass (%s)' % className
                 self._addClassOrModuleLevelException(result, e, errorName)
+            self._addFixtureDuration(result, errorName, started)
     
     def _get_previous_module(self, result):
         previousModule = None
@@ -170,14 +174,16 @@ class TestSuite(BaseTestSuite):
             return
         setUpModule = getattr(module, 'setUpModule', None)
         if setUpModule is not None:
+            errorName = 'setUpModule (%s)' % currentModule
+            started = util.clock()
             try:
                 setUpModule()
             except Exception, e:
                 if isinstance(result, _DebugResult):
                     raise
                 result._moduleSetUpFailed = True
-                errorName = 'setUpModule (%s)' % currentModule
                 self._addClassOrModuleLevelException(result, e, errorName)
+            self._addFixtureDuration(result, errorName, started)
 
     def _addClassOrModuleLevelException(self, result, exception, errorName):
         error = _ErrorHolder(errorName)
@@ -186,11 +192,29 @@ class TestSuite(BaseTestSuite):
             addSkip(error, str(exception))
         else:
             result.addError(error, sys.exc_info())
+
+    def _releaseFixtures(self, result, scope, key):
+        for fixture in fixtures.liveFixtures(scope, key):
+            try:
+                fixture.release(key)
+            except Exception, e:
+                if isinstance(result, _DebugResult):
+                    raise
+                errorName = 'releaseFixture (%s)' % fixture.name
+                self._addClassOrModuleLevelException(result, e, errorName)
+
+    def _addFixtureDuration(self, result, name, started):
+        addDuration = getattr(result, 'addDuration', None)
+        if addDuration is not None:
+            wall, cpu = util.clock()
+            addDuration(_ErrorHolder(name), wall - started[0],
+                        cpu - started[1])
     
     def _handleModuleTearDown(self, result):
         previousModule = self._get_previous_module(result)
         if previousModule is None:
             return
+        self._releaseFixtures(result, 'module', previousModule)
         if result._moduleSetUpFailed:
             return
             
@@ -201,19 +225,22 @@ class TestSuite(BaseTestSuite):
 
         tearDownModule = getattr(module, 'tearDownModule', None)
         if tearDownModule is not None:
+            errorName = 'tearDownModule (%s)' % previousModule
+            started = util.clock()
             try:
                 tearDownModule()
             except Exception, e:
                 if isinstance(result, _DebugResult):
                     raise
-                errorName = 'tearDownModule (%s)' % previousModule
                 self._addClassOrModuleLevelException(result, e, errorName)
+            self._addFixtureDuration(result, errorName, started)
     
     def _tearDownPreviousClass(self, test, result):
         previousClass = getattr(result, '_previousTestClass', None)
         currentClass = test.__class__
         if currentClass == previousClass:
             return
+        self._releaseFixtures(result, 'class', previousClass)
         if getattr(previousClass, '_classSetupFailed', False):
             return
         if getattr(result, '_moduleSetUpFailed', False):
@@ -223,14 +250,16 @@ class TestSuite(BaseTestSuite):
         
         tearDownClass = getattr(previousClass, 'tearDownClass', None)
         if tearDownClass is not None:
+            className = util.strclass(previousClass)
+            errorName = 'tearDownClass (%s)' % className
+            started = util.clock()
             try:
                 tearDownClass()
             except Exception, e:
                 if isinstance(result, _DebugResult):
                     raise
-                className = util.strclass(previousClass)
-                errorName = 'tearDownClass (%s)' % className
                 self._addClassOrModuleLevelException(result, e, errorName)
+            self._addFixtureDuration(result, errorName, started)
 
 
 class _ErrorHolder(object):
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+
+from cStringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    # Python 2.4 and 2.5
+    import simplejson as json
+
+import unittest2
+from unittest2 import benchmark
+
+
+class Test_summarize(unittest2.TestCase):
+
+    def test_statistics(self):
+        stats = benchmark.summarize([float(t) for t in range(20, 0, -1)])
+        self.assertEqual(stats, {'min': 1.0, 'median': 10.5, 'p95': 19.0})
+        stats = benchmark.summarize([3.0, 1.0, 2.0])
+        self.assertEqual(stats, {'min': 1.0, 'median': 2.0, 'p95': 3.0})
+
+    def test_formatTime(self):
+        self.assertEqual(benchmark.formatTime(2.5), '2.500s')
+        self.assertEqual(benchmark.formatTime(0.0025), '2.500ms')
+        self.assertEqual(benchmark.formatTime(0.0000025), '2.500us')
+        self.assertEqual(benchmark.formatTime(0.0000000025), '2.5ns')
+
+
+class Test_BenchmarkCase(unittest2.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.baselineFile = os.path.join(self.dir, 'baseline.json')
+        self.addCleanup(benchmark._baselines.clear)
+        calls = self.calls = []
+
+        class Bench(unittest2.BenchmarkCase):
+            # each call takes perCall seconds as far as the test can tell
+            perCall = 0.001
+            repeat = 5
+            def _time(self, method, number):
+                for _ in xrange(number):
+                    method()
+                return number * self.perCall
+            def setUp(self):
+                calls.append('setUp')
+            def test_body(self):
+                calls.append('body')
+        self.Bench = Bench
+
+    def run_test(self):
+        result = unittest2.TestResult()
+        unittest2.TestLoader().loadTestsFromTestCase(self.Bench).run(result)
+        return result
+
+    def test_runs_repeatedly(self):
+        result = self.run_test()
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(self.calls.count('setUp'), 1)
+        # warm-up, calibration to 12 calls, then 5 samples of 12
+        self.assertEqual(self.calls.count('body'), 1 + 1 + 12 + 5 * 12)
+        test, stats = result.benchmarks[0]
+        self.assertEqual(test.id(), self.Bench('test_body').id())
+        self.assertEqual(stats['number'], 12)
+        self.assertEqual(stats['repeat'], 5)
+        for name in benchmark.STATISTICS:
+            self.assertAlmostEqual(stats[name], 0.001)
+
+    def test_baseline(self):
+        self.Bench.baselineFile = self.baselineFile
+        self.assertTrue(self.run_test().wasSuccessful())
+        f = open(self.baselineFile)
+        try:
+            stored = json.load(f)
+        finally:
+            f.close()
+        testId = self.Bench('test_body').id()
+        self.assertEqual(sorted(stored), [testId])
+        self.assertAlmostEqual(stored[testId]['median'], 0.001)
+
+        # a little slower is allowed
+        self.Bench.perCall = 0.0014
+        self.assertTrue(self.run_test().wasSuccessful())
+
+        self.Bench.perCall = 0.002
+        result = self.run_test()
+        self.assertEqual(len(result.failures), 1)
+        self.assertIn('median 2.000ms per call is 100% slower than the '
+                      'baseline 1.000ms (at most 50% allowed)',
+                      result.failures[0][1])
+
+        self.Bench.maxRegression = 2.0
+        self.assertTrue(self.run_test().wasSuccessful())
+
+    def test_baseline_relative_to_module(self):
+        self.Bench.baselineFile = 'baseline.json'
+        baseline = self.Bench('test_body').getBaseline()
+        self.assertEqual(baseline.path,
+                         os.path.join(os.path.dirname(os.path.abspath(
+                             __file__)), 'baseline.json'))
+
+    def test_failing_body(self):
+        class Bench(unittest2.BenchmarkCase):
+            def test_body(self):
+                self.fail('broken')
+        result = unittest2.TestResult()
+        Bench('test_body').run(result)
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(result.benchmarks, [])
+
+    def test_reported(self):
+        stream = StringIO()
+        runner = unittest2.TextTestRunner(stream=stream)
+        runner.run(unittest2.TestLoader().loadTestsFromTestCase(self.Bench))
+        output = stream.getvalue()
+        self.assertIn('Benchmarks (min, median, p95 per call):\n'
+                      '   1.000ms    1.000ms    1.000ms  test_body', output)
+
+
+if __name__ == '__main__':
+    unittest2.main()
@@ -0,0 +1,315 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from cStringIO import StringIO
+
+import unittest2
+from unittest2.cache import CACHE_FILE, HISTORY_FILE, RECENT_RUNS
+from unittest2.cache import DiscoveryCache, TestHistory
+
+
+TEST_MODULE = """\
+import unittest2
+import %(helper)s
+
+class Test(unittest2.TestCase):
+    def test_helper(self):
+        self.assertTrue(%(helper)s.%(name)s)
+"""
+
+
+class TestDiscoveryCache(unittest2.TestCase):
+
+    def setUp(self):
+        self.top = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.top)
+        self.writeModule('cached_helper.py', 'OK = True\n')
+        self.writeModule('test_cached_a.py',
+                         TEST_MODULE % {'helper': 'cached_helper',
+                                        'name': 'OK'})
+        self.writeModule('test_cached_b.py',
+                         TEST_MODULE % {'helper': 'os', 'name': 'sep'})
+        self.addCleanup(self.forgetModules)
+
+    def writeModule(self, name, source):
+        path = os.path.join(self.top, name)
+        f = open(path, 'w')
+        try:
+            f.write(source)
+        finally:
+            f.close()
+        # make it look older, so it counts as changed when written again
+        old = time.time() - 60
+        os.utime(path, (old, old))
+        self.settle(old)
+        for compiled in (path + 'c', path + 'o'):
+            if os.path.exists(compiled):
+                os.remove(compiled)
+
+    def settle(self, old=None):
+        # set the directory's mtime back, as if compiling the modules and
+        # writing the cache hadn't changed it
+        if old is not None:
+            self.dirTime = old
+        os.utime(self.top, (self.dirTime, self.dirTime))
+
+    def forgetModules(self):
+        for name in ('cached_helper', 'test_cached_a', 'test_cached_b'):
+            sys.modules.pop(name, None)
+        if self.top in sys.path:
+            sys.path.remove(self.top)
+
+    def discover(self, changedOnly=True):
+        self.forgetModules()
+        loader = unittest2.TestLoader()
+        loader.cache = DiscoveryCache()
+        loader.changedOnly = changedOnly
+        suite = loader.discover(self.top, 'test*.py', self.top)
+        return loader.cache, sorted([test.id() for module in suite
+                                     for case in module for test in case])
+
+    def passed(self, cache):
+        # as the program does once the tests have run and passed
+        cache.invalidate([])
+        cache.confirm()
+        cache.save()
+
+    def test_records_modules(self):
+        cache, ids = self.discover()
+        self.assertEqual(ids, ['test_cached_a.Test.test_helper',
+                               'test_cached_b.Test.test_helper'])
+        self.assertTrue(os.path.exists(os.path.join(self.top, CACHE_FILE)))
+        self.assertEqual(cache.modules, {})
+        self.passed(cache)
+        entry = cache.modules['test_cached_a']
+        self.assertEqual(entry['tests'], ['test_cached_a.Test.test_helper'])
+        self.assertEqual(sorted(entry['stamps']),
+                         [os.path.join(self.top, 'cached_helper.py'),
+                          os.path.join(self.top, 'test_cached_a.py')])
+        self.assertEqual(sorted(cache.directories[self.top][1]),
+                         [('cached_helper.py', False),
+                          ('test_cached_a.py', False),
+                          ('test_cached_b.py', False)])
+
+    def test_changed_only(self):
+        self.passed(self.discover()[0])
+        cache, ids = self.discover()
+        self.assertEqual(ids, [])
+        self.assertEqual(sorted(cache.unchanged),
+                         ['test_cached_a', 'test_cached_b'])
+        self.assertEqual(cache.skippedTests(), 2)
+
+        # a module the tests use has changed
+        self.writeModule('cached_helper.py', 'OK = 1\n')
+        cache, ids = self.discover()
+        self.assertEqual(ids, ['test_cached_a.Test.test_helper'])
+        self.passed(cache)
+
+        # without changedOnly every module is loaded
+        cache, ids = self.discover(changedOnly=False)
+        self.assertEqual(len(ids), 2)
+
+    def test_unchanged_directory_not_listed(self):
+        self.discover()
+        self.settle()
+        original_listdir = os.listdir
+        def restore_listdir():
+            os.listdir = original_listdir
+        self.addCleanup(restore_listdir)
+        def listdir(path):
+            self.fail('listed %r' % path)
+        os.listdir = listdir
+        cache, ids = self.discover(changedOnly=False)
+        self.assertEqual(len(ids), 2)
+
+    def test_invalidate(self):
+        cache, ids = self.discover()
+        cache.invalidate(['test_cached_a.Test.test_helper',
+                          'setUpClass (test_cached_b.Test)'])
+        cache.confirm()
+        cache.save()
+        cache, ids = self.discover()
+        self.assertEqual(len(ids), 2)
+
+        cache.invalidate()
+        cache.confirm()
+        cache.save()
+        cache, ids = self.discover()
+        self.assertEqual(len(ids), 2)
+
+    def test_not_run(self):
+        # discovery alone doesn't count the modules as passed
+        self.discover()
+        cache, ids = self.discover()
+        self.assertEqual(len(ids), 2)
+
+    def test_data_files(self):
+        self.writeModule('test_data.json', '[]')
+        self.writeModule('test_cached_a.py',
+                         TEST_MODULE % {'helper': 'cached_helper',
+                                        'name': 'OK'} +
+                         "test_data_files = ['test_data.json']\n")
+        self.passed(self.discover()[0])
+        self.writeModule('test_data.json', '[1]')
+        cache, ids = self.discover()
+        self.assertEqual(ids, ['test_cached_a.Test.test_helper'])
+
+    def test_program_reruns_failed_modules(self):
+        self.writeModule('cached_helper.py', 'OK = False\n')
+        program = object.__new__(unittest2.TestProgram)
+        program.progName = 'test'
+        program.exit = False
+        program.testRunner = unittest2.TextTestRunner(stream=StringIO())
+        self.forgetModules()
+        program._do_discovery(['-s', self.top, '--changed'])
+        program.runTests()
+        self.assertFalse(program.result.wasSuccessful())
+
+        cache, ids = self.discover()
+        self.assertEqual(ids, ['test_cached_a.Test.test_helper'])
+
+    def test_program_interrupted(self):
+        class Interrupting(object):
+            def run(self, test):
+                raise KeyboardInterrupt
+        program = object.__new__(unittest2.TestProgram)
+        program.progName = 'test'
+        program.exit = False
+        program.testRunner = Interrupting()
+        self.forgetModules()
+        program._do_discovery(['-s', self.top, '--changed'])
+        self.assertRaises(KeyboardInterrupt, program.runTests)
+
+        cache, ids = self.discover()
+        self.assertEqual(len(ids), 2)
+
+
+class TestTestHistory(unittest2.TestCase):
+
+    def setUp(self):
+        self.top = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.top)
+
+    def ids(self, suite):
+        return ['.'.join(test.id().split('.')[-2:]) for test in suite]
+
+    def test_order(self):
+        class Foo(unittest2.TestCase):
+            def test_slow(self): pass
+            def test_fast(self): pass
+            def test_new(self): pass
+        class Bar(unittest2.TestCase):
+            def test_failed(self): pass
+            def test_long_ago(self): pass
+        class Baz(unittest2.TestCase):
+            def test_1(self): pass
+
+        history = TestHistory()
+        history.runs = 10
+        def entry(test, **values):
+            history.tests[test.id()] = values
+        entry(Foo('test_slow'), time=2.0)
+        entry(Foo('test_fast'), time=0.5)
+        entry(Bar('test_failed'), time=5.0, failed=8)
+        entry(Bar('test_long_ago'), time=0.1, failed=10 - RECENT_RUNS)
+        entry(Baz('test_1'), time=1.0)
+
+        suite = unittest2.TestSuite([
+            unittest2.TestSuite([Foo('test_slow'), Foo('test_fast'),
+                                 Foo('test_new')]),
+            unittest2.TestSuite([Bar('test_long_ago'), Bar('test_failed')]),
+            unittest2.TestSuite([Baz('test_1')])])
+        self.assertEqual(self.ids(history.order(suite)),
+                         ['Bar.test_failed', 'Bar.test_long_ago',
+                          'Foo.test_new', 'Foo.test_fast', 'Foo.test_slow',
+                          'Baz.test_1'])
+
+        # without a history the order is kept
+        self.assertEqual(self.ids(TestHistory().order(suite)),
+                         ['Foo.test_slow', 'Foo.test_fast', 'Foo.test_new',
+                          'Bar.test_long_ago', 'Bar.test_failed',
+                          'Baz.test_1'])
+
+    def test_module_fixtures_kept_together(self):
+        module = types.ModuleType('history_module')
+        module.setUpModule = lambda: None
+        sys.modules['history_module'] = module
+        self.addCleanup(sys.modules.pop, 'history_module')
+
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+        class Baz(unittest2.TestCase):
+            def test_1(self): pass
+        Foo.__module__ = Bar.__module__ = 'history_module'
+
+        history = TestHistory()
+        history.runs = 1
+        history.tests = {Bar('test_1').id(): {'failed': 1},
+                         Foo('test_1').id(): {'time': 1.0},
+                         Baz('test_1').id(): {'time': 0.5}}
+        suite = unittest2.TestSuite([Baz('test_1'), Foo('test_1'),
+                                     Bar('test_1')])
+        self.assertEqual([test.id() for test in history.order(suite)],
+                         [Bar('test_1').id(), Foo('test_1').id(),
+                          Baz('test_1').id()])
+
+    def test_record(self):
+        class Foo(unittest2.TestCase):
+            def test_pass(self): pass
+            def test_fail(self): self.fail()
+        class Bar(unittest2.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                raise ValueError
+            def test_1(self): pass
+
+        history = TestHistory()
+        history.open(self.top)
+        result = unittest2.TestResult()
+        unittest2.TestSuite([Foo('test_pass'), Foo('test_fail'),
+                             Bar('test_1')]).run(result)
+        history.record(result)
+        history.save()
+
+        history = TestHistory()
+        history.open(self.top)
+        self.assertEqual(history.runs, 1)
+        tests = history.tests
+        self.assertEqual(sorted(tests[Foo('test_pass').id()]), ['time'])
+        self.assertEqual(tests[Foo('test_fail').id()]['failed'], 1)
+        # the class fixture's error counts against its class
+        self.assertEqual(tests['%s.Bar' % __name__]['failed'], 1)
+        self.assertNotIn(Bar('test_1').id(), tests)
+
+    def test_program_runs_failed_tests_first(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+            def test_2(self): self.fail()
+
+        def run():
+            program = object.__new__(unittest2.TestProgram)
+            program.exit = False
+            program.failfast = True
+            program.prioritize = True
+            program.topLevelDir = self.top
+            program.testRunner = unittest2.TextTestRunner(stream=StringIO(),
+                                                          failfast=True)
+            program.test = unittest2.TestSuite([Foo('test_1'),
+                                                Foo('test_2')])
+            program.runTests()
+            return program.result
+
+        self.assertEqual(run().testsRun, 2)
+        self.assertTrue(os.path.exists(os.path.join(self.top, HISTORY_FILE)))
+        # the failure comes first next time, and stops the run
+        self.assertEqual(run().testsRun, 1)
+
+
+if __name__ == '__main__':
+    unittest2.main()
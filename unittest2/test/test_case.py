@@ -940,6 +940,51 @@ test case
         self.assertTrue(len(msg) > len(diff))
         self.assertNotIn(omitted, msg)
 
+    def testLongDiffsSkipped(self):
+        # Diffs which are sure to be longer than maxDiff aren't made; the
+        # first differences are listed instead.
+        self.assertEqual(self.maxDiff, 80*8)
+        seq1 = range(1000)
+        seq2 = range(1000)
+        seq2[5] = 'five'
+        seq2[500:] = []
+        def fail(assertion, first, second):
+            try:
+                assertion(first, second)
+            except self.failureException, e:
+                return e.args[0]
+            self.fail('%s did not fail.' % assertion.__name__)
+
+        skipped = unittest2.case.DIFF_SKIPPED % 640
+        msg = fail(self.assertSequenceEqual, seq1, seq2)
+        self.assertIn("\nElement 5: 5 != 'five'\n", msg)
+        self.assertTrue(msg.endswith("\nElements 500 to 999 only in first" +
+                                     skipped))
+
+        msg = fail(self.assertDictEqual, dict(enumerate(seq1)),
+                   dict(enumerate(seq2)))
+        self.assertIn("\nKey 5: 5 != 'five'\n", msg)
+        self.assertIn("\nKey 500 only in first: 500\n", msg)
+        self.assertNotIn('Key 509', msg)
+        self.assertTrue(msg.endswith('\n...' + skipped))
+
+        text1 = '\n'.join(map(str, seq1))
+        text2 = '\n'.join(map(str, seq2))
+        msg = fail(self.assertMultiLineEqual, text1, text2)
+        self.assertIn("\nFirst differing line 6:\n- '5\\n'\n", msg)
+        self.assertIn("\n+ 'five\\n'\n", msg)
+        self.assertTrue(msg.endswith(skipped))
+
+        # long elements are cut short
+        msg = fail(self.assertSequenceEqual, ['x' * 1000], ['y' * 1000])
+        self.assertIn('[truncated]...', msg)
+        self.assertTrue(len(msg) < 1000)
+
+        self.maxDiff = None
+        msg = fail(self.assertSequenceEqual, seq1, seq2)
+        self.assertNotIn(skipped, msg)
+        self.assertIn("\n-  500,\n", msg)
+
     def testTruncateMessage(self):
         self.maxDiff = 1
         message = self._truncateMessage('foo', 'bar')
@@ -0,0 +1,148 @@
+import unittest2
+
+from unittest2.test.support import LoggingResult
+
+
+class Test_SharedFixture(unittest2.TestCase):
+
+    def setUp(self):
+        self.events = []
+
+    def makeFixture(self, scope, **kwargs):
+        events = self.events
+        def factory():
+            value = {'built': len([e for e in events if e[0] == 'build'])}
+            events.append(('build', value['built']))
+            return value
+        def finalize(value):
+            events.append(('finalize', value['built']))
+        return unittest2.SharedFixture(factory, scope, finalize=finalize,
+                                       **kwargs)
+
+    def run_tests(self, *classes):
+        suite = unittest2.TestSuite()
+        for cls in classes:
+            suite.addTests(unittest2.TestLoader().loadTestsFromTestCase(cls))
+        result = unittest2.TestResult()
+        suite.run(result)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.failures, [])
+        return result
+
+    def test_class_scope(self):
+        fixture = self.makeFixture('class')
+        seen = []
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self): seen.append(self.value['built'])
+            def test_2(self): seen.append(self.value['built'])
+        class Bar(unittest2.TestCase):
+            value = fixture
+            def test_1(self): seen.append(self.value['built'])
+
+        self.run_tests(Foo, Bar)
+        self.assertEqual(seen, [0, 0, 1])
+        self.assertEqual(self.events, [('build', 0), ('finalize', 0),
+                                       ('build', 1), ('finalize', 1)])
+
+    def test_module_scope(self):
+        fixture = self.makeFixture('module')
+        seen = []
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self): seen.append(self.value['built'])
+        class Bar(unittest2.TestCase):
+            value = fixture
+            def test_1(self): seen.append(self.value['built'])
+
+        self.run_tests(Foo, Bar)
+        self.assertEqual(seen, [0, 0])
+        self.assertEqual(self.events, [('build', 0), ('finalize', 0)])
+
+    def test_session_scope(self):
+        fixture = self.makeFixture('session')
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self): self.value
+        Foo.__module__ = 'fixture_module_a'
+        class Bar(unittest2.TestCase):
+            value = fixture
+            def test_1(self): self.value
+        Bar.__module__ = 'fixture_module_b'
+
+        self.run_tests(Foo, Bar)
+        self.assertEqual(self.events, [('build', 0), ('finalize', 0)])
+
+    def test_unused_fixture_not_built(self):
+        fixture = self.makeFixture('class')
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self): pass
+
+        self.run_tests(Foo)
+        self.assertEqual(self.events, [])
+        self.assertIs(Foo.value, fixture)
+
+    def test_snapshot_restore(self):
+        restored = []
+        def snapshot(value):
+            return dict(value)
+        def restore(value, state):
+            restored.append(dict(value))
+            value.clear()
+            value.update(state)
+        fixture = self.makeFixture('class', snapshot=snapshot,
+                                   restore=restore)
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self):
+                self.assertEqual(self.value, {'built': 0})
+                self.value['changed'] = True
+                # getting it again in the same test doesn't restore it
+                self.assertTrue(self.value['changed'])
+            def test_2(self):
+                self.assertEqual(self.value, {'built': 0})
+            def test_3(self):
+                pass
+
+        self.run_tests(Foo)
+        self.assertEqual(restored, [{'built': 0, 'changed': True}])
+
+    def test_hidden_by_attribute(self):
+        fixture = self.makeFixture('class')
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def setUp(self):
+                self.value = 'own'
+            def test_1(self):
+                self.assertEqual(self.value, 'own')
+
+        self.run_tests(Foo)
+        self.assertEqual(self.events, [])
+
+    def test_finalize_error(self):
+        def finalize(value):
+            raise ValueError('finalize')
+        def factory():
+            return 1
+        fixture = unittest2.SharedFixture(factory, 'class',
+                                          finalize=finalize)
+        class Foo(unittest2.TestCase):
+            value = fixture
+            def test_1(self): self.value
+
+        events = []
+        result = LoggingResult(events)
+        unittest2.TestSuite([Foo('test_1')]).run(result)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(str(result.errors[0][0]), 'releaseFixture (factory)')
+        self.assertEqual(fixture._values, {})
+
+    def test_arguments(self):
+        self.assertRaises(ValueError, unittest2.SharedFixture, dict, 'test')
+        self.assertRaises(TypeError, unittest2.SharedFixture, dict, 'class',
+                          snapshot=dict)
+
+
+if __name__ == '__main__':
+    unittest2.main()
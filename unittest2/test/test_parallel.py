@@ -0,0 +1,276 @@
+import os
+import sys
+import time
+import types
+
+from cStringIO import StringIO
+
+import unittest2
+from unittest2 import parallel
+from unittest2.test.support import LoggingResult
+
+
+def _runParallel(suite, **kwargs):
+    result = unittest2.TestResult()
+    runner = unittest2.ParallelTestRunner(stream=StringIO(), processes=2,
+                                          **kwargs)
+    runner._makeResult = lambda: result
+    runner.run(suite)
+    return result
+
+
+class Test_partition(unittest2.TestCase):
+
+    def test_by_class(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+            def test_2(self): pass
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+
+        suite = unittest2.TestSuite([Foo('test_1'), Bar('test_1'),
+                                     unittest2.TestSuite([Foo('test_2')])])
+        partitions = parallel.partition(suite)
+        self.assertEqual([[test.id() for test in tests]
+                          for tests in partitions],
+                         [[Foo('test_1').id(), Foo('test_2').id()],
+                          [Bar('test_1').id()]])
+
+    def test_module_fixtures_share_a_partition(self):
+        module = types.ModuleType('partition_module')
+        module.setUpModule = lambda: None
+        sys.modules['partition_module'] = module
+        self.addCleanup(sys.modules.pop, 'partition_module')
+
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+        Foo.__module__ = Bar.__module__ = 'partition_module'
+
+        partitions = parallel.partition(
+            unittest2.TestSuite([Foo('test_1'), Bar('test_1')]))
+        self.assertEqual(len(partitions), 1)
+        self.assertEqual(len(partitions[0]), 2)
+
+    def test_other_suites_kept_whole(self):
+        class Custom(unittest2.TestSuite):
+            def run(self, result):
+                return unittest2.TestSuite.run(self, result)
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+            def test_2(self): pass
+
+        custom = Custom([Foo('test_1')])
+        partitions = parallel.partition(
+            unittest2.TestSuite([custom, Foo('test_2')]))
+        self.assertEqual(partitions, [[custom], [Foo('test_2')]])
+
+
+class Test_ParallelTestRunner(unittest2.TestCase):
+
+    def setUp(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('Tests are only run in parallel with fork')
+
+    def test_results_merged_in_order(self):
+        class Foo(unittest2.TestCase):
+            def test_pass(self): pass
+            def test_fail(self): self.fail('in %d' % os.getpid())
+        class Bar(unittest2.TestCase):
+            def test_error(self): raise ValueError('error')
+            @unittest2.skip('reason')
+            def test_skip(self): pass
+        class Baz(unittest2.TestCase):
+            @unittest2.expectedFailure
+            def test_expected(self): self.fail()
+            @unittest2.expectedFailure
+            def test_unexpected(self): pass
+
+        tests = [Foo('test_pass'), Foo('test_fail'), Bar('test_error'),
+                 Bar('test_skip'), Baz('test_expected'),
+                 Baz('test_unexpected')]
+        events = []
+        result = LoggingResult(events)
+        runner = unittest2.ParallelTestRunner(stream=StringIO(), processes=2)
+        runner._makeResult = lambda: result
+        runner.run(unittest2.TestSuite(tests))
+
+        self.assertEqual(events, ['startTestRun',
+            'startTest', 'addSuccess', 'stopTest',
+            'startTest', 'addFailure', 'stopTest',
+            'startTest', 'addError', 'stopTest',
+            'startTest', 'addSkip', 'stopTest',
+            'startTest', 'addExpectedFailure', 'stopTest',
+            'startTest', 'addUnexpectedSuccess', 'stopTest',
+            'stopTestRun'])
+
+        self.assertEqual(result.testsRun, 6)
+        self.assertIs(result.failures[0][0], tests[1])
+        # The failure happened in another process
+        self.assertIn('AssertionError: in ', result.failures[0][1])
+        self.assertNotIn('in %d' % os.getpid(), result.failures[0][1])
+        self.assertIs(result.errors[0][0], tests[2])
+        self.assertIn('ValueError: error', result.errors[0][1])
+        self.assertEqual(result.skipped, [(tests[3], 'reason')])
+        self.assertIs(result.expectedFailures[0][0], tests[4])
+        self.assertEqual(result.unexpectedSuccesses, [tests[5]])
+
+    def test_setUpClass_error(self):
+        class Foo(unittest2.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                raise ValueError('setUpClass')
+            def test_1(self): pass
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+
+        result = _runParallel(unittest2.TestSuite([Foo('test_1'),
+                                                   Bar('test_1')]))
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(len(result.errors), 1)
+        holder, err = result.errors[0]
+        self.assertEqual(str(holder), 'setUpClass (%s.Foo)' % __name__)
+        self.assertIn('ValueError: setUpClass', err)
+
+    def test_durations(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self): time.sleep(0.05)
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+
+        tests = [Foo('test_1'), Bar('test_1')]
+        result = _runParallel(unittest2.TestSuite(tests))
+        durations = [(test, wall) for test, wall, cpu in result.durations
+                     if test in tests]
+        self.assertEqual([test for test, wall in durations], tests)
+        # measured in the worker rather than when replayed
+        self.assertTrue(durations[0][1] >= 0.04)
+
+    def test_benchmarks(self):
+        class Foo(unittest2.BenchmarkCase):
+            repeat = 3
+            minTime = 0.001
+            def test_1(self): pass
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+
+        tests = [Foo('test_1'), Bar('test_1')]
+        result = _runParallel(unittest2.TestSuite(tests))
+        self.assertEqual(len(result.benchmarks), 1)
+        test, stats = result.benchmarks[0]
+        self.assertIs(test, tests[0])
+        self.assertEqual(stats['repeat'], 3)
+
+    def test_failfast(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self): self.fail()
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+        class Baz(unittest2.TestCase):
+            def test_1(self): pass
+
+        result = _runParallel(unittest2.TestSuite(
+            [Foo('test_1'), Bar('test_1'), Baz('test_1')]), failfast=True)
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(len(result.failures), 1)
+
+    def test_serial_with_one_partition(self):
+        pids = []
+        class Foo(unittest2.TestCase):
+            def test_1(self): pids.append(os.getpid())
+            def test_2(self): pids.append(os.getpid())
+
+        result = _runParallel(unittest2.TestSuite([Foo('test_1'),
+                                                   Foo('test_2')]))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(pids, [os.getpid()] * 2)
+
+    def test_tests_may_start_processes(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self):
+                import multiprocessing
+                process = multiprocessing.Process(target=int)
+                process.start()
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+        class Bar(unittest2.TestCase):
+            def test_1(self): pass
+
+        result = _runParallel(unittest2.TestSuite([Foo('test_1'),
+                                                   Bar('test_1')]))
+        self.assertEqual(result.testsRun, 2)
+        self.assertTrue(result.wasSuccessful())
+
+
+class Test_TestProgram_processes(unittest2.TestCase):
+
+    def setUp(self):
+        class Program(unittest2.TestProgram):
+            def __init__(self):
+                pass
+        self.program = Program()
+        self.program.createTests = lambda: None
+        self.program.defaultTest = None
+        self.program.module = None
+
+    def test_option(self):
+        program = self.program
+        program.parseArgs([None, '-j', '4'])
+        self.assertEqual(program.processes, 4)
+
+    def test_discover_option(self):
+        class Loader(object):
+            def discover(self, *args):
+                return None
+        program = self.program
+        program.progName = 'test'
+        program._do_discovery(['-j', '0'], Loader=Loader)
+        self.assertEqual(program.processes, 0)
+
+    def test_bad_option(self):
+        program = self.program
+        def usageExit(msg=None):
+            program.msg = msg
+        program.usageExit = usageExit
+        program.parseArgs([None, '-j', 'many'])
+        self.assertIn('-j', program.msg)
+
+    def test_runner(self):
+        # stand-ins, so that nothing is written to the real stderr
+        made = []
+        def fake(name):
+            class FakeRunner(object):
+                def __init__(self, **kwargs):
+                    made.append((name, kwargs))
+                def run(self, test):
+                    return unittest2.TestResult()
+            return FakeRunner
+        originals = (unittest2.runner.TextTestRunner,
+                     parallel.ParallelTestRunner)
+        def restore():
+            (unittest2.runner.TextTestRunner,
+             parallel.ParallelTestRunner) = originals
+        self.addCleanup(restore)
+        unittest2.runner.TextTestRunner = fake('text')
+        parallel.ParallelTestRunner = fake('parallel')
+
+        program = self.program
+        program.verbosity = 1
+        program.test = unittest2.TestSuite()
+        program.exit = False
+        for processes, runnerClass in ((None, unittest2.runner.TextTestRunner),
+                                       (1, unittest2.runner.TextTestRunner),
+                                       (2, parallel.ParallelTestRunner)):
+            program.testRunner = None
+            program.processes = processes
+            program.runTests()
+            self.assertIs(program.testRunner, runnerClass)
+        self.assertEqual([name for name, kwargs in made],
+                         ['text', 'text', 'parallel'])
+        self.assertNotIn('processes', made[1][1])
+        self.assertEqual(made[2][1]['processes'], 2)
+
+
+if __name__ == '__main__':
+    unittest2.main()
@@ -166,6 +166,43 @@ class TestCommandLineArgs(unittest2.TestCase):
                 program.parseArgs([None, opt])
                 self.assertEqual(getattr(program, attr), not_none)
 
+    def testDurations(self):
+        program = self.program
+        program.parseArgs([None, '--durations', '10',
+                           '--durations-file', 'durations.json'])
+        self.assertEqual(program.durations, 10)
+        self.assertEqual(program.durationsFile, 'durations.json')
+
+        program.testRunner = FakeRunner
+        program.runTests()
+        self.assertEqual(FakeRunner.initArgs['durations'], 10)
+        self.assertEqual(FakeRunner.initArgs['durationsFile'],
+                         'durations.json')
+
+    def testReport(self):
+        program = self.program
+        program.parseArgs([None, '--report', 'results.xml',
+                           '--report-format', 'junit'])
+        self.assertEqual(program.report, 'results.xml')
+        self.assertEqual(program.reportFormat, 'junit')
+
+        program.testRunner = FakeRunner
+        program.runTests()
+        self.assertEqual(FakeRunner.initArgs['report'], 'results.xml')
+        self.assertEqual(FakeRunner.initArgs['reportFormat'], 'junit')
+
+        def usageExit(msg=None):
+            program.msg = msg
+        program.usageExit = usageExit
+        program.reportFormat = None
+        program.parseArgs([None, '--report-format', 'html'])
+        self.assertIn('--report-format', program.msg)
+
+    def testPrioritize(self):
+        program = self.program
+        program.parseArgs([None, '--prioritize'])
+        self.assertTrue(program.prioritize)
+
     def testRunTestsRunnerClass(self):
         program = self.program
         
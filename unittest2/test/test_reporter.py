@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+
+from cStringIO import StringIO
+from xml.dom import minidom
+
+try:
+    import json
+except ImportError:
+    # Python 2.4 and 2.5
+    import simplejson as json
+
+import unittest2
+from unittest2.cache import TestHistory
+from unittest2.reporter import StreamingTestResult
+
+
+def _outcomes():
+    class Outcomes(unittest2.TestCase):
+        def test_pass(self): pass
+        def test_fail(self): self.fail('bad <value> \x00')
+        def test_error(self): raise ValueError('error')
+        @unittest2.skip('reason')
+        def test_skip(self): pass
+        @unittest2.expectedFailure
+        def test_expected(self): self.fail()
+        @unittest2.expectedFailure
+        def test_unexpected(self): pass
+    return unittest2.TestSuite([Outcomes(name) for name in
+        ('test_pass', 'test_fail', 'test_error', 'test_skip',
+         'test_expected', 'test_unexpected')])
+
+
+class Test_StreamingTestResult(unittest2.TestCase):
+
+    def run_suite(self, suite, reportFormat='jsonl',
+                  runnerClass=unittest2.TextTestRunner, **kwargs):
+        report = StringIO()
+        self.output = StringIO()
+        runner = runnerClass(stream=self.output, report=report,
+                             reportFormat=reportFormat, **kwargs)
+        result = runner.run(suite)
+        return result, report.getvalue()
+
+    def test_json_lines(self):
+        suite = _outcomes()
+        tests = list(suite)
+        result, report = self.run_suite(suite)
+        records = [json.loads(line) for line in report.splitlines()]
+        self.assertEqual([(record.get('id'), record.get('outcome'))
+                          for record in records[:-1]],
+            [(test.id(), outcome) for test, outcome in
+             zip(tests, ('success', 'failure', 'error', 'skip',
+                         'expectedFailure', 'unexpectedSuccess'))])
+        self.assertIn('AssertionError: bad <value>', records[1]['traceback'])
+        self.assertIn('ValueError: error', records[2]['traceback'])
+        self.assertEqual(records[3]['reason'], 'reason')
+        self.assertNotIn('traceback', records[0])
+        for record in records[:-1]:
+            self.assertTrue(record['time'] >= 0)
+
+        summary = records[-1]['summary']
+        self.assertEqual(summary['testsRun'], 6)
+        self.assertEqual(summary['failures'], 1)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['skipped'], 1)
+        self.assertFalse(summary['successful'])
+
+        # the text output is the same, with the tracebacks as they happen
+        output = self.output.getvalue()
+        self.assertIn('FAIL: test_fail', output)
+        self.assertIn('ERROR: test_error', output)
+        self.assertIn('FAILED (failures=1, errors=1, skipped=1, '
+                      'expected failures=1, unexpected successes=1)', output)
+
+    def test_nothing_kept(self):
+        suite = _outcomes()
+        tests = list(suite)
+        result, report = self.run_suite(suite)
+        self.assertEqual(result.failures, [(tests[1], None)])
+        self.assertEqual(result.errors, [(tests[2], None)])
+        self.assertEqual(result.expectedFailures, [(tests[4], None)])
+        # between the class fixtures
+        self.assertEqual([(test.id(), str(test))
+                          for test, wall, cpu in result.durations[1:-1]],
+                         [(test.id(), str(test)) for test in tests])
+        for test, wall, cpu in result.durations:
+            self.assertFalse(isinstance(test, unittest2.TestCase))
+        self.assertFalse(result.wasSuccessful())
+
+    def test_durations(self):
+        class Foo(unittest2.TestCase):
+            @classmethod
+            def setUpClass(cls): pass
+            def test_1(self): pass
+        result, report = self.run_suite(unittest2.TestSuite([Foo('test_1')]),
+                                        durations=0)
+        output = self.output.getvalue()
+        self.assertIn('Slowest durations', output)
+        self.assertIn('test_1 (%s.Foo)' % __name__, output)
+        self.assertIn('setUpClass (%s.Foo)' % __name__, output)
+
+        history = TestHistory()
+        history.record(result)
+        self.assertIn('time', history.tests[Foo('test_1').id()])
+        self.assertIn('time', history.tests['%s.Foo' % __name__])
+
+    def test_resultclass(self):
+        self.assertRaises(ValueError, unittest2.TextTestRunner,
+                          stream=StringIO(), report=StringIO(),
+                          resultclass=unittest2.TextTestResult)
+        self.assertRaises(ValueError, unittest2.TextTestRunner,
+                          stream=StringIO(), report=StringIO(),
+                          resultclass=unittest2.TestResult)
+
+    def test_written_as_they_finish(self):
+        report = StringIO()
+        seen = []
+        class Foo(unittest2.TestCase):
+            def test_1(self): pass
+            def test_2(self): seen.append(report.getvalue())
+        runner = unittest2.TextTestRunner(stream=StringIO(), report=report)
+        runner.run(unittest2.TestSuite([Foo('test_1'), Foo('test_2')]))
+        self.assertEqual(len(seen[0].splitlines()), 1)
+        self.assertIn(Foo('test_1').id(), seen[0])
+
+    def test_fixture_error(self):
+        class Foo(unittest2.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                raise ValueError('setUpClass')
+            def test_1(self): pass
+        result, report = self.run_suite(unittest2.TestSuite([Foo('test_1')]))
+        record = json.loads(report.splitlines()[0])
+        self.assertEqual(record['id'], 'setUpClass (%s.Foo)' % __name__)
+        self.assertEqual(record['outcome'], 'error')
+
+    def test_junit(self):
+        result, report = self.run_suite(_outcomes(), reportFormat='junit')
+        document = minidom.parseString(report)
+        cases = document.getElementsByTagName('testcase')
+        self.assertEqual([case.getAttribute('name') for case in cases],
+                         ['test_pass', 'test_fail', 'test_error', 'test_skip',
+                          'test_expected', 'test_unexpected'])
+        self.assertEqual(cases[0].getAttribute('classname'),
+                         '%s.Outcomes' % __name__)
+        failure = cases[1].getElementsByTagName('failure')[0]
+        self.assertEqual(failure.getAttribute('message'),
+                         'AssertionError: bad <value> ?')
+        self.assertIn('Traceback', failure.firstChild.data)
+        self.assertTrue(cases[2].getElementsByTagName('error'))
+        skipped = cases[3].getElementsByTagName('skipped')[0]
+        self.assertEqual(skipped.getAttribute('message'), 'reason')
+        self.assertEqual(cases[4].childNodes, [])
+        self.assertTrue(cases[5].getElementsByTagName('failure'))
+
+    def test_report_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, 'report.jsonl')
+        runner = unittest2.TextTestRunner(stream=StringIO(), report=filename)
+        runner.run(unittest2.TestSuite([list(_outcomes())[0]]))
+        f = open(filename)
+        try:
+            lines = f.readlines()
+        finally:
+            f.close()
+        self.assertEqual(len(lines), 2)
+
+    def test_parallel(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('Tests are only run in parallel with fork')
+        class Foo(unittest2.TestCase):
+            def test_1(self): self.fail()
+        result, report = self.run_suite(
+            unittest2.TestSuite([Foo('test_1'), list(_outcomes())[0]]),
+            runnerClass=unittest2.ParallelTestRunner, processes=2)
+        records = [json.loads(line) for line in report.splitlines()]
+        self.assertEqual([record.get('outcome') for record in records[:-1]],
+                         ['failure', 'success'])
+        self.assertIn('AssertionError', records[0]['traceback'])
+
+    def test_bad_format(self):
+        self.assertRaises(ValueError, StreamingTestResult, StringIO(),
+                          True, 1, StringIO(), 'html')
+
+
+if __name__ == '__main__':
+    unittest2.main()
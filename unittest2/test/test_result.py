@@ -290,6 +290,38 @@ class Test_TestResult(unittest2.TestCase):
         runner.run(test)
         self.assertTrue(self.testRan)
 
+    def testDurations(self):
+        class Foo(unittest2.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                pass
+            def test_1(self):
+                pass
+        test = Foo('test_1')
+        result = unittest2.TestResult()
+        unittest2.TestSuite([test]).run(result)
+
+        self.assertEqual(len(result.durations), 3)
+        setUpClass, tested, tearDownClass = [d[0] for d in result.durations]
+        self.assertEqual(str(setUpClass), 'setUpClass (%s.Foo)' % __name__)
+        self.assertIs(tested, test)
+        self.assertEqual(str(tearDownClass),
+                         'tearDownClass (%s.Foo)' % __name__)
+        for _, wall, cpu in result.durations:
+            self.assertTrue(wall >= 0)
+            self.assertTrue(cpu >= 0)
+
+    def testAddDurationReplacesMeasuredDuration(self):
+        class Foo(unittest2.TestCase):
+            def test_1(self):
+                pass
+        test = Foo('test_1')
+        result = unittest2.TestResult()
+        result.startTest(test)
+        result.addDuration(test, 5.0, 1.0)
+        result.stopTest(test)
+        self.assertEqual(result.durations, [(test, 5.0, 1.0)])
+
 
 class TestOutputBuffering(unittest2.TestCase):
 
@@ -1,8 +1,15 @@
+import os
 import pickle
+import tempfile
 
 from cStringIO import StringIO
 from unittest2.test.support import LoggingResult, OldTestResult
 
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
 import unittest2
 
 
@@ -124,6 +131,48 @@ class Test_TextTestRunner(unittest2.TestCase):
         # test result objects
         runner.run(Test('testFoo'))
 
+    def test_durations(self):
+        class Test(unittest2.TestCase):
+            def testFoo(self):
+                pass
+            def testBar(self):
+                pass
+        stream = StringIO()
+        runner = unittest2.TextTestRunner(stream=stream, durations=1)
+        result = unittest2.TestResult()
+        result.addDuration(Test('testFoo'), 2.0, 0.5)
+        result.addDuration(Test('testBar'), 3.0, 0.25)
+        runner._makeResult = lambda: result
+        runner.run(unittest2.TestSuite())
+
+        output = stream.getvalue()
+        self.assertIn('Slowest durations', output)
+        self.assertIn('   3.000s    0.250s  testBar', output)
+        self.assertNotIn('testFoo', output)
+
+    def test_durations_file(self):
+        class Test(unittest2.TestCase):
+            def testFoo(self):
+                pass
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        stream = StringIO()
+        runner = unittest2.TextTestRunner(stream=stream, durationsFile=path)
+        runner.run(Test('testFoo'))
+
+        self.assertNotIn('Slowest durations', stream.getvalue())
+        f = open(path)
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+        self.assertEqual([d['id'] for d in data['durations']],
+                         [Test('testFoo').id()])
+        self.assertEqual(sorted(data['durations'][0]),
+                         ['cpu', 'id', 'wall'])
+        self.assertTrue(data['timeTaken'] >= 0)
+
 
 if __name__ == '__main__':
     unittest2.main()
\ No newline at end of file
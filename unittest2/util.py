@@ -1,5 +1,8 @@
 """Various utility functions."""
 
+import os
+import time
+
 __unittest = True
 
 
@@ -13,15 +16,23 @@ def safe_repr(obj, short=False):
         return result
     return result[:_MAX_LENGTH] + ' [truncated]...'
 
-def safe_str(obj):
+def safe_str(obj, short=False):
     try:
-        return str(obj)
+        result = str(obj)
     except Exception:
-        return object.__str__(obj)
+        result = object.__str__(obj)
+    if not short or len(result) < _MAX_LENGTH:
+        return result
+    return result[:_MAX_LENGTH] + ' [truncated]...'
 
 def strclass(cls):
     return "%s.%s" % (cls.__module__, cls.__name__)
 
+def clock():
+    """Return the wall clock time and the CPU time used by this process."""
+    user, system = os.times()[:2]
+    return time.time(), user + system
+
 def sorted_list_difference(expected, actual):
     """Finds elements in only one or the other of two, sorted input lists.
 
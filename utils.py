@@ -3,8 +3,20 @@ from Queue import PriorityQueue
 DISTANCE_TO_CRUISE = 200
 CRUISE_SPEED = 750
 
+def writer(function):
+  """Mark a method as one which changes the database's data, so that
+  MapDatabase.do runs it with exclusive access.
+
+  """
+  function.writes = True
+  return function
+
 def find_adjacent(code, routes):
   """Given an airport code, return a set of adjacent airports."""
+  if hasattr(routes, 'adjacent'):
+    # Mapped databases look up adjacent airports in their route graph.
+    return routes.adjacent(code)
+
   routes_with_city = routes_with(routes, code)
 
   ports = set()
@@ -23,12 +35,37 @@ def find_route(routes, code_a, code_b):
   if code_a == code_b:
     raise ValueError('Both endpoints cannot be the same.')
 
-  for route in routes:
-    if code_a in route and code_b in route:
+  if hasattr(routes, 'find'):
+    route = routes.find(code_a, code_b)
+    if route is not None:
       return route
+
+  else:
+    for route in routes:
+      if code_a in route and code_b in route:
+        return route
+
   raise ValueError('A route from %s to %s was not found in the database' % \
     (code_a, code_b))
 
+def parse_route(raw_route):
+  """Given a route's json dict, return its (code, code, distance) tuple."""
+  return make_route(raw_route['ports'], raw_route['distance'])
+
+def make_route(ports, distance):
+  """Given a route's ports and distance, return its (code, code, distance)
+  tuple. The codes are interned, since every code is in several routes.
+
+  """
+  return intern(str(ports[0])), intern(str(ports[1])), distance
+
+def format_route(route):
+  """Given a route tuple, return the dict stored in json files."""
+  return {
+    'distance': route[2],
+    'ports': [ route[0], route[1] ]
+  }
+
 def routes_with(routes, code):
   """Using a lambda matcher, filter routes by one code."""
   matcher = lambda route: code in route
@@ -51,15 +88,15 @@ def change_code(old_code, new_code, city_data, routes):
   routes_with_code = routes_with(routes, old_code)
   
   routes.difference_update(routes_with_code) # Remove old routes.
+  updated_routes = []
   for route in routes_with_code:
     if route[0] == old_code:
       updated_route = (new_code, route[1], route[2])
     else:
       updated_route = (route[0], new_code, route[2])
-    routes_with_code.remove(route)
-    routes_with_code.append(updated_route)
+    updated_routes.append(updated_route)
 
-  routes.update(routes_with_code)
+  routes.update(updated_routes)
 
 def route_time(routes, source, destination, layover=True):
   """Calculate the time of a single route."""
@@ -90,7 +127,8 @@ def dijkstra(source, destination, city_data, routes):
   for code in city_data.keys():
     distances[code] = float('inf')
   
-  queue = PriorityQueue(len(city_data))
+  # Unbounded, since a city is queued again each time its distance improves.
+  queue = PriorityQueue()
   queue.put((0, destination))
   
   while not queue.empty():
@@ -1,5 +1,6 @@
 import utils
 import simplejson
+import mapped_database
 
 # Edit Methods:
 #   The following methods primarily write to and delete from the database.
@@ -7,14 +8,11 @@ import simplejson
 def save(filename, city_data, routes, sources):
   """Write the database to a json file."""
   metros = city_data.values()
-  
-  def format_routes(route):
-    return {
-      'distance': route[2],
-      'ports': [ route[0], route[1] ]
-    }
-  
-  formatted_routes = map(format_routes, routes)
+  # Each route is encoded straight from its tuple, as utils.format_route would
+  # format it, without building a dict per route.
+  formatted_routes = simplejson.Records(
+    ((route[2], (route[0], route[1])) for route in routes),
+    ('distance', 'ports'))
   
   data = {
     'data sources': sources,
@@ -24,10 +22,73 @@ def save(filename, city_data, routes, sources):
   
   try:
     json_file = open(filename, 'w')
-    simplejson.dump(data, json_file, indent='\t')
+    # dumps() encodes in one shot, which can use the C speedups.
+    json_file.write(simplejson.dumps(data, indent='\t'))
+  except IOError:
+    raise IOError('Error: Couldn\'t write to "%s".' % filename)
+
+def save_mapped(filename, city_data, routes, sources):
+  """Write the database to a read-only binary file which can be memory-mapped
+  by mapped_database.MappedDatabase.
+
+  Throw a ValueError if a route's distance isn't an integer.
+
+  """
+  try:
+    mapped_database.write(filename, city_data, routes, sources)
   except IOError:
     raise IOError('Error: Couldn\'t write to "%s".' % filename)
 
+@utils.writer
+def import_cities(filename, city_data, routes):
+  """Add every city in a json lines file, one city's dict per line, and return
+  how many were added.
+
+  Throw a ValueError if a city already exists with the same code. Cities on
+  earlier lines stay in the database.
+
+  """
+  try:
+    feed = open(filename)
+  except IOError:
+    raise IOError('Couldn\'t open file "%s".' % filename)
+
+  count = 0
+  try:
+    for city in simplejson.load_lines(feed):
+      add_city(city, city_data, routes)
+      count += 1
+  finally:
+    feed.close()
+
+  return count
+
+@utils.writer
+def import_routes(filename, city_data, routes):
+  """Add every route in a json lines file and return how many were added.
+  Each line holds a route's dict, as in the "routes" of a saved database.
+
+  Throw a KeyError if one of a route's cities isn't in the database. Routes on
+  earlier lines stay in the database.
+
+  """
+  try:
+    feed = open(filename)
+  except IOError:
+    raise IOError('Couldn\'t open file "%s".' % filename)
+
+  count = 0
+  try:
+    for raw_route in simplejson.load_lines(feed):
+      port_a, port_b, distance = utils.parse_route(raw_route)
+      add_route(port_a, port_b, distance, city_data, routes)
+      count += 1
+  finally:
+    feed.close()
+
+  return count
+
+@utils.writer
 def del_city(city_name, city_data, routes):
   """Delete all airports in a city and return their airport codes."""
   ports_with_name = lambda city: city['name'] == city_name
@@ -45,6 +106,7 @@ def del_city(city_name, city_data, routes):
   
   return codes
 
+@utils.writer
 def del_route(port_a, port_b, city_data, routes):
   """Given two airport codes, remove the route connecting the airports.
 
@@ -65,6 +127,7 @@ def del_route(port_a, port_b, city_data, routes):
 
   raise KeyError('Could not find route between %s and %s.' % (port_a, port_b))
 
+@utils.writer
 def add_city(new_city, city_data, routes):
   """Add a new city to the database.
 
@@ -82,6 +145,7 @@ def add_city(new_city, city_data, routes):
 
   city_data[code] = new_city
 
+@utils.writer
 def edit_city(code, data, city_data, routes, key=None):
   """Edit an airport's data element or data dictionary.
 
@@ -113,6 +177,7 @@ def edit_city(code, data, city_data, routes, key=None):
     if key == 'code':
       utils.change_code(code, data, city_data, routes)
 
+@utils.writer
 def add_route(port_a, port_b, distance, city_data, routes):
   """Add a new route to the database.
 